@@ -0,0 +1,48 @@
+"""
+Synthetic station catalogs for the benchmarks. Seeded, so every run sees
+the same data, and shaped like radio-browser / iptv-org responses.
+"""
+import random
+
+COUNTRIES = ['US', 'GB', 'DE', 'FR', 'BR', 'JP', 'IN', 'AU', 'CA', 'ES']
+TAGS = ['news', 'jazz', 'rock', 'pop', 'talk', 'classical', 'dance', 'country', 'ambient', 'sports']
+CODECS = ['MP3', 'AAC', 'AAC+', 'OGG']
+
+def make_stations(n, seed=0, with_frequencies=True):
+    rng = random.Random(seed)
+    stations = []
+    for i in range(n):
+        station = {
+            'stationuuid': f"{rng.getrandbits(128):032x}",
+            'name': f"{rng.choice(TAGS).title()} Radio {i}",
+            'url_resolved': f"http://stream{i % 97}.example.invalid/{i}.mp3",
+            'country': rng.choice(COUNTRIES),
+            'tags': ','.join(rng.sample(TAGS, 3)),
+            'codec': rng.choice(CODECS),
+            'bitrate': rng.choice([64, 96, 128, 192, 320]),
+        }
+        if with_frequencies:
+            station['frequency'] = round(rng.uniform(87.5, 108.0), 1)
+        stations.append(station)
+    return stations
+
+def make_m3u(n, seed=0):
+    rng = random.Random(seed)
+    lines = ['#EXTM3U']
+    for i in range(n):
+        group = rng.choice(TAGS).title()
+        lines.append(f'#EXTINF:-1 tvg-id="ch{i}.example" tvg-logo="http://logo.example.invalid/{i}.png" '
+                     f'group-title="{group}",{group} Channel {i}')
+        if i % 5 == 0:
+            lines.append('#EXTVLCOPT:http-user-agent=Mozilla/5.0')
+        lines.append(f"http://tv{i % 31}.example.invalid/{i}/index.m3u8")
+    return '\n'.join(lines) + '\n'
+
+def make_search_results(n, seed=0):
+    """
+    Name and tag result lists for search_stations, overlapping by half
+    like real name/tag searches for the same word do.
+    """
+    stations = make_stations(n, seed)
+    half = n // 2
+    return stations[:half + half // 2], stations[half // 2:]
@@ -0,0 +1,116 @@
+"""
+End-to-end latency of the fetch pipeline against local stand-in mirrors
+with injected faults. Nothing leaves the machine.
+
+Examples:
+    python benchmarks/load_test.py
+    python benchmarks/load_test.py --runs 10 --only healthy,flaky
+    python benchmarks/load_test.py --catalog-size 20000
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import contextlib
+import io
+import statistics
+import time
+
+from benchmarks.standin_server import StandInServer, Faults
+from core.station_manager import StationManager
+
+# Clients time out after 5s (2s for /stats), hanging a bit longer is enough
+HANG = 6.0
+
+# name -> (primary faults, [mirror faults]); the primary is also listed
+# as a mirror, like the real de1 is.
+SCENARIOS = {
+    'healthy': (Faults(), []),
+    'slow': (Faults(latency=0.3, jitter=0.1), []),
+    'flaky': (Faults(error_rate=0.3), []),
+    'slow_body': (Faults(body_rate=200000), []),
+    'timeouts': (Faults(timeout_rate=0.2, hang=HANG), []),
+    'failover_down': (Faults(error_rate=1.0), [Faults(error_rate=1.0), Faults()]),
+    'failover_hang': (Faults(timeout_rate=1.0, hang=HANG), [Faults(latency=0.2), Faults()]),
+    # Healthy but slow primary, requests get hedged to the fast mirror
+    'slow_primary': (Faults(latency=1.5), [Faults()]),
+}
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+def summarize(samples):
+    if not samples:
+        return "-"
+    return (f"p50 {statistics.median(samples):6.2f}s  p95 {percentile(samples, 0.95):6.2f}s  "
+            f"max {max(samples):6.2f}s")
+
+def run_scenario(name, runs, catalog_size):
+    primary_faults, mirror_faults = SCENARIOS[name]
+    servers = [StandInServer(primary_faults, catalog_size, seed=0).start()]
+    servers += [StandInServer(f, catalog_size, seed=0).start() for f in mirror_faults]
+    primary = servers[0]
+    # Somewhere with stations nearby
+    lat, lon = primary.stations[0]['geo_lat'], primary.stations[0]['geo_long']
+    country = primary.stations[0]['country']
+
+    timings = {'fetch_all': [], 'search': [], 'failover': []}
+    complete = 0
+    switched = 0
+    try:
+        for _ in range(runs):
+            with contextlib.redirect_stdout(io.StringIO()):
+                manager = StationManager(
+                    base_url=f"{primary.url}/json/stations",
+                    mirrors=[f"{s.url}/json" for s in servers],
+                    iptv_base=f"{primary.url}/iptv",
+                )
+
+                start = time.perf_counter()
+                manager._ensure_server()
+                timings['failover'].append(time.perf_counter() - start)
+                if not manager.base_url.startswith(primary.url):
+                    switched += 1
+
+                start = time.perf_counter()
+                manager.fetch_all(country, None, lat, lon)
+                timings['fetch_all'].append(time.perf_counter() - start)
+                # The hardcoded fallback list has no stationuuids
+                if manager.stations['national'] and all(s.get('stationuuid') for s in manager.stations['international']):
+                    complete += 1
+
+                start = time.perf_counter()
+                manager.search_stations("radio")
+                timings['search'].append(time.perf_counter() - start)
+    finally:
+        for server in servers:
+            server.stop()
+
+    requests_served = sum(s.stats['requests'] for s in servers)
+    print(f"\n{name}: {primary_faults}" + (f" + {len(mirror_faults)} mirror(s)" if mirror_faults else ""))
+    print(f"  server check  {summarize(timings['failover'])}  switched {switched}/{runs}")
+    print(f"  fetch_all     {summarize(timings['fetch_all'])}  complete {complete}/{runs}")
+    print(f"  search        {summarize(timings['search'])}")
+    print(f"  {requests_served} requests served")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test StationManager against local stand-in mirrors.")
+    parser.add_argument('--runs', type=int, default=5, help="Iterations per scenario (default: %(default)s)")
+    parser.add_argument('--only', help="Comma-separated scenarios: " + ', '.join(SCENARIOS))
+    parser.add_argument('--catalog-size', type=int, default=5000)
+    args = parser.parse_args(argv)
+
+    names = args.only.split(',') if args.only else list(SCENARIOS)
+    unknown = [n for n in names if n not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(unknown)}")
+
+    for name in names:
+        run_scenario(name, args.runs, args.catalog_size)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,308 @@
+"""
+Offline microbenchmarks for the hot paths, with a regression report
+against a stored baseline.
+
+Examples:
+    python benchmarks/run.py
+    python benchmarks/run.py --sizes 100,10000 --only closest,scan
+    python benchmarks/run.py --save-baseline
+    python benchmarks/run.py --check --threshold 0.5
+"""
+import os
+import sys
+
+# Headless and silent: no window, no audio device, no network
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+import platform
+import shutil
+import statistics
+import tempfile
+import time
+import warnings
+from types import SimpleNamespace
+
+import pygame
+
+from benchmarks.catalog import make_stations, make_m3u, make_search_results
+from core.config_manager import ConfigManager
+from core.favorites_manager import FavoritesManager
+from core.search_index import SearchIndex
+from core.station_manager import StationManager
+from core.station_table import StationTable
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+DEFAULT_SIZES = (100, 10000, 100000)
+
+def _controller(station_manager):
+    """
+    An EventController with only the state the tuning paths read. Building
+    the real one would start libvlc, the mixer and the clipboard worker.
+    """
+    from ui.event_controller import EventController
+    from ui.input_source import LiveInput
+    controller = EventController.__new__(EventController)
+    controller.station_manager = station_manager
+    controller.input = LiveInput()
+    controller.favorites_manager = None
+    controller.stream_player = SimpleNamespace(current_url=None)
+    controller.mode = 'radio'
+    controller.bands = ['national']
+    controller.band_indices = {'national': 0}
+    controller.current_band_index = 0
+    controller.current_frequency = 87.5
+    controller._cached_closest = None
+    controller._cached_freq = None
+    controller._cached_band_idx = None
+    controller._cached_version = None
+    controller.last_scan_time = 0
+    return controller
+
+# Each case takes (size, workdir) and returns (fn, ops): fn() performs ops
+# operations, and the report is per operation.
+
+def case_assign_frequencies(size, workdir):
+    station_manager = StationManager()
+    stations = make_stations(size, with_frequencies=False)
+    def run():
+        for s in stations:
+            s.pop('frequency', None)
+        station_manager._assign_frequencies(stations)
+    return run, 1
+
+# Every 0.1 MHz step across the dial
+DIAL = [round(87.5 + i / 10, 1) for i in range(206)]
+
+def case_closest(size, workdir):
+    station_manager = StationManager()
+    station_manager.publish('national', make_stations(size))
+    controller = _controller(station_manager)
+    def run():
+        for freq in DIAL:
+            controller.current_frequency = freq
+            controller._get_closest_station()
+    return run, len(DIAL)
+
+def case_scan(size, workdir):
+    station_manager = StationManager()
+    station_manager.publish('national', make_stations(size))
+    controller = _controller(station_manager)
+    steps = 50
+    def run():
+        controller.current_frequency = 87.5
+        for _ in range(steps):
+            controller.last_scan_time = -1000 # Defeat the key-repeat debounce
+            controller._scan_station(1)
+    return run, steps
+
+def case_parse_m3u(size, workdir):
+    station_manager = StationManager()
+    content = make_m3u(size)
+    return (lambda: station_manager._parse_m3u(content)), 1
+
+def case_search_dedupe(size, workdir):
+    station_manager = StationManager()
+    by_name, by_tag = make_search_results(size)
+    def fake_fetch(url, limit, params=None, deadline=None, band_filter=None):
+        return by_name if 'name' in params else by_tag
+    station_manager._fetch = fake_fetch
+    return (lambda: station_manager.search_stations("radio", limit=size)), 1
+
+# Typed one key at a time, the last two with a typo
+KEYSTROKES = ["j", "ja", "jaz", "jazz", "jazz r", "jazz ra", "jazz rad", "jazz radoi", "jazz radoi 1"]
+
+def case_search_index(size, workdir):
+    index = SearchIndex()
+    stations = make_stations(size)
+    half = size // 2
+    index.update(('radio', 'national'), stations[:half])
+    index.update(('tv', 'news'), stations[half:])
+    def run():
+        for query in KEYSTROKES:
+            index.search(query, limit=6, prefer=('radio', 'national'))
+    return run, len(KEYSTROKES)
+
+def case_search_index_update(size, workdir):
+    index = SearchIndex()
+    stations = make_stations(size)
+    index.update(('radio', 'national'), stations)
+    # A refresh that replaces a tenth of the band
+    refreshed = stations[size // 10:] + make_stations(size // 10, seed=1)
+    def run():
+        index.update(('radio', 'national'), refreshed)
+        index.update(('radio', 'national'), stations)
+    return run, 2
+
+def case_favorites(size, workdir):
+    config = ConfigManager(os.path.join(workdir, f"favorites_{size}"))
+    config.save_json("favorites.json", {'radio': make_stations(size), 'tv': []})
+    favorites = FavoritesManager(config, StationTable(config))
+    extra = make_stations(1, seed=1)[0]
+    def run():
+        favorites.add_favorite(extra)
+        favorites.remove_favorite(extra)
+    return run, 2
+
+def case_config(size, workdir):
+    config = ConfigManager(os.path.join(workdir, f"config_{size}"))
+    stations = make_stations(size)
+    def run():
+        config.save_json("stations_cache.json", stations)
+        config.load_json("stations_cache.json")
+    return run, 2
+
+def case_render(size, workdir):
+    from ui.pygame_renderer import PygameRenderer
+    renderer = PygameRenderer()
+    stations = make_stations(size)
+    frames = 30
+    def run():
+        for i in range(frames):
+            renderer.render({
+                'mode': 'radio',
+                'current_station': stations[i % size],
+                'frequency': stations[i % size]['frequency'],
+                'volume': 0.5,
+                'active_panel': 'national',
+                'is_muted': False,
+                'input_mode': False,
+                'input_text': '',
+                'channel_index': i % size + 1,
+                'total_channels': size,
+            })
+    return run, frames
+
+CASES = {
+    'assign_frequencies': case_assign_frequencies,
+    'closest': case_closest,
+    'scan': case_scan,
+    'parse_m3u': case_parse_m3u,
+    'search_dedupe': case_search_dedupe,
+    'search_index': case_search_index,
+    'search_index_update': case_search_index_update,
+    'favorites': case_favorites,
+    'config': case_config,
+    'render': case_render,
+}
+
+def measure(fn, ops, repeat, budget):
+    """
+    Median seconds per operation over up to repeat runs, stopping early
+    once budget seconds are spent (the 100k cases can take a while).
+    """
+    fn() # Warm up caches and lazy imports
+    samples = []
+    spent = 0.0
+    while len(samples) < repeat and (not samples or spent < budget):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        samples.append(elapsed / ops)
+        spent += elapsed
+    return statistics.median(samples), len(samples)
+
+def load_baseline(path):
+    try:
+        with open(path, 'r') as f:
+            return json.load(f).get('results', {})
+    except (OSError, ValueError):
+        return {}
+
+def save_baseline(path, results):
+    data = {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'created_at': int(time.time()),
+        'results': results,
+    }
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=4, sort_keys=True)
+
+def format_time(seconds):
+    if seconds >= 1:
+        return f"{seconds:.2f} s"
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.2f} ms"
+    return f"{seconds * 1e6:.1f} us"
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run offline microbenchmarks for the radio's hot paths.")
+    parser.add_argument('--sizes', default=','.join(str(s) for s in DEFAULT_SIZES),
+                        help="Comma-separated catalog sizes (default: %(default)s)")
+    parser.add_argument('--only', help="Comma-separated case names: " + ', '.join(CASES))
+    parser.add_argument('--repeat', type=int, default=5, help="Runs per case (default: %(default)s)")
+    parser.add_argument('--budget', type=float, default=3.0, help="Seconds per case before stopping early (default: %(default)s)")
+    parser.add_argument('--baseline', default=BASELINE_FILE, help="Baseline JSON (default: benchmarks/baseline.json)")
+    parser.add_argument('--save-baseline', action='store_true', help="Store these results as the new baseline")
+    parser.add_argument('--threshold', type=float, default=0.25, help="Slowdown ratio reported as a regression (default: %(default)s)")
+    parser.add_argument('--check', action='store_true', help="Exit non-zero if anything regressed")
+    args = parser.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(',') if s]
+    names = args.only.split(',') if args.only else list(CASES)
+    unknown = [n for n in names if n not in CASES]
+    if unknown:
+        parser.error(f"unknown case(s): {', '.join(unknown)}")
+
+    # The dummy driver has no system fonts, pygame falls back to its own
+    warnings.filterwarnings('ignore', category=UserWarning, module='pygame')
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+
+    baseline = load_baseline(args.baseline)
+    results = {}
+    regressions = []
+    workdir = tempfile.mkdtemp(prefix="radio_bench_")
+    # StationManager prints its server on every construction, keep the report readable
+    real_stdout = sys.stdout
+
+    print(f"{'case':<20}{'size':>8}{'per op':>12}{'baseline':>12}{'change':>9}  runs")
+    try:
+        for name in names:
+            for size in sizes:
+                sys.stdout = open(os.devnull, 'w')
+                try:
+                    fn, ops = CASES[name](size, workdir)
+                    per_op, runs = measure(fn, ops, args.repeat, args.budget)
+                finally:
+                    sys.stdout.close()
+                    sys.stdout = real_stdout
+
+                key = f"{name}/{size}"
+                results[key] = per_op
+                base = baseline.get(key)
+                change = ""
+                flag = ""
+                if base:
+                    ratio = per_op / base - 1.0
+                    change = f"{ratio:+.0%}"
+                    if ratio > args.threshold:
+                        flag = "  REGRESSION"
+                        regressions.append(key)
+                print(f"{name:<20}{size:>8}{format_time(per_op):>12}"
+                      f"{format_time(base) if base else '-':>12}{change:>9}  {runs}{flag}")
+    finally:
+        sys.stdout = real_stdout
+        shutil.rmtree(workdir, ignore_errors=True)
+        pygame.quit()
+
+    if args.save_baseline:
+        # Keep entries for cases/sizes that weren't run this time
+        merged = dict(baseline)
+        merged.update(results)
+        save_baseline(args.baseline, merged)
+        print(f"Saved baseline to {args.baseline}")
+
+    if regressions:
+        print(f"{len(regressions)} regression(s) over {args.threshold:.0%}: {', '.join(regressions)}")
+        if args.check:
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
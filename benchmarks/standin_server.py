@@ -0,0 +1,277 @@
+"""
+Local stand-in for the radio-browser API and iptv-org playlists, serving
+synthetic catalogs with injectable faults.
+
+Examples:
+    python benchmarks/standin_server.py --port 8080
+    python benchmarks/standin_server.py --latency 0.3 --jitter 0.1 --error-rate 0.2
+    python benchmarks/standin_server.py --timeout-rate 0.1 --body-rate 20000
+
+Point StationManager at it with
+    StationManager(base_url="http://127.0.0.1:8080/json/stations",
+                   mirrors=["http://127.0.0.1:8080/json"],
+                   iptv_base="http://127.0.0.1:8080/iptv")
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+import math
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs, unquote
+
+from benchmarks.catalog import make_stations, make_m3u, COUNTRIES, TAGS
+
+LANGUAGES = ['english', 'german', 'french', 'spanish', 'portuguese', 'japanese', 'hindi']
+
+class Faults:
+    """
+    What can go wrong with a request. Rates are probabilities in [0, 1].
+    latency/jitter delay the response, error_rate answers 503, timeout_rate
+    accepts the request and then hangs for hang seconds, and body_rate
+    (bytes/second) trickles the body out in small chunks.
+    """
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, timeout_rate=0.0, hang=30.0, body_rate=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.timeout_rate = timeout_rate
+        self.hang = hang
+        self.body_rate = body_rate
+
+    def __repr__(self):
+        return (f"Faults(latency={self.latency}, jitter={self.jitter}, error_rate={self.error_rate}, "
+                f"timeout_rate={self.timeout_rate}, body_rate={self.body_rate})")
+
+class _QuietServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients drop requests they no longer need (hedging losers)
+        if isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)):
+            return
+        super().handle_error(request, client_address)
+
+class StandInServer:
+    """
+    One mirror. Several can run side by side with different Faults to
+    exercise StationManager's failover.
+    """
+    def __init__(self, faults=None, catalog_size=5000, seed=0, host="127.0.0.1", port=0):
+        self.faults = faults or Faults()
+        self.rng = random.Random(seed)
+        self.stations = make_stations(catalog_size, seed=seed, with_frequencies=False)
+        for station in self.stations:
+            station['lastcheckok'] = 1
+            station['geo_lat'] = round(self.rng.uniform(-60, 70), 4)
+            station['geo_long'] = round(self.rng.uniform(-180, 180), 4)
+            station['language'] = ','.join(self.rng.sample(LANGUAGES, self.rng.choice([1, 1, 2])))
+            if self.rng.random() < 0.4:
+                station['url_resolved'] = station['url_resolved'].replace('http://', 'https://', 1)
+        self.playlists = {}
+        self._playlist_lock = threading.Lock()
+        self.stats = {'requests': 0, 'errors': 0, 'timeouts': 0, 'slow': 0}
+        self._stats_lock = threading.Lock()
+
+        server = self
+        class Handler(StandInHandler):
+            standin = server
+        self.httpd = _QuietServer((host, port), Handler)
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def count(self, key):
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    # --- endpoints ---
+
+    def search(self, query):
+        """
+        The subset of radio-browser's advanced search StationManager uses.
+        """
+        matches = self.stations
+        if query.get('name'):
+            name = query['name'].lower()
+            matches = [s for s in matches if name in s['name'].lower()]
+        if query.get('tag'):
+            tag = query['tag'].lower()
+            matches = [s for s in matches if tag in s['tags']]
+        if query.get('countrycode'):
+            matches = [s for s in matches if s['country'] == query['countrycode'].upper()]
+        if query.get('codec'):
+            codec = query['codec'].lower()
+            matches = [s for s in matches if codec in s['codec'].lower()]
+        if query.get('bitrateMin'):
+            matches = [s for s in matches if s['bitrate'] >= int(query['bitrateMin'])]
+        if query.get('bitrateMax'):
+            matches = [s for s in matches if s['bitrate'] <= int(query['bitrateMax'])]
+        if query.get('language'):
+            language = query['language'].lower()
+            matches = [s for s in matches if language in s['language']]
+        if query.get('is_https') == 'true':
+            matches = [s for s in matches if s['url_resolved'].startswith('https://')]
+        if query.get('geo_lat') and query.get('geo_long'):
+            radius_km = float(query.get('geo_distance', 50000)) / 1000
+            near = self.by_geo(float(query['geo_lat']), float(query['geo_long']), radius_km)
+            matches = [s for s in matches if s in near] if matches is not self.stations else near
+        return self.page(matches, query)
+
+    def page(self, matches, query):
+        limit = int(query.get('limit', 100000))
+        if query.get('order') == 'random':
+            return self.rng.sample(matches, min(limit, len(matches)))
+        return matches[:limit]
+
+    def by_country(self, code):
+        return [s for s in self.stations if s['country'] == code.upper()]
+
+    def by_geo(self, lat, lon, radius_km):
+        lat, lon = math.radians(lat), math.radians(lon)
+        result = []
+        for s in self.stations:
+            s_lat, s_lon = math.radians(s['geo_lat']), math.radians(s['geo_long'])
+            # Haversine distance
+            a = math.sin((s_lat - lat) / 2) ** 2 + math.cos(lat) * math.cos(s_lat) * math.sin((s_lon - lon) / 2) ** 2
+            if 6371 * 2 * math.asin(math.sqrt(a)) <= radius_km:
+                result.append(s)
+        return result
+
+    def playlist(self, kind, name):
+        key = (kind, name)
+        with self._playlist_lock:
+            if key not in self.playlists:
+                seed = sum(ord(c) for c in kind + name)
+                self.playlists[key] = make_m3u(800 if kind == 'categories' else 300, seed=seed).encode('utf-8')
+            return self.playlists[key]
+
+class StandInHandler(BaseHTTPRequestHandler):
+    standin = None
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass # Load tests make thousands of requests
+
+    def do_GET(self):
+        server = self.standin
+        faults = server.faults
+        server.count('requests')
+
+        delay = faults.latency + (server.rng.uniform(-faults.jitter, faults.jitter) if faults.jitter else 0.0)
+        if delay > 0:
+            time.sleep(delay)
+
+        roll = server.rng.random()
+        if roll < faults.timeout_rate:
+            server.count('timeouts')
+            time.sleep(faults.hang) # Long past any client timeout
+            return
+        if roll < faults.timeout_rate + faults.error_rate:
+            server.count('errors')
+            self._send(503, b'{"error": "injected"}', 'application/json')
+            return
+
+        parts = urlsplit(self.path)
+        path = [unquote(p) for p in parts.path.strip('/').split('/')]
+        query = {k: v[0] for k, v in parse_qs(parts.query).items()}
+        try:
+            body, content_type = self._route(path, query)
+        except (ValueError, IndexError):
+            self._send(400, b'{"error": "bad request"}', 'application/json')
+            return
+        if body is None:
+            self._send(404, b'{"error": "not found"}', 'application/json')
+            return
+        self._send(200, body, content_type)
+
+    def _route(self, path, query):
+        server = self.standin
+        if path[:1] == ['json']:
+            if path[1:] == ['stats']:
+                return self._json({'stations': len(server.stations), 'status': 'OK'})
+            if path[1:2] == ['stations']:
+                rest = path[2:]
+                if rest == ['search']:
+                    return self._json(server.search(query))
+                if rest[:1] == ['bycountrycodeexact']:
+                    return self._json(server.page(server.by_country(rest[1]), query))
+                if rest[:1] == ['bygeo']:
+                    return self._json(server.page(server.by_geo(float(rest[1]), float(rest[2]), float(rest[3])), query))
+                if rest[:1] == ['bycity']:
+                    # Synthetic stations have no city, a sample stands in
+                    return self._json(server.page(server.stations[:100], query))
+        if path[:1] == ['iptv'] and len(path) == 3 and path[2].endswith('.m3u'):
+            if path[1] in ('countries', 'categories'):
+                return server.playlist(path[1], path[2][:-4]), 'audio/x-mpegurl'
+        return None, None
+
+    def _json(self, data):
+        return json.dumps(data).encode('utf-8'), 'application/json'
+
+    def _send(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+
+        rate = self.standin.faults.body_rate
+        try:
+            if rate and status == 200:
+                self.standin.count('slow')
+                chunk = max(1, int(rate / 20)) # ~20 writes per second
+                for i in range(0, len(body), chunk):
+                    self.wfile.write(body[i:i + chunk])
+                    self.wfile.flush()
+                    time.sleep(0.05)
+            else:
+                self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass # Client gave up, that's the point of a slow body
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve a fake radio-browser/iptv-org with fault injection.")
+    parser.add_argument('--host', default="127.0.0.1")
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--catalog-size', type=int, default=5000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--latency', type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument('--jitter', type=float, default=0.0, help="Uniform +/- seconds around --latency")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument('--timeout-rate', type=float, default=0.0, help="Fraction of requests that hang")
+    parser.add_argument('--hang', type=float, default=30.0, help="How long a hanging request hangs")
+    parser.add_argument('--body-rate', type=float, help="Throttle bodies to this many bytes/second")
+    args = parser.parse_args(argv)
+
+    faults = Faults(args.latency, args.jitter, args.error_rate, args.timeout_rate, args.hang, args.body_rate)
+    server = StandInServer(faults, args.catalog_size, args.seed, args.host, args.port)
+    print(f"Serving {len(server.stations)} stations at {server.url} with {faults}")
+    print(f"Countries: {', '.join(COUNTRIES)}  Categories: {', '.join(TAGS)}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+        print(f"Served {server.stats}")
+
+if __name__ == "__main__":
+    main()
@@ -1,26 +1,107 @@
+import heapq
+import threading
+
 try:
     from cytolk import tolk
 except ImportError:
     tolk = None
 
+# Lower value is spoken first
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+
 class AccessibilityManager:
     def __init__(self):
         self.available = False
+
+        # Pending announcements: heap of [priority, seq, kind, text, interrupt, alive]
+        self._heap = []
+        self._pending = {} # kind -> latest queued entry
+        self._seq = 0
+        self._cond = threading.Condition()
+        self._running = True
+
         if tolk:
-            try:
-                tolk.load()
-                self.available = True
-                print(f"Screen reader loaded: {tolk.detect_screen_reader()}")
-                tolk.speak("Internet Analog Radio Ready")
-            except Exception as e:
-                print(f"Error initializing cytolk: {e}")
-                self.available = False
+            # tolk is loaded and driven from the worker so speech never
+            # blocks the event loop
+            self._worker = threading.Thread(target=self._speech_loop, daemon=True)
+            self._worker.start()
         else:
+            self._worker = None
             print("cytolk module not found. Accessibility disabled.")
 
-    def speak(self, text):
-        if self.available and text:
+    def _load(self):
+        try:
+            tolk.load()
+            self.available = True
+            print(f"Screen reader loaded: {tolk.detect_screen_reader()}")
+            tolk.speak("Internet Analog Radio Ready")
+        except Exception as e:
+            print(f"Error initializing cytolk: {e}")
+            self.available = False
+
+    def _speech_loop(self):
+        self._load()
+
+        while True:
+            with self._cond:
+                entry = self._next_entry()
+                while entry is None and self._running:
+                    self._cond.wait()
+                    entry = self._next_entry()
+                if entry is None:
+                    break
+
+            _, _, _, text, interrupt, _ = entry
+            if not self.available:
+                continue
             try:
-                tolk.speak(text)
+                tolk.speak(text, interrupt)
             except Exception:
                 pass
+
+    def _next_entry(self):
+        # Caller holds self._cond
+        while self._heap:
+            entry = heapq.heappop(self._heap)
+            if not entry[5]:
+                continue # Superseded by a newer announcement of the same kind
+            kind = entry[2]
+            if kind is not None and self._pending.get(kind) is entry:
+                del self._pending[kind]
+            return entry
+        return None
+
+    def speak(self, text, kind=None, priority=PRIORITY_NORMAL, interrupt=False):
+        """
+        Queues text for the screen reader and returns immediately.
+        A newer announcement with the same kind replaces an older one that
+        hasn't been spoken yet. interrupt drops everything pending and cuts
+        off current speech.
+        """
+        if not text or not self._worker:
+            return
+
+        with self._cond:
+            if interrupt:
+                for entry in self._heap:
+                    entry[5] = False
+                self._heap = []
+                self._pending.clear()
+            elif kind is not None:
+                stale = self._pending.get(kind)
+                if stale:
+                    stale[5] = False
+
+            self._seq += 1
+            entry = [priority, self._seq, kind, text, interrupt, True]
+            heapq.heappush(self._heap, entry)
+            if kind is not None:
+                self._pending[kind] = entry
+            self._cond.notify()
+
+    def shutdown(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify()
@@ -0,0 +1,74 @@
+class BandFilter:
+    """
+    Quality constraints for the stations of a band. params() turns them into
+    radio-browser /search parameters so the server does the filtering;
+    matches() applies the same rules locally, for endpoints that can't take
+    them and as a guard against mirrors that ignore some.
+    """
+    FIELDS = ('codec', 'min_bitrate', 'max_bitrate', 'language', 'https_only', 'has_geo')
+
+    def __init__(self, codec=None, min_bitrate=None, max_bitrate=None, language=None,
+                 https_only=False, has_geo=False):
+        self.codec = codec
+        self.min_bitrate = min_bitrate
+        self.max_bitrate = max_bitrate
+        self.language = language
+        self.https_only = https_only
+        self.has_geo = has_geo
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**{k: v for k, v in (data or {}).items() if k in cls.FIELDS})
+
+    def to_dict(self):
+        return {k: getattr(self, k) for k in self.FIELDS if getattr(self, k)}
+
+    def merged(self, other):
+        """
+        This filter with every constraint set in other taking precedence.
+        """
+        data = self.to_dict()
+        data.update(other.to_dict())
+        return BandFilter.from_dict(data)
+
+    def params(self):
+        params = {'hidebroken': 'true'}
+        if self.codec:
+            params['codec'] = self.codec
+        if self.min_bitrate:
+            params['bitrateMin'] = self.min_bitrate
+        if self.max_bitrate:
+            params['bitrateMax'] = self.max_bitrate
+        if self.language:
+            params['language'] = self.language
+        if self.https_only:
+            params['is_https'] = 'true'
+        if self.has_geo:
+            params['has_geo_info'] = 'true'
+        return params
+
+    def matches(self, station):
+        if self.codec and (station.get('codec') or '').lower() != self.codec.lower():
+            return False
+        bitrate = station.get('bitrate') or 0
+        if self.min_bitrate and bitrate < self.min_bitrate:
+            return False
+        if self.max_bitrate and bitrate > self.max_bitrate:
+            return False
+        # Stations list several languages, the API matches any of them
+        if self.language and self.language.lower() not in (station.get('language') or '').lower():
+            return False
+        if self.https_only and not (station.get('url_resolved') or '').startswith('https://'):
+            return False
+        if self.has_geo and (station.get('geo_lat') is None or station.get('geo_long') is None):
+            return False
+        return True
+
+    def __bool__(self):
+        return bool(self.to_dict())
+
+    def __repr__(self):
+        return f"BandFilter({self.to_dict()})"
+
+# Just drops stations that failed their last check
+NO_FILTER = BandFilter()
@@ -0,0 +1,132 @@
+import threading
+import queue
+
+import pygame
+
+
+class ClipboardService:
+    """
+    Process-wide clipboard that is initialized once.
+    Uses pygame.scrap when the display supports it, otherwise a single
+    hidden Tk root owned by a worker thread.
+    """
+    def __init__(self):
+        self.backend = None
+        self._requests = queue.Queue()
+        self._worker = None
+
+        if self._init_scrap():
+            self.backend = 'scrap'
+        else:
+            self._start_tk_worker()
+
+    def _init_scrap(self):
+        # scrap needs an open display window
+        try:
+            if not pygame.display.get_init() or not pygame.display.get_surface():
+                return False
+            if not pygame.scrap.get_init():
+                pygame.scrap.init()
+            return pygame.scrap.get_init()
+        except (pygame.error, NotImplementedError, AttributeError):
+            return False
+
+    def _start_tk_worker(self):
+        # Tk startup is the slow part, so it happens once in the background.
+        # Requests queued before the root exists are served once it does.
+        self.backend = 'tk'
+        self._worker = threading.Thread(target=self._tk_loop, daemon=True)
+        self._worker.start()
+
+    def _tk_loop(self):
+        try:
+            import tkinter
+            root = tkinter.Tk()
+            root.withdraw()
+        except Exception as e:
+            print(f"Clipboard unavailable: {e}")
+            self.backend = None
+            return
+
+        while True:
+            try:
+                op, payload, reply = self._requests.get(timeout=0.05)
+            except queue.Empty:
+                # Keep servicing selection requests so copied text stays available
+                try:
+                    root.update()
+                except Exception:
+                    pass
+                continue
+
+            if op == 'stop':
+                root.destroy()
+                break
+
+            result = None
+            try:
+                if op == 'copy':
+                    root.clipboard_clear()
+                    root.clipboard_append(payload)
+                    root.update()
+                    result = True
+                elif op == 'paste':
+                    result = root.clipboard_get()
+            except Exception:
+                result = None
+
+            if reply:
+                reply['value'] = result
+                reply['done'].set()
+
+    def copy(self, text):
+        """
+        Puts text on the clipboard. Returns False if no backend is available.
+        """
+        if not text:
+            return False
+
+        if self.backend == 'scrap':
+            try:
+                if hasattr(pygame.scrap, 'put_text'):
+                    pygame.scrap.put_text(text)
+                else:
+                    pygame.scrap.put(pygame.SCRAP_TEXT, text.encode('utf-8'))
+                return True
+            except pygame.error:
+                # Some video drivers init scrap but can't own the clipboard
+                self._start_tk_worker()
+
+        if self.backend == 'tk':
+            # Fire and forget, the worker owns the Tk root
+            self._requests.put(('copy', text, None))
+            return True
+
+        return False
+
+    def paste(self, timeout=0.1):
+        """
+        Returns clipboard text, or None if empty/unavailable.
+        """
+        if self.backend == 'scrap':
+            try:
+                if hasattr(pygame.scrap, 'get_text'):
+                    return pygame.scrap.get_text() or None
+                data = pygame.scrap.get(pygame.SCRAP_TEXT)
+                if not data:
+                    return None
+                return data.decode('utf-8', errors='ignore').rstrip('\x00') or None
+            except pygame.error:
+                return None
+
+        if self.backend == 'tk':
+            reply = {'value': None, 'done': threading.Event()}
+            self._requests.put(('paste', None, reply))
+            if reply['done'].wait(timeout):
+                return reply['value'] or None
+
+        return None
+
+    def shutdown(self):
+        if self.backend == 'tk' and self._worker and self._worker.is_alive():
+            self._requests.put(('stop', None, None))
@@ -0,0 +1,413 @@
+"""
+Long-lived radio process. Owns the catalog, favorites and the player, and
+serves any number of frontends over a Unix socket.
+
+Protocol: one JSON object per line in each direction.
+    client -> daemon  {"id": 7, "cmd": "player.rewind", "args": [15]}
+                      (no "id": fire and forget, no reply)
+    daemon -> client  {"id": 7, "result": ...} or {"id": 7, "error": "..."}
+                      {"event": "band" | "custom_band" | "favorites", "mode": ..., "band": ...,
+                       "version": ..., "stations": [...]}
+                      {"event": "player", "url": ..., "state": ..., "timeshift": ..., "now_playing": ...}
+                      {"event": "stream_error", "url": ...}
+Bands are pushed whenever their snapshot version changes (and in full on
+"hello"), always before the reply to the command that changed them, so
+clients read bands from their own replica and never ask per frame.
+"""
+import os
+import json
+import queue
+import socket
+import socketserver
+import stat
+import tempfile
+import threading
+import time
+from concurrent.futures import CancelledError
+
+from .task_executor import TaskExecutor
+
+PROTOCOL_VERSION = 1
+# Player update and band sync rate
+TICK_SECONDS = 1 / 30
+# Volume for "tune" before any frontend has set one (the UI's default)
+DEFAULT_VOLUME = 0.5
+# Messages queued for a client before it's considered stuck and dropped
+OUTBOX_LIMIT = 500
+
+def default_socket_path():
+    """
+    The per-user socket: in $XDG_RUNTIME_DIR, which only we can write, or
+    else in a private directory under the shared temp dir. A bare path in
+    /tmp could be taken first by another user's process.
+    """
+    runtime = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime:
+        return os.path.join(runtime, f"analog-radio-{os.getuid()}.sock")
+
+    base = os.path.join(tempfile.gettempdir(), f"analog-radio-{os.getuid()}")
+    try:
+        os.mkdir(base, 0o700)
+    except FileExistsError:
+        pass
+    info = os.lstat(base)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o077:
+        raise RuntimeError(f"{base} is not a private directory of this user, use --socket")
+    return os.path.join(base, "radio.sock")
+
+def encode(message):
+    return (json.dumps(message, separators=(',', ':'), default=str) + "\n").encode('utf-8')
+
+class _Handler(socketserver.StreamRequestHandler):
+    # Writes go through a queue and a thread per client, so one frontend
+    # that stops reading can't stall the tick loop or the other clients
+    def setup(self):
+        super().setup()
+        self.ready = False # Gets events only after "hello"
+        self._outbox = queue.Queue(OUTBOX_LIMIT)
+        self._writer = threading.Thread(target=self._write_loop, name="daemon-writer", daemon=True)
+        self._writer.start()
+        self.server.radio._attach(self)
+
+    def handle(self):
+        for line in self.rfile:
+            try:
+                message = json.loads(line)
+            except ValueError:
+                continue
+            self.server.radio._dispatch(self, message)
+
+    def finish(self):
+        self.server.radio._detach(self)
+        # Let queued replies drain, then stop the writer
+        try:
+            self._outbox.put_nowait(None)
+        except queue.Full:
+            self.disconnect()
+        self._writer.join(1.0)
+        if self._writer.is_alive():
+            self.disconnect()
+            self._writer.join()
+        try:
+            super().finish()
+        except OSError:
+            pass
+
+    def send(self, message):
+        try:
+            self._outbox.put_nowait(encode(message))
+        except queue.Full:
+            print("Daemon: dropping a client that stopped reading")
+            self.disconnect()
+
+    def drain(self, timeout):
+        try:
+            self._outbox.put_nowait(None)
+        except queue.Full:
+            return
+        self._writer.join(timeout)
+
+    def disconnect(self):
+        # Unblocks both the reader and a writer stuck in sendall()
+        try:
+            self.request.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+    def _write_loop(self):
+        while True:
+            data = self._outbox.get()
+            if data is None:
+                return
+            try:
+                self.wfile.write(data)
+                self.wfile.flush()
+            except OSError:
+                self.disconnect() # Client went away, finish() cleans up
+                return
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+class RadioDaemon:
+    """
+    Serves station_manager, favorites_manager and stream_player to
+    DaemonClients. Commands run on the connection's thread, except slow
+    ones (network fetches) which go to the task pool and reply when done.
+    """
+    def __init__(self, station_manager, favorites_manager, stream_player, metadata_watcher=None,
+                 path=None, task_executor=None):
+        if not hasattr(socket, 'AF_UNIX'):
+            raise RuntimeError("Unix sockets are not available on this platform")
+        self.station_manager = station_manager
+        self.favorites_manager = favorites_manager
+        self.stream_player = stream_player
+        self.metadata_watcher = metadata_watcher
+        self.path = path or default_socket_path()
+        self.tasks = task_executor or TaskExecutor()
+        self.running = False
+
+        self._clients = set()
+        self._clients_lock = threading.Lock()
+        # StreamPlayer isn't thread-safe; every call goes through this
+        self._player_lock = threading.RLock()
+        self._sync_lock = threading.Lock()
+        self._versions = {} # (event, mode, band) -> version last pushed
+        self._player_state = None
+        self.volume = DEFAULT_VOLUME # Last audible volume a client set
+
+        self.stream_player.on_error = self._on_stream_error
+
+        self.commands = {
+            'hello': self.cmd_hello,
+            'status': self.cmd_status,
+            'shutdown': self.cmd_shutdown,
+            'tune': self.cmd_tune,
+            'tv.load_cached': self.station_manager.load_tv_cached,
+            'tv.needs_category': self.station_manager.needs_tv_category,
+            'bands.save_custom': self.station_manager.save_custom_band,
+            'favorites.add': self.favorites_manager.add_favorite,
+            'favorites.remove': self.favorites_manager.remove_favorite,
+            'player.play': self._player('play'),
+            'player.stop': self._player('stop'),
+            'player.set_volume': self.cmd_set_volume,
+            'player.prefetch': self._player('prefetch'),
+            'player.toggle_pause': self._player('toggle_pause'),
+            'player.rewind': self._player('rewind'),
+            'player.go_live': self._player('go_live'),
+            'player.seconds_behind_live': self._player('seconds_behind_live'),
+            'meta.set_station_name': self._meta('set_station_name'),
+            'meta.now_playing': self._meta('get_now_playing'),
+        }
+        # Network-bound, run on the pool: cmd -> (task key, fn(task, *args), group);
+        # no key means the command and its args, so identical requests share a task
+        self.slow_commands = {
+            # The newest query from any client wins
+            'search': (None, self._search, 'search'),
+            'tv.fetch_all': ('tv-refresh', lambda task: self.station_manager.fetch_tv_all(), None),
+            'tv.fetch_category': (None, lambda task, category: self.station_manager.fetch_tv_category(category), None),
+        }
+
+    # --- Lifecycle ---
+
+    def _bind(self):
+        if os.path.exists(self.path):
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(self.path)
+                raise RuntimeError(f"A radio daemon is already listening on {self.path}")
+            except (ConnectionRefusedError, FileNotFoundError):
+                os.unlink(self.path) # Left behind by a crash
+            finally:
+                probe.close()
+        server = _Server(self.path, _Handler)
+        os.chmod(self.path, 0o600)
+        server.radio = self
+        return server
+
+    def serve_forever(self):
+        """
+        Serves until shutdown() (or the "shutdown" command). The calling
+        thread drives the player and pushes changes to clients.
+        """
+        self._server = self._bind()
+        self.running = True
+        thread = threading.Thread(target=self._server.serve_forever, name="daemon-accept", daemon=True)
+        thread.start()
+        print(f"Radio daemon listening on {self.path}")
+        try:
+            while self.running:
+                with self._player_lock:
+                    self.stream_player.update()
+                self._sync()
+                time.sleep(TICK_SECONDS)
+        finally:
+            self._server.shutdown()
+            self._server.server_close()
+            # Open connections would otherwise outlive the daemon
+            with self._clients_lock:
+                clients = list(self._clients)
+            for client in clients:
+                client.drain(0.5) # e.g. the reply to "shutdown"
+                client.disconnect()
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+            self.tasks.shutdown()
+            with self._player_lock:
+                self.stream_player.shutdown()
+
+    def shutdown(self):
+        self.running = False
+
+    def _attach(self, client):
+        with self._clients_lock:
+            self._clients.add(client)
+
+    def _detach(self, client):
+        with self._clients_lock:
+            self._clients.discard(client)
+
+    def _broadcast(self, message):
+        with self._clients_lock:
+            clients = [c for c in self._clients if c.ready]
+        for client in clients:
+            client.send(message)
+
+    # --- Commands ---
+
+    def _dispatch(self, client, message):
+        cmd = message.get('cmd')
+        args = message.get('args', [])
+        request_id = message.get('id')
+
+        if cmd in self.slow_commands:
+            self._run_slow(client, request_id, cmd, args)
+            return
+
+        handler = self.commands.get(cmd)
+        try:
+            if handler is None:
+                raise ValueError(f"unknown command {cmd!r}")
+            if cmd == 'hello':
+                result = handler(client, *args)
+            else:
+                result = handler(*args)
+        except Exception as e:
+            if request_id is not None:
+                client.send({'id': request_id, 'error': f"{type(e).__name__}: {e}"})
+            else:
+                print(f"Daemon: {cmd} failed: {e}")
+            return
+        # Push whatever the command changed before answering it
+        self._sync()
+        if request_id is not None:
+            client.send({'id': request_id, 'result': result})
+
+    def _run_slow(self, client, request_id, cmd, args):
+        key, fn, group = self.slow_commands[cmd]
+        task = self.tasks.submit(key or (cmd, *args), fn, *args, group=group)
+        if task is None:
+            client.send({'id': request_id, 'error': "daemon is shutting down"})
+            return
+        self._reply_when_done(client, request_id, task)
+
+    def _reply_when_done(self, client, request_id, task):
+        def done(future):
+            try:
+                result = future.result()
+            except CancelledError:
+                result = None
+            self._sync()
+            if request_id is not None:
+                client.send({'id': request_id, 'result': result})
+        task.future.add_done_callback(done)
+
+    def cmd_hello(self, client, version=PROTOCOL_VERSION):
+        if version != PROTOCOL_VERSION:
+            raise ValueError(f"protocol {version} not supported, daemon speaks {PROTOCOL_VERSION}")
+        # Full state to this client only, then it gets changes like everyone else
+        with self._sync_lock:
+            for event, mode, band, snapshot in self._bands():
+                client.send(self._band_message(event, mode, band, snapshot))
+            client.send(self._player_message())
+            client.ready = True
+        return {'protocol': PROTOCOL_VERSION, 'pid': os.getpid()}
+
+    def _search(self, task, query, limit=50):
+        return self.station_manager.search_stations(query, limit, task=task)
+
+    def cmd_tune(self, band, index=0, mode='radio', volume=None):
+        """
+        Plays the index-th station of a band. For clients without a dial.
+        Without a volume the last audible one is used: streams start silent.
+        """
+        if band == 'favorites':
+            stations = self.favorites_manager.get_favorites(mode)
+        else:
+            stations = self.station_manager.get_station_list(band, mode)
+        if not stations:
+            raise ValueError(f"band {band!r} is empty")
+        station = stations[index % len(stations)]
+        with self._player_lock:
+            self.stream_player.play(station['url_resolved'])
+        self.cmd_set_volume(self.volume if volume is None else volume)
+        if self.metadata_watcher:
+            self.metadata_watcher.set_station_name(station['url_resolved'], station.get('name'))
+        return dict(station)
+
+    def cmd_set_volume(self, volume):
+        if volume > 0:
+            self.volume = volume
+        with self._player_lock:
+            self.stream_player.set_volume(volume)
+
+    def cmd_status(self):
+        bands = {f"{mode}/{band}": len(snapshot) for _, mode, band, snapshot in self._bands()}
+        status = self._player_message()
+        del status['event']
+        status['bands'] = bands
+        status['clients'] = len(self._clients)
+        return status
+
+    def cmd_shutdown(self):
+        self.shutdown()
+        return True
+
+    def _player(self, name):
+        method = getattr(self.stream_player, name)
+        def call(*args):
+            with self._player_lock:
+                return method(*args)
+        return call
+
+    def _meta(self, name):
+        def call(*args):
+            if not self.metadata_watcher:
+                return "Unknown" if name == 'get_now_playing' else None
+            return getattr(self.metadata_watcher, name)(*args)
+        return call
+
+    # --- State push ---
+
+    def _bands(self):
+        sm = self.station_manager
+        for band, snapshot in list(sm.stations.items()):
+            yield 'band', 'radio', band, snapshot
+        for band, snapshot in list(sm.tv_stations.items()):
+            yield 'band', 'tv', band, snapshot
+        for mode, bands in sm.custom_bands.items():
+            for band, snapshot in list(bands.items()):
+                yield 'custom_band', mode, band, snapshot
+        for mode in ('radio', 'tv'):
+            yield 'favorites', mode, 'favorites', self.favorites_manager.get_favorites(mode)
+
+    def _band_message(self, event, mode, band, snapshot):
+        return {'event': event, 'mode': mode, 'band': band, 'version': snapshot.version,
+                'stations': [dict(s) for s in snapshot]}
+
+    def _player_message(self):
+        player = self.stream_player
+        return {'event': 'player', 'url': player.current_url, 'state': player.state,
+                'timeshift': bool(player.timeshift), 'now_playing': player.get_now_playing()}
+
+    def _sync(self):
+        """
+        Pushes bands whose snapshot version changed, and the player state
+        if it changed. Cheap when nothing did.
+        """
+        with self._sync_lock:
+            for event, mode, band, snapshot in self._bands():
+                key = (event, mode, band)
+                if self._versions.get(key) != snapshot.version:
+                    self._versions[key] = snapshot.version
+                    self._broadcast(self._band_message(event, mode, band, snapshot))
+            state = self._player_message()
+            if state != self._player_state:
+                self._player_state = state
+                self._broadcast(state)
+
+    def _on_stream_error(self, url):
+        # Runs inside stream_player.update(), the clients decide what to do
+        self._broadcast({'event': 'stream_error', 'url': url})
@@ -0,0 +1,301 @@
+import itertools
+import json
+import socket
+import threading
+import time
+
+from .daemon import PROTOCOL_VERSION, default_socket_path, encode
+from .search_index import SearchIndex
+from .station_manager import EMPTY_BAND
+from .station_table import BandSnapshot
+from .stream_player import ACTIVE_STATES, STATE_IDLE, STATE_OPENING, STATE_PLAYING
+
+# Calls that fetch from the network can take a while
+SLOW_CALL_TIMEOUT = 60.0
+# A play() for the stream already requested is only resent this often
+REPLAY_INTERVAL = 1.0
+
+class DaemonError(Exception):
+    pass
+
+class DaemonClient:
+    """
+    Connection to a RadioDaemon. call() waits for the reply, send() doesn't.
+    Pushed events go to handlers[event](message) on the reader thread.
+    """
+    def __init__(self, path=None, timeout=5.0):
+        self.path = path or default_socket_path()
+        self.timeout = timeout
+        self.handlers = {}
+        self.on_close = None
+        self.closed = False
+
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.path)
+        self._file = self.sock.makefile('rb')
+        self._write_lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._pending = {} # id -> [threading.Event, reply]
+        self._pending_lock = threading.Lock()
+        self._reader = threading.Thread(target=self._read_loop, name="daemon-client", daemon=True)
+        self._reader.start()
+
+    def hello(self):
+        """
+        Starts the event stream. Register handlers first: every band and the
+        player state arrive before this returns.
+        """
+        return self.call('hello', PROTOCOL_VERSION)
+
+    def call(self, cmd, *args, timeout=None):
+        request_id = next(self._ids)
+        waiter = [threading.Event(), None]
+        with self._pending_lock:
+            self._pending[request_id] = waiter
+        try:
+            self._write({'id': request_id, 'cmd': cmd, 'args': list(args)})
+            if not waiter[0].wait(timeout or self.timeout):
+                raise DaemonError(f"{cmd}: no reply from daemon")
+        finally:
+            with self._pending_lock:
+                self._pending.pop(request_id, None)
+        reply = waiter[1]
+        if reply is None:
+            raise DaemonError(f"{cmd}: connection to daemon lost")
+        if 'error' in reply:
+            raise DaemonError(f"{cmd}: {reply['error']}")
+        return reply.get('result')
+
+    def send(self, cmd, *args):
+        try:
+            self._write({'cmd': cmd, 'args': list(args)})
+        except OSError:
+            pass # Reader notices the closed connection
+
+    def _write(self, message):
+        if self.closed:
+            raise DaemonError("connection to daemon is closed")
+        data = encode(message)
+        with self._write_lock:
+            self.sock.sendall(data)
+
+    def _read_loop(self):
+        try:
+            for line in self._file:
+                message = json.loads(line)
+                if 'id' in message:
+                    with self._pending_lock:
+                        waiter = self._pending.get(message['id'])
+                    if waiter:
+                        waiter[1] = message
+                        waiter[0].set()
+                    continue
+                handler = self.handlers.get(message.get('event'))
+                if handler:
+                    try:
+                        handler(message)
+                    except Exception as e:
+                        print(f"Error handling {message.get('event')} event: {e}")
+        except (OSError, ValueError):
+            pass
+        finally:
+            self.closed = True
+            with self._pending_lock:
+                for waiter in self._pending.values():
+                    waiter[0].set() # Reply stays None: connection lost
+            if self.on_close:
+                self.on_close()
+
+    def close(self):
+        self.closed = True
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+
+class RemoteStationManager:
+    """
+    The parts of StationManager a frontend uses, backed by a daemon. Bands
+    are replicas kept current by the daemon's pushes, so reading them is
+    as cheap as locally; only fetches and saves go over the socket.
+    """
+    def __init__(self, client, search_index=None):
+        self.client = client
+        self.search_index = search_index if search_index is not None else SearchIndex()
+        self.stations = {}
+        self.tv_stations = {}
+        self.custom_bands = {'radio': {}, 'tv': {}}
+        client.handlers['band'] = self._on_band
+        client.handlers['custom_band'] = self._on_band
+
+    def _on_band(self, message):
+        mode, band = message['mode'], message['band']
+        snapshot = BandSnapshot(message['stations'])
+        if message['event'] == 'custom_band':
+            self.custom_bands.setdefault(mode, {})[band] = snapshot
+        else:
+            (self.tv_stations if mode == 'tv' else self.stations)[band] = snapshot
+        self.search_index.update((mode, band), snapshot)
+
+    def get_station_list(self, band, mode='radio'):
+        bands = self.tv_stations if mode == 'tv' else self.stations
+        if band in bands:
+            return bands[band]
+        return self.custom_bands.get(mode, {}).get(band, EMPTY_BAND)
+
+    def search_stations(self, query, limit=50, task=None):
+        if not query: return False
+        published = self.client.call('search', query, limit, timeout=SLOW_CALL_TIMEOUT)
+        return bool(published) and not (task and task.cancelled)
+
+    def save_custom_band(self, name, stations, mode='radio'):
+        if not name or not stations: return
+        self.client.call('bands.save_custom', name, [dict(s) for s in stations], mode)
+
+    def load_tv_cached(self, country_code=None):
+        return self.client.call('tv.load_cached')
+
+    def needs_tv_category(self, category):
+        return self.client.call('tv.needs_category', category)
+
+    def fetch_tv_all(self, country_code=None):
+        self.client.call('tv.fetch_all', timeout=SLOW_CALL_TIMEOUT)
+
+    def fetch_tv_category(self, category):
+        self.client.call('tv.fetch_category', category, timeout=SLOW_CALL_TIMEOUT)
+
+class RemoteFavorites:
+    """
+    FavoritesManager over a daemon, with the lists replicated locally.
+    """
+    def __init__(self, client, search_index=None):
+        self.client = client
+        self.search_index = search_index if search_index is not None else SearchIndex()
+        self.favorites = {'radio': EMPTY_BAND, 'tv': EMPTY_BAND}
+        client.handlers['favorites'] = self._on_favorites
+
+    def _on_favorites(self, message):
+        self.favorites[message['mode']] = BandSnapshot(message['stations'])
+        self.search_index.update((message['mode'], 'favorites'), self.favorites[message['mode']])
+
+    def add_favorite(self, station, mode='radio'):
+        if not station or 'url_resolved' not in station:
+            return False
+        return self.client.call('favorites.add', dict(station), mode)
+
+    def remove_favorite(self, station, mode='radio'):
+        return self.client.call('favorites.remove', dict(station), mode)
+
+    def get_favorites(self, mode='radio'):
+        return self.favorites.get(mode, EMPTY_BAND)
+
+class RemotePlayer:
+    """
+    StreamPlayer stand-in that forwards to the daemon's player. The
+    controller calls play() and set_volume() every frame, so only changes
+    are sent; state comes back through the daemon's player events.
+    """
+    def __init__(self, client):
+        self.client = client
+        self.current_url = None
+        self.state = STATE_IDLE
+        self.timeshift = False
+        self.now_playing = "Unknown"
+        self.on_error = None
+        # The daemon traces its own tunes, nothing for a lock-on to wait for
+        self.tune_span = None
+        self._volume = None
+        self._prefetched = None
+        self._last_play = 0
+        client.handlers['player'] = self._on_player
+        client.handlers['stream_error'] = self._on_stream_error
+
+    def _on_player(self, message):
+        self.timeshift = message['timeshift']
+        # Another frontend may be playing something else; only our stream's state counts
+        if message['url'] == self.current_url:
+            self.state = message['state']
+            self.now_playing = message['now_playing']
+
+    def _on_stream_error(self, message):
+        if self.on_error and message['url'] == self.current_url:
+            self.on_error(message['url'])
+
+    def play(self, url):
+        if not url: return
+        now = time.monotonic()
+        if url == self.current_url:
+            # The daemon resumes settled streams itself, nudge it now and then
+            if self.state in ACTIVE_STATES or now - self._last_play < REPLAY_INTERVAL:
+                return
+        else:
+            self.current_url = url
+            self.state = STATE_OPENING
+            self.now_playing = "Unknown"
+            self._volume = None # Daemon starts new streams silent
+        self._last_play = now
+        self.client.send('player.play', url)
+
+    def set_volume(self, volume):
+        volume = round(max(0.0, min(1.0, volume)), 2)
+        if volume != self._volume:
+            self._volume = volume
+            self.client.send('player.set_volume', volume)
+
+    def prefetch(self, urls):
+        urls = [u for u in urls if u]
+        if urls != self._prefetched:
+            self._prefetched = urls
+            self.client.send('player.prefetch', urls)
+
+    def stop(self, keep_standby=False):
+        if self.current_url is None:
+            return
+        self.current_url = None
+        self.state = STATE_IDLE
+        self.client.send('player.stop', keep_standby)
+
+    def toggle_pause(self):
+        return self.client.call('player.toggle_pause')
+
+    def rewind(self, seconds):
+        self.client.call('player.rewind', seconds)
+
+    def go_live(self):
+        self.client.call('player.go_live')
+
+    def seconds_behind_live(self):
+        return self.client.call('player.seconds_behind_live')
+
+    def is_playing(self):
+        return self.state == STATE_PLAYING
+
+    def get_now_playing(self):
+        return self.now_playing
+
+    def update(self):
+        pass # The daemon drives its player
+
+    def shutdown(self):
+        # Quitting the UI silences the radio, as it always did
+        self.client.send('player.stop')
+
+class RemoteMetadata:
+    """
+    The MetadataWatcher calls the controller makes, forwarded to the daemon.
+    """
+    def __init__(self, client):
+        self.client = client
+        self._names = {}
+
+    def set_station_name(self, url, name):
+        if url and name and self._names.get(url) != name:
+            self._names[url] = name
+            self.client.send('meta.set_station_name', url, name)
+
+    def get_now_playing(self, url):
+        return self.client.call('meta.now_playing', url)
+
+    def shutdown(self):
+        pass
@@ -0,0 +1,35 @@
+import time
+
+import requests
+
+class DeadlineExceeded(requests.Timeout):
+    """
+    Raised instead of starting a request once the budget is spent. It is a
+    requests.Timeout, so existing RequestException handlers cover it.
+    """
+
+class Deadline:
+    """
+    Time budget for one high-level operation. Requests made on its behalf
+    take their timeouts from what's left, so probes, retries and fallbacks
+    can't stack past it.
+    """
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self):
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self):
+        return self.remaining() <= 0
+
+    def timeout(self, cap):
+        """
+        Timeout for the next request: cap, or less if the budget is nearly gone.
+        """
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise DeadlineExceeded(f"{self.seconds:.1f}s deadline exceeded")
+        return min(cap, remaining)
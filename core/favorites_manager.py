@@ -1,9 +1,15 @@
 from .config_manager import ConfigManager
+from .station_table import StationTable, BandSnapshot
+from .search_index import SearchIndex
 import random
 
+EMPTY_FAVORITES = BandSnapshot()
+
 class FavoritesManager:
-    def __init__(self, config_manager: ConfigManager):
+    def __init__(self, config_manager: ConfigManager, station_table=None, search_index=None):
         self.config_manager = config_manager
+        self.table = station_table or StationTable(config_manager)
+        self.search_index = search_index if search_index is not None else SearchIndex()
         
         # Load raw data
         raw_data = self.config_manager.load_json("favorites.json", default={'radio': [], 'tv': []})
@@ -20,17 +26,25 @@ class FavoritesManager:
         # Ensure keys exist if partial dict loaded
         if 'radio' not in self.favorites: self.favorites['radio'] = []
         if 'tv' not in self.favorites: self.favorites['tv'] = []
+
+        # Entries are {'ref': key, 'frequency': ...}, old files hold full dicts
+        for mode in self.favorites:
+            self.favorites[mode] = BandSnapshot(self.table.load(self.favorites[mode]))
+        self.table.register_owner(self._referenced_keys)
             
         self._ensure_frequencies_all()
+        for mode in self.favorites:
+            self.search_index.update((mode, 'favorites'), self.favorites[mode])
         self.current_indices = {'radio': 0, 'tv': 0}
 
     def _ensure_frequencies_all(self):
         for mode in self.favorites:
-            self._ensure_frequencies(mode)
+            self._ensure_frequencies(self.favorites[mode])
+        # Save back to ensure persistence
+        self.save_favorites()
 
-    def _ensure_frequencies(self, mode):
-        import random
-        fav_list = self.favorites[mode]
+    def _ensure_frequencies(self, fav_list):
+        # Runs before fav_list is published, readers never see a half-tuned list
         used_freqs = set(s.get('frequency') for s in fav_list if s.get('frequency'))
         
         for station in fav_list:
@@ -51,9 +65,6 @@ class FavoritesManager:
                          break
                 if 'frequency' not in station:
                      station['frequency'] = round(random.uniform(87.5, 108.0), 1)
-        
-        # Save back to ensure persistence
-        self.save_favorites()
 
     def add_favorite(self, station, mode='radio'):
         """
@@ -71,13 +82,23 @@ class FavoritesManager:
             if fav['url_resolved'] == station['url_resolved']:
                 return False
         
-        target_list.append(station)
-        self._ensure_frequencies(mode) # Ensure freq assigned immediately
+        # Own ref, so the favorite gets its own frequency
+        updated = list(target_list) + [self.table.intern(station)]
+        self._ensure_frequencies(updated) # Ensure freq assigned immediately
+        self.favorites[mode] = BandSnapshot(updated)
+        self.search_index.update((mode, 'favorites'), self.favorites[mode])
         self.save_favorites()
         return True
 
     def save_favorites(self):
-        self.config_manager.save_json("favorites.json", self.favorites)
+        data = {mode: self.table.dump(refs) for mode, refs in self.favorites.items()}
+        self.config_manager.save_json("favorites.json", data)
+        self.table.save()
+
+    def _referenced_keys(self):
+        for refs in list(self.favorites.values()):
+            for ref in refs:
+                yield ref.key
 
     def remove_favorite(self, station, mode='radio'):
         target_list = self.favorites.get(mode)
@@ -85,13 +106,14 @@ class FavoritesManager:
 
         # Remove by URL or Name
         initial_len = len(target_list)
-        self.favorites[mode] = [s for s in target_list if s.get('url_resolved') != station.get('url_resolved')]
+        self.favorites[mode] = BandSnapshot(s for s in target_list if s.get('url_resolved') != station.get('url_resolved'))
         
         if len(self.favorites[mode]) < initial_len:
+            self.search_index.update((mode, 'favorites'), self.favorites[mode])
             self.save_favorites()
             return True
         return False
 
     def get_favorites(self, mode='radio'):
-        return self.favorites.get(mode, [])
+        return self.favorites.get(mode, EMPTY_FAVORITES)
 
@@ -0,0 +1,85 @@
+import re
+from urllib.parse import urljoin
+
+# audio/x-mpegurl and application/x-mpegurl are also used for plain .m3u
+# radio playlists, so they're not here: the resolver looks at the body
+HLS_TYPES = {'application/vnd.apple.mpegurl'}
+
+# Codec prefixes that carry sound only
+AUDIO_CODECS = ('mp4a', 'ac-3', 'ec-3', 'opus', 'flac', 'mp3')
+
+ATTR_PATTERN = re.compile(r'([A-Z0-9-]+)=("[^"]*"|[^,]*)')
+
+def is_hls(url, content_type=None):
+    if content_type and content_type.lower() in HLS_TYPES:
+        return True
+    return url.lower().split('?')[0].endswith('.m3u8')
+
+def _attributes(line):
+    attrs = {}
+    for key, value in ATTR_PATTERN.findall(line.split(':', 1)[1]):
+        attrs[key] = value.strip('"')
+    return attrs
+
+def parse_master(text, base_url):
+    """
+    Parses an HLS master playlist.
+    Returns (variants, audio_renditions). Both are lists of attribute dicts
+    with an absolute 'uri'. Empty variants means it's a media playlist.
+    """
+    variants = []
+    renditions = []
+    pending = None
+
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith('#EXT-X-STREAM-INF:'):
+            pending = _attributes(line)
+        elif line.startswith('#EXT-X-MEDIA:'):
+            attrs = _attributes(line)
+            if attrs.get('TYPE') == 'AUDIO' and attrs.get('URI'):
+                attrs['uri'] = urljoin(base_url, attrs['URI'])
+                renditions.append(attrs)
+        elif not line.startswith('#') and pending is not None:
+            pending['uri'] = urljoin(base_url, line)
+            try:
+                pending['bandwidth'] = int(pending.get('BANDWIDTH', 0))
+            except ValueError:
+                pending['bandwidth'] = 0
+            variants.append(pending)
+            pending = None
+
+    return variants, renditions
+
+def _is_audio_only(variant):
+    codecs = variant.get('CODECS')
+    if not codecs:
+        return False
+    return all(c.strip().lower().startswith(AUDIO_CODECS) for c in codecs.split(','))
+
+def select_audio_rendition(text, base_url):
+    """
+    Picks the cheapest way to get sound out of a master playlist:
+    a separate audio rendition, else an audio-only variant, else the
+    lowest-bandwidth variant. Returns (uri, audio_only, bandwidth),
+    or None if text isn't a master playlist.
+    """
+    variants, renditions = parse_master(text, base_url)
+    if not variants:
+        return None
+
+    if renditions:
+        # Prefer the default track, then the first one listed
+        chosen = next((r for r in renditions if r.get('DEFAULT') == 'YES'), renditions[0])
+        # Renditions don't advertise their own bandwidth
+        return chosen['uri'], True, 0
+
+    audio_variants = [v for v in variants if _is_audio_only(v)]
+    if audio_variants:
+        best = min(audio_variants, key=lambda v: v['bandwidth'])
+        return best['uri'], True, best['bandwidth']
+
+    lowest = min(variants, key=lambda v: v['bandwidth'])
+    return lowest['uri'], False, lowest['bandwidth']
@@ -0,0 +1,169 @@
+import os
+import time
+import queue
+import sqlite3
+import threading
+
+class SongHistory:
+    """
+    Compact on-disk log of title changes.
+    Station URLs and titles are stored once and referenced by id; plays are
+    indexed by (station, time) so point-in-time lookups don't scan the log.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS stations (
+                id INTEGER PRIMARY KEY,
+                url TEXT UNIQUE NOT NULL,
+                name TEXT
+            );
+            CREATE TABLE IF NOT EXISTS titles (
+                id INTEGER PRIMARY KEY,
+                title TEXT UNIQUE NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS plays (
+                station_id INTEGER NOT NULL,
+                started_at INTEGER NOT NULL,
+                title_id INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS plays_by_station_time ON plays (station_id, started_at);
+            CREATE INDEX IF NOT EXISTS plays_by_time ON plays (started_at);
+        """)
+        self._station_ids = {}
+        self._title_ids = {}
+
+    def _intern(self, table, column, value, cache):
+        if value in cache:
+            return cache[value]
+        cur = self._conn.execute(f"SELECT id FROM {table} WHERE {column} = ?", (value,))
+        row = cur.fetchone()
+        if row:
+            row_id = row[0]
+        else:
+            row_id = self._conn.execute(f"INSERT INTO {table} ({column}) VALUES (?)", (value,)).lastrowid
+        cache[value] = row_id
+        return row_id
+
+    def append(self, url, title, timestamp, name=None):
+        with self._lock:
+            station_id = self._intern('stations', 'url', url, self._station_ids)
+            if name:
+                self._conn.execute("UPDATE stations SET name = ? WHERE id = ? AND (name IS NULL OR name != ?)",
+                                   (name, station_id, name))
+            title_id = self._intern('titles', 'title', title, self._title_ids)
+            self._conn.execute("INSERT INTO plays (station_id, started_at, title_id) VALUES (?, ?, ?)",
+                               (station_id, int(timestamp), title_id))
+            self._conn.commit()
+
+    def title_at(self, url, timestamp):
+        """
+        Returns the title that was playing on url at timestamp, or None.
+        """
+        with self._lock:
+            row = self._conn.execute("""
+                SELECT t.title FROM plays p
+                JOIN stations s ON s.id = p.station_id
+                JOIN titles t ON t.id = p.title_id
+                WHERE s.url = ? AND p.started_at <= ?
+                ORDER BY p.started_at DESC LIMIT 1
+            """, (url, int(timestamp))).fetchone()
+        return row[0] if row else None
+
+    def history(self, url=None, since=None, until=None, limit=50):
+        """
+        Returns [(started_at, station_name_or_url, title)], newest first.
+        """
+        clauses = []
+        params = []
+        if url:
+            clauses.append("s.url = ?")
+            params.append(url)
+        if since:
+            clauses.append("p.started_at >= ?")
+            params.append(int(since))
+        if until:
+            clauses.append("p.started_at <= ?")
+            params.append(int(until))
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        params.append(limit)
+
+        with self._lock:
+            rows = self._conn.execute(f"""
+                SELECT p.started_at, COALESCE(s.name, s.url), t.title FROM plays p
+                JOIN stations s ON s.id = p.station_id
+                JOIN titles t ON t.id = p.title_id
+                {where}
+                ORDER BY p.started_at DESC LIMIT ?
+            """, params).fetchall()
+        return rows
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+class MetadataWatcher:
+    """
+    Receives ICY/StreamTitle updates from StreamPlayer as they happen,
+    keeps the latest title per station, and logs changes to SongHistory
+    from a background thread.
+    """
+    def __init__(self, config_manager=None, history_file="song_history.db"):
+        self.titles = {} # url -> latest title
+        self.station_names = {} # url -> display name
+
+        self.history = None
+        if config_manager:
+            try:
+                self.history = SongHistory(os.path.join(config_manager.config_dir, history_file))
+            except sqlite3.Error as e:
+                print(f"Song history disabled: {e}")
+
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._write_loop, daemon=True)
+        self._worker.start()
+
+    def on_meta_change(self, url, title):
+        if not url or not title:
+            return
+        if self.titles.get(url) == title:
+            return
+        name = self.station_names.get(url)
+        if name and title.strip().casefold() == name.strip().casefold():
+            # Streams without song titles often send their own name as Title
+            return
+        self.titles[url] = title
+        self._queue.put((url, title, time.time()))
+
+    def set_station_name(self, url, name):
+        if url and name:
+            self.station_names[url] = name
+
+    def get_now_playing(self, url):
+        return self.titles.get(url, "Unknown")
+
+    def title_at(self, url, timestamp):
+        if not self.history:
+            return None
+        return self.history.title_at(url, timestamp)
+
+    def _write_loop(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            url, title, timestamp = item
+            if not self.history:
+                continue
+            try:
+                self.history.append(url, title, timestamp, self.station_names.get(url))
+            except sqlite3.Error as e:
+                print(f"Error writing song history: {e}")
+
+    def shutdown(self):
+        self._queue.put(None)
+        self._worker.join(timeout=2.0)
+        if self.history:
+            self.history.close()
@@ -0,0 +1,202 @@
+import time
+import ctypes
+import threading
+from collections import deque
+
+import pygame
+import vlc
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .static_generator import StaticGenerator, LEVELS, signal_level
+
+class PcmMixer:
+    """
+    Opt-in audio engine: libvlc decodes stations to PCM through audio
+    callbacks and one NumPy mixer blends them with static, block by block,
+    into a single pygame channel. Gains ramp per sample, so crossfades are
+    sample accurate and both sources share one clock and output device.
+    """
+    def __init__(self, block_frames=1024, max_backlog_seconds=0.5, static_generator=None):
+        if np is None:
+            raise RuntimeError("PcmMixer requires numpy")
+
+        try:
+            pygame.mixer.init()
+        except pygame.error:
+            pass
+        mixer_format = pygame.mixer.get_init()
+        if mixer_format is None:
+            raise RuntimeError("PcmMixer needs an audio device")
+        self.rate, size, self.channels = mixer_format
+        if size != -16:
+            raise RuntimeError(f"PcmMixer needs a signed 16-bit mixer, got {size}")
+
+        self.block_frames = block_frames
+        self.block_seconds = block_frames / self.rate
+        self.max_backlog = int(max_backlog_seconds * self.rate)
+
+        # Decoded station audio, appended from libvlc's audio thread
+        self._fifo = deque()
+        self._fifo_frames = 0
+        self._fifo_lock = threading.Lock()
+        self.underruns = 0
+
+        self.station_gain = 0.0
+        self._station_gain_now = 0.0
+
+        self.static = MixedStatic(static_generator or StaticGenerator())
+
+        # Keep pygame from handing our channel to Sound.play()
+        pygame.mixer.set_reserved(1)
+        self._output = pygame.mixer.Channel(0)
+
+        self._running = True
+        self._thread = threading.Thread(target=self._mix_loop, daemon=True)
+        self._thread.start()
+
+    # --- libvlc side ---
+
+    def attach(self, player, is_active):
+        """
+        Routes player's decoded audio into the mixer. is_active() tells the
+        callback whether this player is the audible one right now; standby
+        players decode into the void. Returns the callback refs to keep alive.
+        """
+        def play_cb(opaque, samples, count, pts):
+            if not is_active():
+                return
+            data = np.frombuffer(ctypes.string_at(samples, count * self.channels * 2), dtype=np.int16)
+            self.push(data.reshape(-1, self.channels))
+
+        def flush_cb(opaque, pts):
+            if is_active():
+                self.flush()
+
+        callbacks = (
+            vlc.CallbackDecorators.AudioPlayCb(play_cb),
+            vlc.CallbackDecorators.AudioFlushCb(flush_cb),
+        )
+        player.audio_set_format("S16N", self.rate, self.channels)
+        player.audio_set_callbacks(callbacks[0], None, None, callbacks[1], None, None)
+        return callbacks
+
+    def push(self, frames):
+        with self._fifo_lock:
+            self._fifo.append(frames)
+            self._fifo_frames += len(frames)
+            # Bound latency: drop the oldest audio if decoding runs ahead
+            while self._fifo_frames > self.max_backlog and len(self._fifo) > 1:
+                self._fifo_frames -= len(self._fifo.popleft())
+
+    def flush(self):
+        with self._fifo_lock:
+            self._fifo.clear()
+            self._fifo_frames = 0
+
+    def set_station_gain(self, gain):
+        self.station_gain = max(0.0, min(1.0, gain))
+
+    # --- mixing ---
+
+    def _pull_station(self, frames):
+        out = np.zeros((frames, self.channels), dtype=np.float32)
+        filled = 0
+        with self._fifo_lock:
+            while filled < frames and self._fifo:
+                chunk = self._fifo[0]
+                take = min(frames - filled, len(chunk))
+                out[filled:filled + take] = chunk[:take]
+                filled += take
+                if take == len(chunk):
+                    self._fifo.popleft()
+                else:
+                    self._fifo[0] = chunk[take:]
+                self._fifo_frames -= take
+        if filled < frames and self._station_gain_now > 0:
+            self.underruns += 1
+        return out
+
+    def _ramp(self, start, end, frames):
+        if start == end:
+            return start
+        return np.linspace(start, end, frames, endpoint=False, dtype=np.float32)[:, None]
+
+    def mix_block(self):
+        frames = self.block_frames
+
+        station_target = self.station_gain
+        station = self._pull_station(frames) * self._ramp(self._station_gain_now, station_target, frames)
+        self._station_gain_now = station_target
+
+        mixed = station + self.static.render(frames, self._ramp)
+        return np.clip(mixed, -32768, 32767).astype(np.int16)
+
+    def _mix_loop(self):
+        while self._running:
+            # One block playing plus one queued: a fixed, deterministic buffer
+            if not self._output.get_busy():
+                self._output.play(pygame.mixer.Sound(buffer=self.mix_block().tobytes()))
+            if self._output.get_queue() is None:
+                self._output.queue(pygame.mixer.Sound(buffer=self.mix_block().tobytes()))
+            time.sleep(self.block_seconds / 4)
+
+    def shutdown(self):
+        self._running = False
+        self._thread.join(timeout=1.0)
+        self._output.stop()
+
+class MixedStatic:
+    """
+    Static voice rendered inside PcmMixer. Same interface as
+    StaticGenerator, so EventController can drive either one.
+    """
+    def __init__(self, bank):
+        self.bank = bank
+        self.color = bank.color
+        self.level = bank.level
+        self.volume = 0.5
+        self.playing = False
+        self._gain_now = 0.0
+        self._position = 0
+        self._samples = self._bank_samples()
+
+    def _bank_samples(self):
+        # The bank holds full-level noise, a level is a gain on it
+        return self.bank.arrays[self.color].astype(np.float32) * (LEVELS[self.level] / LEVELS[-1])
+
+    def play(self):
+        self.playing = True
+
+    def stop(self):
+        self.playing = False
+
+    def set_volume(self, volume):
+        self.volume = max(0.0, min(1.0, volume))
+        self.playing = self.volume > 0.0
+
+    def set_signal(self, strength, color=None):
+        level = signal_level(strength, self.level)
+        color = color or self.color
+        if (color, level) == (self.color, self.level):
+            return
+        self.color = color
+        self.level = level
+        self._samples = self._bank_samples()
+        self._position %= len(self._samples)
+
+    def render(self, frames, ramp):
+        target = self.volume if self.playing else 0.0
+        if target == 0.0 and self._gain_now == 0.0:
+            return 0.0 # Skip the work entirely while silent
+
+        samples = self._samples
+        idx = (np.arange(frames) + self._position) % len(samples)
+        self._position = (self._position + frames) % len(samples)
+
+        out = samples[idx] * ramp(self._gain_now, target, frames)
+        self._gain_now = target
+        return out
@@ -0,0 +1,287 @@
+import bisect
+import heapq
+import operator
+import threading
+import unicodedata
+from collections import Counter
+
+# A station needs this share of the query's trigrams to count as a typo match
+FUZZY_MIN_SHARE = 0.5
+# Prefix lookups remembered between keystrokes (until the index changes)
+PREFIX_CACHE_SIZE = 64
+# Typo candidates ranked exactly, per result wanted
+FUZZY_SHORTLIST = 4
+# A trigram found in more stations than this share of the index (and this
+# many at least) is too common to find typo candidates by ("rad" in every
+# "... Radio"); it still counts towards the similarity of the others
+FUZZY_COMMON_SHARE = 0.25
+FUZZY_COMMON_MIN = 200
+
+def normalize(text):
+    """
+    Case-folded, accent-stripped words: "Café Über-FM" -> ['cafe', 'uber', 'fm'].
+    """
+    decomposed = unicodedata.normalize('NFKD', text or '')
+    folded = ''.join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+    return ''.join(c if c.isalnum() else ' ' for c in folded).split()
+
+def trigrams(words, partial_last=False):
+    """
+    Word trigrams padded like pg_trgm ("  ja", " jaz", ...). The last word
+    of a query being typed gets no end padding, it's probably unfinished.
+    """
+    grams = set()
+    for i, word in enumerate(words):
+        padded = f"  {word}" if partial_last and i == len(words) - 1 else f"  {word} "
+        grams.update(padded[j:j + 3] for j in range(len(padded) - 2))
+    return grams
+
+class _PrefixIndex:
+    # word -> keys, plus the words sorted so a prefix is a bisect away.
+    # Typing "jazz ra" looks "jazz" up again on every keystroke, so prefix
+    # results are cached; the sets returned must not be modified.
+    def __init__(self):
+        self.words = {}
+        self.sorted = []
+        self._cache = {}
+
+    def add(self, word, key):
+        if self._cache:
+            self._cache.clear()
+        keys = self.words.get(word)
+        if keys is None:
+            keys = self.words[word] = set()
+            bisect.insort(self.sorted, word)
+        keys.add(key)
+
+    def discard(self, word, key):
+        if self._cache:
+            self._cache.clear()
+        keys = self.words[word]
+        keys.discard(key)
+        if not keys:
+            del self.words[word]
+            del self.sorted[bisect.bisect_left(self.sorted, word)]
+
+    def keys(self, prefix):
+        found = self._cache.get(prefix)
+        if found is not None:
+            return found
+        found = set()
+        words = self.sorted
+        i = bisect.bisect_left(words, prefix)
+        while i < len(words) and words[i].startswith(prefix):
+            found |= self.words[words[i]]
+            i += 1
+        if len(self._cache) >= PREFIX_CACHE_SIZE:
+            self._cache.clear()
+        self._cache[prefix] = found
+        return found
+
+class SearchIndex:
+    """
+    In-memory prefix and trigram index over every station in a published
+    band, keyed by station (a station in several bands is indexed once).
+    Publishers call update() with a band's whole new contents and only the
+    difference is applied, so refreshes stay cheap. Searches are typo
+    tolerant and fast enough to run on every keystroke.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sources = {}   # (mode, band) -> {key: station}
+        self._inputs = {}    # (mode, band) -> stations as last given to update()
+        self._owners = {}    # key -> {(mode, band): station}
+        self._mode_keys = {} # mode -> keys with a copy in that mode
+        self._docs = {}      # key -> (name, tags, words, first name word, grams)
+        self._order = {}     # key -> sort key among equally good matches
+        self._words = _PrefixIndex()
+        self._first_words = _PrefixIndex()
+        self._grams = {}     # trigram -> keys
+
+    def __len__(self):
+        return len(self._docs)
+
+    def _key(self, station):
+        if isinstance(station, dict):
+            return station.get('stationuuid') or station.get('url_resolved')
+        return station.key or station.get('stationuuid') or station.get('url_resolved')
+
+    def update(self, source, stations):
+        """
+        Makes source, a (mode, band) pair, hold exactly these stations.
+        """
+        stations = stations if isinstance(stations, tuple) else tuple(stations)
+        # Republishing the same station objects (a repeated search) is common,
+        # spotting it is one pass in C instead of a diff in Python
+        previous = self._inputs.get(source)
+        if previous is not None and len(previous) == len(stations) \
+                and all(map(operator.is_, previous, stations)):
+            return
+
+        entries = {}
+        key_of = self._key
+        for station in stations:
+            key = key_of(station)
+            if key and key not in entries:
+                entries[key] = station
+        mode = source[0]
+
+        with self._lock:
+            old = self._sources.pop(source, {})
+            for key in old.keys() - entries.keys():
+                owners = self._owners[key]
+                del owners[source]
+                if not any(other[0] == mode for other in owners):
+                    self._mode_keys[mode].discard(key)
+                if not owners:
+                    del self._owners[key]
+                    self._remove_doc(key)
+
+            self._mode_keys.setdefault(mode, set()).update(entries)
+            all_owners = self._owners
+            for key, station in entries.items():
+                owners = all_owners.get(key)
+                if owners is None:
+                    owners = all_owners[key] = {}
+                elif owners.get(source) is station:
+                    continue # Unchanged since the last update
+                owners[source] = station
+                name, tags = station.get('name') or '', station.get('tags') or ''
+                doc = self._docs.get(key)
+                if doc is None or doc[0] != name or doc[1] != tags:
+                    if doc is not None:
+                        self._remove_doc(key)
+                    self._add_doc(key, name, tags)
+
+            if entries:
+                self._sources[source] = entries
+                self._inputs[source] = stations
+            else:
+                self._inputs.pop(source, None)
+
+    def remove(self, source):
+        self.update(source, ())
+
+    def _add_doc(self, key, name, tags):
+        name_words = normalize(name)
+        # Tags are only prefix-searchable, their trigrams would drown the name's
+        words = set(name_words)
+        words.update(normalize(tags.replace(',', ' ')))
+        first = name_words[0] if name_words else ''
+        grams = trigrams(name_words)
+        self._docs[key] = (name, tags, words, first, grams)
+        self._order[key] = (len(name), name)
+
+        for word in words:
+            self._words.add(word, key)
+        self._first_words.add(first, key)
+        for gram in grams:
+            keys = self._grams.get(gram)
+            if keys is None:
+                keys = self._grams[gram] = set()
+            keys.add(key)
+
+    def _remove_doc(self, key):
+        _, _, words, first, grams = self._docs.pop(key)
+        del self._order[key]
+        for word in words:
+            self._words.discard(word, key)
+        self._first_words.discard(first, key)
+        for gram in grams:
+            keys = self._grams[gram]
+            keys.discard(key)
+            if not keys:
+                del self._grams[gram]
+
+    def search(self, query, limit=10, prefer=None):
+        """
+        Best matches for a query as [(station, (mode, band))]. Stations with
+        a word starting with every query word come first (names starting
+        with the first one before the rest), then typo matches by trigram
+        similarity. prefer, a (mode, band), ranks that mode's stations first
+        and picks which band's copy of a station is returned.
+        """
+        words = normalize(query)
+        if not words:
+            return []
+
+        with self._lock:
+            preferred = self._mode_keys.get(prefer[0], set()) if prefer else None
+            # Rarest word first, so the intersection shrinks fast
+            prefix_sets = sorted((self._words.keys(w) for w in words), key=len)
+            exact = set.intersection(*prefix_sets) if prefix_sets[0] else set()
+            leading = exact & self._first_words.keys(words[0]) if exact else set()
+
+            # Sets are ranked only until the limit fills, so a one-letter
+            # query matching most stations still costs little
+            ranked = []
+            for tier in self._tiers(exact, leading, preferred):
+                ranked += heapq.nsmallest(limit - len(ranked), tier, key=self._order.__getitem__)
+                if len(ranked) >= limit:
+                    break
+
+            if len(ranked) < limit:
+                ranked += self._fuzzy(words, exact, limit - len(ranked), preferred)
+
+            return [self._pick(key, prefer) for key in ranked]
+
+    def _tiers(self, exact, leading, preferred):
+        # Built lazily: usually the first tier alone fills the limit
+        for keys in (leading, None):
+            if keys is None:
+                keys = exact - leading
+            if preferred is None:
+                yield keys
+            else:
+                yield keys & preferred
+                yield keys - preferred
+
+    def _fuzzy(self, words, exclude, limit, preferred):
+        query_grams = trigrams(words, partial_last=True)
+        needed = max(2, int(len(query_grams) * FUZZY_MIN_SHARE + 0.5))
+        common_size = max(FUZZY_COMMON_MIN, len(self._docs) * FUZZY_COMMON_SHARE)
+
+        # Candidates come from the rare trigrams only, so a query doesn't
+        # touch every station that happens to contain "rad" or "io "
+        counts = Counter()
+        common = []
+        for gram in query_grams:
+            keys = self._grams.get(gram)
+            if not keys:
+                continue
+            if len(keys) > common_size:
+                common.append(keys)
+            else:
+                counts.update(keys)
+        if not counts:
+            return []
+
+        def rank(item):
+            key, shared = item
+            # Jaccard similarity, best first
+            similarity = shared / (len(query_grams) + len(self._docs[key][4]) - shared)
+            return (preferred is not None and key not in preferred, -similarity, self._order[key])
+
+        # Shortlist by rare trigrams shared (fast, in C), topped up with the
+        # common ones, before the exact ranking
+        candidates = []
+        for key, shared in counts.most_common(limit * FUZZY_SHORTLIST):
+            if shared + len(common) < needed:
+                break
+            if key in exclude:
+                continue
+            shared += sum(1 for keys in common if key in keys)
+            if shared >= needed:
+                candidates.append((key, shared))
+        return [key for key, _ in heapq.nsmallest(limit, candidates, key=rank)]
+
+    def _pick(self, key, prefer):
+        owners = self._owners[key]
+        if prefer in owners:
+            return owners[prefer], prefer
+        if prefer:
+            for source, station in owners.items():
+                if source[0] == prefer[0]:
+                    return station, source
+        source, station = next(iter(owners.items()))
+        return station, source
@@ -1,48 +1,179 @@
 import pygame
 import os
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Bump when the generation recipe changes so stale caches are ignored
+BANK_VERSION = 3
+
+COLORS = ('white', 'pink', 'hiss')
+# Peak amplitude per signal strength level, weakest signal is loudest static
+LEVELS = (0.35, 0.65, 1.0)
+# How far past a level boundary the strength must move to change level,
+# so a dial resting on a boundary doesn't flip between two
+LEVEL_HYSTERESIS = 0.05
+# Crossfade when the noise color changes
+FADE_MS = 60
+
+def signal_level(strength, current=None):
+    """
+    Maps signal strength in [0, 1] to an index into LEVELS, sticking to
+    the current level near its boundaries.
+    """
+    strength = max(0.0, min(1.0, strength))
+    level = min(len(LEVELS) - 1, int((1.0 - strength) * len(LEVELS)))
+    if current is not None and level != current:
+        low = (len(LEVELS) - 1 - current) / len(LEVELS)
+        high = (len(LEVELS) - current) / len(LEVELS)
+        if low - LEVEL_HYSTERESIS <= strength <= high + LEVEL_HYSTERESIS:
+            return current
+    return level
+
 class StaticGenerator:
-    def __init__(self):
+    def __init__(self, cache_dir="config", duration=3.0):
         try:
             pygame.mixer.init()
         except pygame.error:
             pass # Might already be initialized
-            
-        self.sound = self._generate_white_noise()
+
+        self.cache_dir = cache_dir
+        self.duration = duration
+        # color -> full-level samples, kept for the PCM mixer, and the same
+        # as Sounds; quieter levels are only a lower gain
+        self.arrays = {}
+        self.sounds = self._load_bank()
+
+        self.color = 'white'
+        self.level = len(LEVELS) - 1
+        self.sound = self.sounds.get(self.color)
         self.channel = None
         self.volume = 0.5
-        
-    def _generate_white_noise(self):
-        # Generate 1 second of white noise
-        duration = 1.0 
-        sample_rate = 44100
-        
-        # Use os.urandom which is standard library
-        # Generate random bytes
-        n_samples = int(duration * sample_rate)
-        buffer = os.urandom(n_samples)
-        
-        # Convert to numpy array for manipulation if we had numpy, but
-        # standard pygame can take raw bytes for Sound if formatted correctly.
-        # Actually simplest is just to use the raw bytes.
-        # 8-bit unsigned audio is 0-255. White noise is random values.
-        
-        return pygame.mixer.Sound(buffer=buffer)
+
+    def _load_bank(self):
+        mixer_format = pygame.mixer.get_init()
+        if mixer_format is None:
+            print("Static: no audio device, staying silent")
+            return {}
+        freq, size, channels = mixer_format
+
+        if np is None:
+            # Raw random bytes are valid white noise in any integer format
+            n_bytes = int(self.duration * freq) * channels * (abs(size) // 8)
+            noise = pygame.mixer.Sound(buffer=os.urandom(n_bytes))
+            return {color: noise for color in COLORS}
+
+        cache_path = os.path.join(self.cache_dir, f"static_bank_v{BANK_VERSION}_{freq}_{size}_{channels}.npz")
+        arrays = None
+        if os.path.exists(cache_path):
+            try:
+                with np.load(cache_path) as data:
+                    arrays = {key: data[key] for key in data.files}
+            except (OSError, ValueError):
+                arrays = None
+            if arrays is not None and set(arrays) != set(COLORS):
+                arrays = None
+
+        if arrays is None:
+            arrays = self._generate_bank(freq, size, channels)
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                np.savez(cache_path, **arrays)
+            except OSError as e:
+                print(f"Could not cache static bank: {e}")
+
+        self.arrays = arrays
+        return {color: pygame.mixer.Sound(buffer=arrays[color].tobytes()) for color in COLORS}
+
+    def _generate_bank(self, freq, size, channels):
+        """
+        Builds one full-level buffer per color in the mixer's native format.
+        Noise is shaped in the frequency domain, so each buffer is exactly
+        periodic and loops without a seam.
+        """
+        n = int(self.duration * freq)
+        rng = np.random.default_rng()
+        bins = np.fft.rfftfreq(n, 1.0 / freq)
+        bins[0] = bins[1] # Avoid dividing by zero at DC
+
+        shapes = {
+            'white': np.ones_like(bins),
+            # Softer rumble of a station just out of reach
+            'pink': 1.0 / np.sqrt(bins),
+            # Tuner hiss: white noise with the lows rolled off below ~2 kHz
+            'hiss': 1.0 / np.sqrt(1.0 + (2000.0 / bins) ** 4),
+        }
+
+        if size < 0:
+            dtype = {8: np.int8, 16: np.int16, 32: np.int32}[abs(size)]
+            full_scale = np.iinfo(dtype).max
+            offset = 0
+        elif size == 32:
+            dtype = np.float32
+            full_scale = 1.0
+            offset = 0
+        else:
+            dtype = {8: np.uint8, 16: np.uint16}[size]
+            full_scale = np.iinfo(dtype).max // 2
+            offset = full_scale + 1
+
+        arrays = {}
+        for color, shape in shapes.items():
+            # One independent noise per output channel
+            spectrum = (rng.standard_normal((channels, len(bins))) + 1j * rng.standard_normal((channels, len(bins)))) * shape
+            signal = np.fft.irfft(spectrum, n=n, axis=1)
+            signal /= np.max(np.abs(signal))
+            samples = signal.T * (LEVELS[-1] * full_scale) + offset # (n, channels)
+            arrays[color] = np.ascontiguousarray(samples.astype(dtype))
+        return arrays
+
+    def set_signal(self, strength, color=None):
+        """
+        Picks the noise for a signal strength in [0, 1]
+        (1 = station fully locked, 0 = nothing in range).
+        """
+        level = signal_level(strength, self.level)
+        color = color or self.color
+        if (color, level) == (self.color, self.level):
+            return
+
+        self.level = level
+        if color != self.color:
+            self.color = color
+            self.sound = self.sounds.get(color)
+            if self.channel:
+                # Crossfade onto a new channel, restarting this one would click
+                self.channel.fadeout(FADE_MS)
+                self.channel = self.sound.play(loops=-1, fade_ms=FADE_MS)
+        self._apply_volume()
 
     def play(self):
-        if not self.channel:
+        if self.sound is None:
+            return
+        if not self.channel or not self.channel.get_busy():
             self.channel = self.sound.play(loops=-1) # Loop forever
-        
-        # Ensure it's playing
-        if self.channel and not self.channel.get_busy():
-             self.channel = self.sound.play(loops=-1)
-             
         self.set_volume(self.volume)
 
     def set_volume(self, volume):
         self.volume = max(0.0, min(1.0, volume))
+
+        # Silent static still costs mixer CPU, so stop the channel outright
+        if self.volume == 0.0:
+            if self.channel:
+                self.channel.stop()
+                self.channel = None
+            return
+
+        if not self.channel and self.sound is not None:
+            self.channel = self.sound.play(loops=-1, fade_ms=FADE_MS)
+        self._apply_volume()
+
+    def _apply_volume(self):
+        # Levels share one buffer per color, a level is just a gain
         if self.channel:
-            self.channel.set_volume(self.volume)
+            self.channel.set_volume(self.volume * LEVELS[self.level] / LEVELS[-1])
 
     def stop(self):
         if self.channel:
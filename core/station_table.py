@@ -0,0 +1,173 @@
+import itertools
+import threading
+from collections.abc import MutableMapping
+
+# Shared by every band, so a version number never repeats across bands
+_versions = itertools.count(1)
+
+class BandSnapshot(tuple):
+    """
+    An immutable published band. Writers build a new snapshot and swap the
+    reference in; readers iterate whatever they hold without locking and
+    compare .version to tell whether their derived caches are still valid.
+    """
+    def __new__(cls, stations=()):
+        self = super().__new__(cls, stations)
+        self.version = next(_versions)
+        return self
+
+class StationRef(MutableMapping):
+    """
+    A station as it appears in one band: a reference to the shared station
+    record plus this band's own fields (frequency). Reads fall through to
+    the shared record, writes stay local, so bands never copy station data.
+    """
+    __slots__ = ('key', 'station', 'overrides')
+
+    def __init__(self, key, station, overrides=None):
+        self.key = key
+        self.station = station
+        self.overrides = overrides or {}
+
+    def __getitem__(self, name):
+        if name in self.overrides:
+            return self.overrides[name]
+        return self.station[name]
+
+    def __setitem__(self, name, value):
+        self.overrides[name] = value
+
+    def __delitem__(self, name):
+        del self.overrides[name]
+
+    def __iter__(self):
+        yield from self.overrides
+        for name in self.station:
+            if name not in self.overrides:
+                yield name
+
+    def __len__(self):
+        return len(self.overrides) + sum(1 for name in self.station if name not in self.overrides)
+
+    def __repr__(self):
+        return f"StationRef({self.key!r}, {self.overrides!r})"
+
+    def copy(self):
+        return StationRef(self.key, self.station, dict(self.overrides))
+
+# Fields that belong to a band entry rather than the station itself
+BAND_FIELDS = ('frequency',)
+
+class StationTable:
+    """
+    Interned station records keyed by stationuuid (or URL when there is none).
+    Bands and favorites hold StationRefs into it and persist only
+    {'ref': key, 'frequency': ...}; the records themselves are saved once.
+    """
+    def __init__(self, config_manager=None, filename="station_table.json"):
+        self.config_manager = config_manager
+        self.filename = filename
+        self.stations = {}
+        self._owners = [] # callables returning the keys they reference
+        self._dirty = False
+        self._saved_keys = None
+        # Fetch workers and the UI thread both save
+        self._save_lock = threading.Lock()
+
+        if self.config_manager:
+            self.stations = self.config_manager.load_json(self.filename, {})
+
+    @staticmethod
+    def key_for(station):
+        return station.get('stationuuid') or station.get('url_resolved')
+
+    def intern(self, station):
+        """
+        Returns a new StationRef for station. Raw dicts are merged into the
+        shared record; band fields like frequency stay on the ref.
+        """
+        if isinstance(station, StationRef):
+            return station.copy()
+
+        key = self.key_for(station)
+        overrides = {f: station[f] for f in BAND_FIELDS if f in station}
+        if key is None:
+            # Nothing to key on, keep it private to this band
+            record = {k: v for k, v in station.items() if k not in BAND_FIELDS}
+            return StationRef(None, record, overrides)
+
+        record = self.stations.get(key)
+        if record is None:
+            record = {k: v for k, v in station.items() if k not in BAND_FIELDS}
+            self.stations[key] = record
+            self._dirty = True
+        else:
+            for k, v in station.items():
+                if k not in BAND_FIELDS and record.get(k) != v:
+                    record[k] = v
+                    self._dirty = True
+        return StationRef(key, record, overrides)
+
+    def intern_all(self, stations):
+        return [self.intern(s) for s in stations]
+
+    def dump(self, refs):
+        """
+        Serializes a band to [{'ref': key, ...band fields}].
+        """
+        out = []
+        for ref in refs:
+            if not isinstance(ref, StationRef):
+                ref = self.intern(ref)
+            if ref.key is None:
+                entry = dict(ref.station)
+                entry.update(ref.overrides)
+                out.append(entry)
+            else:
+                entry = {'ref': ref.key}
+                entry.update(ref.overrides)
+                out.append(entry)
+        return out
+
+    def load(self, entries):
+        """
+        Inverse of dump(). Also accepts legacy full station dicts.
+        """
+        refs = []
+        for entry in entries or []:
+            if 'ref' in entry:
+                record = self.stations.get(entry['ref'])
+                if record is None:
+                    continue # Dangling reference
+                overrides = {k: v for k, v in entry.items() if k != 'ref'}
+                refs.append(StationRef(entry['ref'], record, overrides))
+            else:
+                refs.append(self.intern(entry))
+        return refs
+
+    def register_owner(self, referenced_keys):
+        """
+        referenced_keys() -> iterable of keys that must survive a save.
+        Register before anything can save, or the first save drops the
+        records only this owner references.
+        """
+        self._owners.append(referenced_keys)
+
+    def save(self):
+        """
+        Writes only the records some owner still references, and only when
+        that set or a record changed since the last save.
+        """
+        if not self.config_manager:
+            return
+        with self._save_lock:
+            keys = set()
+            for owner in self._owners:
+                keys.update(k for k in owner() if k is not None)
+            if not self._dirty and keys == self._saved_keys:
+                return
+
+            records = {k: self.stations[k] for k in keys if k in self.stations}
+            self.config_manager.save_json(self.filename, records)
+            self._saved_keys = keys
+            self._dirty = False
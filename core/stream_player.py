@@ -1,58 +1,306 @@
 import vlc
 import time
+import queue
 import threading
+from collections import OrderedDict
+from .timeshift import TimeShift
+from .hls import is_hls
+from .stream_resolver import PLAYLIST_TYPES
+from .tracer import tracer
+from urllib.parse import urlsplit
+
+# Cached player states, driven by libvlc events
+STATE_IDLE = 'idle'
+STATE_OPENING = 'opening'
+STATE_BUFFERING = 'buffering'
+STATE_PLAYING = 'playing'
+STATE_ERROR = 'error'
+STATE_ENDED = 'ended'
+STATE_STOPPED = 'stopped'
+STATE_PAUSED = 'paused'
+# Released while nobody could hear it, reopened on demand
+STATE_SUSPENDED = 'suspended'
+
+# Wrappers libvlc opens itself, they can't go through the time-shift ring
+PLAYLIST_EXTENSIONS = ('.m3u8', '.m3u', '.pls', '.asx', '.xspf')
+
+# States play() leaves alone for the current URL
+ACTIVE_STATES = {STATE_OPENING, STATE_BUFFERING, STATE_PLAYING, STATE_PAUSED}
+# What a media reports when it's done; after a new media is set these can
+# still arrive from the previous one until the new one starts opening
+FINAL_STATES = {STATE_ERROR, STATE_ENDED, STATE_STOPPED}
+
+# Seconds before play() reopens a station that failed, doubled on every
+# failure in a row up to the max
+RETRY_DELAY = 2.0
+RETRY_MAX_DELAY = 60.0
+# Seconds shutdown() waits for released players to finish stopping
+RELEASE_TIMEOUT = 2.0
+
+PLAYER_EVENTS = {
+    vlc.EventType.MediaPlayerOpening: STATE_OPENING,
+    vlc.EventType.MediaPlayerBuffering: STATE_BUFFERING,
+    vlc.EventType.MediaPlayerPlaying: STATE_PLAYING,
+    vlc.EventType.MediaPlayerEncounteredError: STATE_ERROR,
+    vlc.EventType.MediaPlayerEndReached: STATE_ENDED,
+    vlc.EventType.MediaPlayerStopped: STATE_STOPPED,
+    vlc.EventType.MediaPlayerPaused: STATE_PAUSED,
+}
 
 class StreamPlayer:
-    def __init__(self):
-        self.instance = vlc.Instance('--no-video')
-        self.player = self.instance.media_player_new()
+    def __init__(self, max_standby=2, resolver=None, timeshift_seconds=0, pcm_mixer=None, audio_output=None,
+                 suspend_after=0):
+        args = ['--no-video']
+        if audio_output:
+            # e.g. 'adummy', libvlc's null output for headless runs
+            args.append(f'--aout={audio_output}')
+        self.instance = vlc.Instance(*args)
+        # Optional StreamResolver, maps station URLs to their final endpoint
+        self.resolver = resolver
+
+        # Time-shift: when > 0 the active station is captured into a ring
+        # buffer of this many seconds and played from a cursor into it
+        self.timeshift_seconds = timeshift_seconds
+        self.timeshift = None
+        # Stations whose capture failed this session, played directly
+        self._direct_urls = set()
+
+        # Optional PcmMixer: players decode into it instead of libvlc's output
+        self.pcm_mixer = pcm_mixer
         self.current_url = None
         self.master_volume = 1.0
 
+        # Idle suspension: after this many seconds without audible output
+        # (muted, zero volume or no station) every stream is released, so
+        # nothing is downloaded. current_url stays as the hint to reopen.
+        # 0 keeps streams open forever.
+        self.suspend_after = suspend_after
+        self.suspended = False
+        self._volume = 0.0
+        self._silent_since = None
+        self._prefetch_urls = [] # Rewarmed on resume
+
+        # Per-player cache written from libvlc's event thread:
+        # id(player) -> {'url', 'state', 'buffering', 'meta_dirty', 'mute_pending',
+        #                'opened', 'timeshift', 'failures', 'retry_at',
+        #                'tune_span' until first audio}
+        # Only plain attribute writes happen there; libvlc calls stay on our side.
+        self._info = {}
+
+        # Optional callbacks, invoked from update() on the caller's thread
+        self.on_error = None # fn(url)
+        self.on_buffering = None # fn(url, percent)
+        self.on_state_change = None # fn(url, state)
+        self.on_meta_change = None # fn(url, title), for active and standby players
+        self._reported_state = None
+
+        self.now_playing = "Unknown"
+
+        # libvlc's stop() can block on the network for a while, so players
+        # are stopped and released on this thread instead of the caller's
+        self._released = queue.Queue()
+        self._releaser = threading.Thread(target=self._release_loop, daemon=True)
+        self._releaser.start()
+
+        self.player = self._new_player()
+
+        # Warm standby pool: url -> muted, already-connected media player.
+        # Ordered from least to most recently relevant.
+        self.max_standby = max_standby
+        self._standby = OrderedDict()
+
+    @property
+    def state(self):
+        if self.suspended:
+            return STATE_SUSPENDED
+        return self._info[id(self.player)]['state']
+
+    @property
+    def tune_span(self):
+        """
+        The current station's tune span until its first audio, else None.
+        """
+        return self._info[id(self.player)].get('tune_span')
+
+    @property
+    def buffering(self):
+        return self._info[id(self.player)]['buffering']
+
+    def _new_player(self):
+        player = self.instance.media_player_new()
+        info = {'url': None, 'opened_url': None, 'state': STATE_IDLE, 'buffering': 0.0,
+                'meta_dirty': False, 'mute_pending': False, 'opened': True, 'timeshift': False,
+                'failures': 0, 'retry_at': 0.0}
+        self._info[id(player)] = info
+
+        manager = player.event_manager()
+        for event_type, state in PLAYER_EVENTS.items():
+            manager.event_attach(event_type, self._on_player_event, info, state)
+
+        if self.pcm_mixer:
+            info['pcm_callbacks'] = self.pcm_mixer.attach(player, lambda: self.player is player)
+        return player
+
+    def _on_player_event(self, event, info, state):
+        # Runs on libvlc's thread
+        if not info['opened']:
+            if state in FINAL_STATES:
+                return # Late news from the previous media
+            info['opened'] = True
+        if state == STATE_ENDED and info['timeshift']:
+            # A live ring only runs dry when its capture dropped: a failure
+            # like any other, retried with backoff
+            state = STATE_ERROR
+        if state == STATE_BUFFERING:
+            try:
+                info['buffering'] = event.u.new_cache
+            except AttributeError:
+                pass
+            # Buffering events keep firing while playing, don't downgrade
+            if info['state'] == STATE_PLAYING:
+                return
+        if state == STATE_PLAYING:
+            info['mute_pending'] = True
+            info['failures'] = 0
+            # First audio: closes the tune span opened by play()
+            span = info.pop('tune_span', None)
+            if span:
+                span.end()
+        elif state == STATE_ERROR:
+            info['failures'] += 1
+            info['retry_at'] = time.monotonic() + min(RETRY_MAX_DELAY, RETRY_DELAY * 2 ** (info['failures'] - 1))
+            span = info.pop('tune_span', None)
+            if span:
+                span.end(status='error')
+        info['state'] = state
+
+    def _on_meta_changed(self, event, info):
+        info['meta_dirty'] = True
+
+    def _set_media(self, player, url, media=None, opened_url=None):
+        info = self._info[id(player)]
+        if media is None:
+            opened_url = opened_url or self._resolve(url)
+            media = self.instance.media_new(opened_url)
+        else:
+            opened_url = None
+        media.event_manager().event_attach(vlc.EventType.MediaMetaChanged, self._on_meta_changed, info)
+        player.set_media(media)
+        info['url'] = url
+        info['opened_url'] = opened_url
+        info['state'] = STATE_OPENING
+        info['opened'] = False
+        info['timeshift'] = media is not None
+        info['failures'] = 0
+        info['retry_at'] = 0.0
+        info['buffering'] = 0.0
+        info['meta_dirty'] = False
+
+    def _release(self, player, timeshift=None):
+        manager = player.event_manager()
+        for event_type in PLAYER_EVENTS:
+            manager.event_detach(event_type)
+        # The info rides along to keep the PCM callbacks alive until the
+        # player is stopped, and the ring it reads from stays open until then
+        self._released.put((player, self._info.pop(id(player), None), timeshift))
+
+    def _release_loop(self):
+        while True:
+            item = self._released.get()
+            if item is None:
+                return
+            player, _info, timeshift = item
+            if timeshift:
+                # First, so a read callback waiting on the ring returns
+                # and libvlc's stop() isn't held up by it
+                timeshift.close()
+            try:
+                player.stop()
+                player.release()
+            except Exception as e:
+                print(f"StreamPlayer: Error releasing a player: {e}")
+
     def play(self, url):
         """
-        Plays the given URL. 
+        Plays the given URL.
         Stops previous stream automatically.
         """
         if not url: return
 
+        if self.suspended:
+            # Just move the hint; opened once it's audible
+            self.current_url = url
+            return
+
         # Optimization: If already playing this URL, do nothing
         if self.current_url == url:
-             if not self.player.is_playing():
-                 # Valid states to resume/play from
-                 state = self.player.get_state()
-                 active_states = {vlc.State.Opening, vlc.State.Buffering, vlc.State.Playing}
-                 if state not in active_states:
-                     self.player.play()
+             # Resume only from settled states, read from the event cache,
+             # and back off from a station that keeps failing
+             info = self._info[id(self.player)]
+             if self.state not in ACTIVE_STATES and time.monotonic() >= info['retry_at']:
+                 info['state'] = STATE_OPENING
+                 info['opened'] = False
+                 self.player.play()
              return
 
+        # Warm standby hit: swap players instead of opening a new connection
+        if url in self._standby:
+            span = tracer.start_span('tune', url=url, standby=True)
+            self._swap_in(url)
+            info = self._info[id(self.player)]
+            span.set(host=urlsplit(info['opened_url'] or url).netloc)
+            if info['state'] == STATE_PLAYING:
+                span.end()
+            else:
+                info['tune_span'] = span
+            return
+
         # New URL
-        self.stop()
-        
+        self.stop(keep_standby=True)
+
         try:
             print(f"StreamPlayer: Playing {url}")
-            media = self.instance.media_new(url)
-            self.player.set_media(media)
-            self.player.audio_set_volume(0) # Start silent
+            span = tracer.start_span('tune', url=url, standby=False)
+            media = None
+            opened_url = self._resolve(url)
+            if self.timeshift_seconds and url not in self._direct_urls and self._capturable(url, opened_url):
+                self.timeshift = TimeShift(opened_url, self.timeshift_seconds)
+                media = self.timeshift.new_media(self.instance)
+            self._set_media(self.player, url, media, opened_url)
+            info = self._info[id(self.player)]
+            span.set(host=urlsplit(info['opened_url'] or url).netloc, timeshift=bool(self.timeshift))
+            info['tune_span'] = span
+            if not self.pcm_mixer:
+                self.player.audio_set_volume(0) # Start silent
             self.player.play()
             self.current_url = url
+            self.now_playing = "Unknown"
             # Reset volume tracking so next set_volume works effectively
             self._last_set_volume = 0
-            
+
         except Exception as e:
             print(f"Error creating stream for {url}: {e}")
 
     def set_volume(self, volume):
         """
-        Sets volume for the current stream. 
+        Sets volume for the current stream.
         Volume 0.0 to 1.0.
         """
+        self._volume = max(0.0, min(1.0, volume))
+        if self.suspended and self._volume > 0:
+            self._resume()
+
+        if self.pcm_mixer:
+            # Gain is applied per sample in the mixer, the player stays at 100%
+            self.pcm_mixer.set_station_gain(volume)
+            return
+
         vol = int(max(0.0, min(1.0, volume)) * 100)
-        
+
         # Optimization: Don't spam VLC if volume hasn't effectively changed
         if hasattr(self, '_last_set_volume') and self._last_set_volume == vol:
             return
-            
+
         self._last_set_volume = vol
 
         # Use mute for 0
@@ -62,49 +310,330 @@ class StreamPlayer:
         else:
             if self.player.audio_get_mute():
                 self.player.audio_set_mute(False)
-            
+
             # Update only if changed (double check against VLC internal state occasionally?)
             # Actually trusting our cache is better for perf, VLC calls are C-types overhead.
             if self.player.audio_get_volume() != vol:
                 self.player.audio_set_volume(vol)
 
-    def stop(self):
+    def _capturable(self, url, opened_url):
         """
-        Stops playback.
+        Whether opened_url is a plain audio stream the time-shift ring can
+        capture. HLS and .pls/.m3u playlists must be opened by libvlc
+        directly, and until the resolver has seen a station we can't tell.
         """
-        self.player.stop()
+        content_type = None
+        if self.resolver:
+            entry = self.resolver.get_info(url)
+            if not entry:
+                return False
+            content_type = entry.get('content_type') or None
+        if is_hls(opened_url, content_type) or content_type in PLAYLIST_TYPES:
+            return False
+        if content_type and not (content_type.startswith('audio/') or content_type == 'application/ogg'):
+            return False
+        return not opened_url.lower().split('?')[0].endswith(PLAYLIST_EXTENSIONS)
+
+    def _mute(self, player):
+        # With the PCM mixer libvlc's volume must stay at 100%: its software
+        # gain is applied before the audio callbacks, and the mixer already
+        # ignores players that aren't the active one
+        if not self.pcm_mixer:
+            player.audio_set_mute(True)
+
+    def _resolve(self, url):
+        if self.resolver:
+            return self.resolver.lookup(url)
+        return url
+
+    def _swap_in(self, url):
+        standby_player = self._standby.pop(url)
+
+        previous_player = self.player
+        previous_url = self.current_url
+        span = self._info[id(previous_player)].pop('tune_span', None)
+        if span:
+            span.end(status='cancelled')
+
+        self.player = standby_player
+        self.current_url = url
+        if self.pcm_mixer:
+            # Drop what the previous station had already decoded
+            self.pcm_mixer.flush()
+        self._info[id(self.player)]['mute_pending'] = False
+        self._info[id(self.player)]['meta_dirty'] = True
+        self.now_playing = "Unknown"
+        # Keep it silent until the mixer sets the real volume
+        self._mute(self.player)
+        self._last_set_volume = 0
+        print(f"StreamPlayer: Swapped in warm stream {url}")
+
+        # The station we just left is now a neighbor, keep it warm
+        if previous_url and previous_url not in self._standby:
+            self._mute(previous_player)
+            self._standby[previous_url] = previous_player
+            self._evict_standby()
+        else:
+            self._release(previous_player)
+
+    def prefetch(self, urls):
+        """
+        Warms muted standby players for the given URLs, most relevant first.
+        Only the first max_standby URLs are kept open.
+        """
+        # Warm players would bypass the time-shift capture
+        if self.timeshift_seconds:
+            return
+
+        self._prefetch_urls = list(urls)
+        if self.suspended:
+            # Asked for new neighbors: someone is turning the dial
+            self._resume(prefetch=False)
+
+        wanted = [u for u in urls if u and u != self.current_url][:self.max_standby]
+
+        # Touch in reverse so the most relevant ends up most recent
+        for url in reversed(wanted):
+            if url in self._standby:
+                self._standby.move_to_end(url)
+                continue
+            if is_hls(url) and not self._audio_only_known(url):
+                # Don't warm a full video stream, wait for the audio rendition
+                continue
+            try:
+                player = self._new_player()
+                self._set_media(player, url)
+                self._mute(player)
+                if not self.pcm_mixer:
+                    player.audio_set_volume(0)
+                player.play()
+                self._standby[url] = player
+            except Exception as e:
+                print(f"Error warming stream {url}: {e}")
+
+        self._evict_standby()
+
+    def _evict_standby(self):
+        while len(self._standby) > self.max_standby:
+            _, player = self._standby.popitem(last=False)
+            self._release(player)
+
+    def stop(self, keep_standby=False):
+        """
+        Stops playback, and releases the standby players unless keep_standby
+        (between stations they're the dial's neighbors). Never blocks: the
+        stream is handed to the releaser and a fresh player takes its place.
+        """
+        if not keep_standby:
+            self.cleanup_except([])
         self.current_url = None
+        info = self._info[id(self.player)]
+        if info['state'] in (STATE_IDLE, STATE_STOPPED) and not self.timeshift:
+            return # Already stopped, the controller calls this every frame between stations
+
+        span = info.pop('tune_span', None)
+        if span:
+            # Tuned away before any audio
+            span.end(status='cancelled')
+        player, timeshift = self.player, self.timeshift
+        self.player = self._new_player()
+        self._info[id(self.player)]['state'] = STATE_STOPPED
+        self.timeshift = None
+        self._release(player, timeshift)
+        if self.pcm_mixer:
+            self.pcm_mixer.flush()
+
+    def _suspend(self):
+        print(f"StreamPlayer: Silent for {self.suspend_after}s, releasing streams")
+        url = self.current_url
+        self.stop()
+        self.current_url = url
+        self.suspended = True
+
+    def _resume(self, prefetch=True):
+        self.suspended = False
+        self._silent_since = None
+        url, self.current_url = self.current_url, None
+        if url:
+            print(f"StreamPlayer: Resuming {url}")
+            self.play(url)
+        if prefetch:
+            self.prefetch(self._prefetch_urls)
+
+    def toggle_pause(self):
+        """
+        Pauses or resumes the time-shifted stream. Capture keeps running.
+        Returns True if now paused.
+        """
+        if not self.timeshift:
+            return False
+        paused = self.state != STATE_PAUSED
+        self.player.set_pause(1 if paused else 0)
+        self._info[id(self.player)]['state'] = STATE_PAUSED if paused else STATE_PLAYING
+        return paused
+
+    def rewind(self, seconds):
+        """
+        Jumps back (negative seconds goes forward) within the time-shift buffer.
+        """
+        if not self.timeshift:
+            return
+        self.timeshift.seek_relative(-seconds)
+        self._restart_timeshift()
+
+    def go_live(self):
+        if not self.timeshift:
+            return
+        self.timeshift.go_live()
+        self._restart_timeshift()
+
+    def seconds_behind_live(self):
+        if not self.timeshift:
+            return 0.0
+        return self.timeshift.behind_live()
+
+    def _play_direct(self):
+        # The capture gave up reconnecting: play the station straight from
+        # its URL, without rewind, rather than leave it silent
+        url = self.current_url
+        print(f"StreamPlayer: Time-shift capture failed for {url}, playing it directly")
+        self._direct_urls.add(url)
+        self.stop(keep_standby=True)
+        self.play(url)
+
+    def _restart_timeshift(self):
+        # Drop libvlc's own buffered audio so the new cursor is heard at once
+        self.player.stop()
+        self._set_media(self.player, self.current_url, self.timeshift.new_media(self.instance))
+        self.player.play()
+        self._last_set_volume = None
+
+    def shutdown(self):
+        """
+        Stops playback and releases every standby player.
+        """
+        self.stop()
+        self._release(self.player)
+        self._released.put(None)
+        self._releaser.join(timeout=RELEASE_TIMEOUT)
 
     def is_playing(self):
-        return self.player.is_playing()
+        return self.state == STATE_PLAYING
 
     def get_now_playing(self):
         """
         Returns the current metadata (Now Playing) if available.
+        Served from the cache refreshed on MetaChanged.
         """
-        if not self.player.get_media():
+        return self.now_playing
+
+    def _read_now_playing(self, player):
+        media = player.get_media()
+        if not media:
             return "Unknown"
-            
-        media = self.player.get_media()
-        # vlc.Meta.NowPlaying is enum 12
-        now_playing = media.get_meta(12) 
+
+        now_playing = media.get_meta(vlc.Meta.NowPlaying)
         if now_playing:
             return now_playing
-            
+
         # Fallback to Title/Artist
-        title = media.get_meta(0) # Title
-        artist = media.get_meta(1) # Artist
-        
+        title = media.get_meta(vlc.Meta.Title)
+        artist = media.get_meta(vlc.Meta.Artist)
+
         if title and artist:
             return f"{artist} - {title}"
         if title:
             return title
-            
+
         return "Unknown"
 
     def update(self):
-        pass
-    
-    # Helper for legacy calls if any
+        """
+        Applies whatever the event thread flagged since the last frame.
+        Costs nothing when no events arrived.
+        """
+        self._check_idle()
+        if self.timeshift and self.timeshift.capture.failed:
+            self._play_direct()
+        info = self._info[id(self.player)]
+
+        self._upgrade_to_audio_only(info)
+
+        if info['meta_dirty']:
+            info['meta_dirty'] = False
+            self.now_playing = self._read_now_playing(self.player)
+            if self.on_meta_change and self.now_playing != "Unknown":
+                self.on_meta_change(self.current_url, self.now_playing)
+
+        state = info['state']
+        if state != self._reported_state:
+            self._reported_state = state
+            if self.on_state_change:
+                self.on_state_change(self.current_url, state)
+            if state == STATE_ERROR and self.resolver:
+                # The cached endpoint may be an expired tokenized redirect
+                self.resolver.invalidate(self.current_url)
+            if state == STATE_ERROR and self.on_error and info['failures'] <= 1:
+                # Once per station, not on every retry
+                self.on_error(self.current_url)
+        if state == STATE_BUFFERING and self.on_buffering:
+            self.on_buffering(self.current_url, info['buffering'])
+
+        # libvlc resets mute when the audio output starts, so re-apply it
+        # once per standby player after its Playing event.
+        for url, player in self._standby.items():
+            standby_info = self._info[id(player)]
+            if standby_info['mute_pending']:
+                standby_info['mute_pending'] = False
+                self._mute(player)
+            if standby_info['meta_dirty']:
+                standby_info['meta_dirty'] = False
+                title = self._read_now_playing(player)
+                if self.on_meta_change and title != "Unknown":
+                    self.on_meta_change(url, title)
+
+    def _check_idle(self):
+        if not self.suspend_after or self.suspended:
+            return
+        if self.current_url and self._volume > 0:
+            self._silent_since = None
+            return
+        now = time.monotonic()
+        if self._silent_since is None:
+            self._silent_since = now
+        elif now - self._silent_since >= self.suspend_after:
+            self._suspend()
+
+    def _audio_only_known(self, url):
+        if not self.resolver:
+            return False
+        # Runs every frame, so it mustn't count towards the hit rate
+        entry = self.resolver.peek(url)
+        if entry is None:
+            self.resolver.schedule(url)
+        return bool(entry and entry.get('audio_only'))
+
+    def _upgrade_to_audio_only(self, info):
+        """
+        First plays of an HLS channel open the master playlist (video and all)
+        because the resolver hasn't answered yet. Once it has found an
+        audio-only rendition, reopen on that so video segments stop downloading.
+        """
+        if self.suspended or not self.resolver or not self.current_url or info['opened_url'] is None:
+            return
+        entry = self.resolver.peek(self.current_url)
+        if not entry or not entry.get('audio_only') or entry['final_url'] == info['opened_url']:
+            return
+
+        print(f"StreamPlayer: Switching to audio-only rendition {entry['final_url']}")
+        self._set_media(self.player, self.current_url)
+        self.player.play()
+        self._last_set_volume = None
+
     def cleanup_except(self, keep_urls):
-        pass
+        """
+        Releases standby players whose URL is not in keep_urls.
+        """
+        for url in list(self._standby.keys()):
+            if url not in keep_urls:
+                self._release(self._standby.pop(url))
@@ -0,0 +1,204 @@
+import json
+import time
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Icy-MetaData': '1',
+}
+
+BLOCKLIST_FILE = "dead_stations.json"
+# Failed probes in a row before a station is blocked, so one network
+# hiccup doesn't hide it for good
+BLOCK_AFTER_FAILURES = 2
+# Blocked stations get another chance this long after their last failure
+BLOCK_TTL = 7 * 24 * 3600
+
+def _abort(response):
+    # close() alone doesn't wake a thread blocked in recv(), a shutdown of
+    # the connection does, so the read fails however slowly data trickles.
+    # http.client may already have dropped its socket object and only the
+    # reader still holds the descriptor, hence going through the fd.
+    try:
+        fd = response.raw._fp.fp.fileno()
+        with socket.fromfd(fd, socket.AF_INET, socket.SOCK_STREAM) as sock:
+            sock.shutdown(socket.SHUT_RDWR)
+    except (AttributeError, ValueError, OSError):
+        pass
+    response.close()
+
+def probe_url(url, deadline=8.0, sample_seconds=3.0, session=None):
+    """
+    Probes a single stream URL. Never raises.
+    Returns a dict with status, headers, content type, first-byte latency
+    and sustained throughput measured over sample_seconds.
+    """
+    result = {
+        'url': url,
+        'ok': False,
+        'status': None,
+        'error': None,
+        'content_type': None,
+        'headers': {},
+        'first_byte_ms': None,
+        'throughput_kbps': None,
+        'bytes': 0,
+        'elapsed_ms': None,
+        'checked_at': int(time.time()),
+    }
+    start = time.time()
+    getter = session.get if session else requests.get
+    timer = None
+    expired = threading.Event()
+
+    try:
+        # Connect + response headers fit in the deadline; requests' read
+        # timeout is per socket read though, so the body is cut by a timer
+        connect_timeout = min(deadline / 2, 4.0)
+        response = getter(url, stream=True, headers=HEADERS, timeout=(connect_timeout, deadline - connect_timeout))
+        result['status'] = response.status_code
+        result['headers'] = dict(response.headers)
+        result['content_type'] = response.headers.get('Content-Type')
+
+        if response.status_code >= 400:
+            result['error'] = f"HTTP {response.status_code}"
+            response.close()
+            return result
+
+        def expire():
+            expired.set()
+            _abort(response)
+        timer = threading.Timer(max(0.0, deadline - (time.time() - start)), expire)
+        timer.daemon = True
+        timer.start()
+
+        first_byte_at = None
+        total = 0
+        try:
+            for chunk in response.iter_content(chunk_size=4096):
+                now = time.time()
+                if first_byte_at is None:
+                    first_byte_at = now
+                    result['first_byte_ms'] = round((now - start) * 1000)
+                total += len(chunk)
+                if now - first_byte_at >= sample_seconds or now - start >= deadline:
+                    break
+        except Exception:
+            if not expired.is_set():
+                raise
+        response.close()
+
+        result['bytes'] = total
+        if first_byte_at is not None:
+            window = max(time.time() - first_byte_at, 0.001)
+            result['throughput_kbps'] = round(total * 8 / 1000 / window, 1)
+        result['ok'] = total > 0
+        if not result['ok']:
+            result['error'] = "Deadline exceeded" if expired.is_set() else "Empty body"
+    except requests.RequestException as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+    except Exception as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+    finally:
+        if timer:
+            timer.cancel()
+
+    result['elapsed_ms'] = round((time.time() - start) * 1000)
+    return result
+
+def probe_many(targets, workers=32, deadline=8.0, sample_seconds=3.0):
+    """
+    Probes many stations concurrently with a bounded pool.
+    targets is an iterable of URLs or station dicts (with 'url_resolved').
+    Yields (target, result) as probes finish.
+    """
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {}
+        for target in targets:
+            url = target.get('url_resolved') if isinstance(target, dict) else target
+            if not url:
+                continue
+            futures[pool.submit(probe_url, url, deadline, sample_seconds, session)] = target
+
+        for future in as_completed(futures):
+            target = futures[future]
+            result = future.result()
+            if isinstance(target, dict):
+                result['name'] = target.get('name')
+                result['stationuuid'] = target.get('stationuuid')
+            yield target, result
+
+    session.close()
+
+def write_jsonl(results, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        for result in results:
+            f.write(json.dumps(result) + "\n")
+
+def _failures(existing, kind, legacy_key):
+    failures = {k: list(v) for k, v in existing.get(kind, {}).items()}
+    if kind not in existing:
+        # Files from before failures were counted: keep their entries blocked
+        for key in existing.get(legacy_key, []):
+            failures[key] = [BLOCK_AFTER_FAILURES, existing.get('generated_at', 0)]
+    return failures
+
+def _blocked(failures, now):
+    return sorted(k for k, (count, last) in failures.items()
+                  if count >= BLOCK_AFTER_FAILURES and now - last < BLOCK_TTL)
+
+def build_blocklist(results, existing=None, now=None):
+    """
+    Returns blocklist data from probe results. Each failed probe counts
+    against a station and an answer clears it; a station is blocked after
+    BLOCK_AFTER_FAILURES failures in a row, for BLOCK_TTL.
+    """
+    now = now or int(time.time())
+    existing = existing or {}
+    url_failures = _failures(existing, 'url_failures', 'urls')
+    uuid_failures = _failures(existing, 'uuid_failures', 'stationuuids')
+
+    for result in results:
+        uuid = result.get('stationuuid')
+        if result['ok']:
+            url_failures.pop(result['url'], None)
+            if uuid:
+                uuid_failures.pop(uuid, None)
+            continue
+        checked_at = result.get('checked_at', now)
+        for failures, key in ((url_failures, result['url']), (uuid_failures, uuid)):
+            if key:
+                count = failures.get(key, [0, 0])[0]
+                failures[key] = [count + 1, checked_at]
+
+    # Forget stations that haven't failed in a long time
+    for failures in (url_failures, uuid_failures):
+        for key in [k for k, (_, last) in failures.items() if now - last >= BLOCK_TTL]:
+            del failures[key]
+
+    return {
+        'generated_at': now,
+        'urls': _blocked(url_failures, now),
+        'stationuuids': _blocked(uuid_failures, now),
+        'url_failures': url_failures,
+        'uuid_failures': uuid_failures,
+    }
+
+def blocked_entries(data, now=None):
+    """
+    (urls, stationuuids) blocked right now by saved blocklist data, with
+    expired entries left out.
+    """
+    now = now or int(time.time())
+    if 'url_failures' not in data:
+        return set(data.get('urls', [])), set(data.get('stationuuids', []))
+    return set(_blocked(data['url_failures'], now)), set(_blocked(data.get('uuid_failures', {}), now))
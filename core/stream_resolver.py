@@ -0,0 +1,251 @@
+import time
+import queue
+import threading
+from urllib.parse import urljoin
+
+import requests
+
+from .hls import is_hls, select_audio_rendition
+
+PLAYLIST_TYPES = {
+    'audio/x-scpls': 'pls',
+    'audio/scpls': 'pls',
+    'audio/x-mpegurl': 'm3u',
+    'audio/mpegurl': 'm3u',
+    'application/x-mpegurl': 'm3u',
+}
+
+CODECS = {
+    'audio/mpeg': 'MP3',
+    'audio/mp3': 'MP3',
+    'audio/aac': 'AAC',
+    'audio/aacp': 'AAC+',
+    'audio/x-aac': 'AAC',
+    'audio/ogg': 'OGG',
+    'application/ogg': 'OGG',
+    'audio/opus': 'OPUS',
+    'audio/flac': 'FLAC',
+    'application/vnd.apple.mpegurl': 'HLS',
+    'application/x-mpegurl': 'HLS',
+}
+
+class StreamResolver:
+    """
+    Follows redirects and .pls/.m3u playlists in the background and caches
+    the final stream endpoint per station URL, so the player can open it
+    directly. HLS master playlists resolve to their audio-only rendition.
+    """
+    def __init__(self, config_manager=None, ttl=24 * 3600, cache_file="stream_cache.json"):
+        self.config_manager = config_manager
+        self.ttl = ttl
+        self.cache_file = cache_file
+        self.headers = {'User-Agent': 'InternetAnalogRadio/1.0'}
+
+        self.cache = {}
+        if self.config_manager:
+            self.cache = self.config_manager.load_json(self.cache_file, {})
+
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'resolved': 0,
+            'failures': 0,
+            'saved_seconds': 0.0, # Redirect/playlist overhead skipped on hits
+        }
+
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._queued = set()
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._resolve_loop, daemon=True)
+        self._worker.start()
+
+    def lookup(self, url):
+        """
+        Returns the cached final endpoint for url, or url itself on a miss.
+        Misses and stale entries are scheduled for background resolution.
+        """
+        if not url:
+            return url
+
+        with self._lock:
+            entry = self._fresh(url)
+            if entry:
+                self.stats['hits'] += 1
+                self.stats['saved_seconds'] += entry.get('overhead', 0.0)
+            else:
+                self.stats['misses'] += 1
+
+        if not entry:
+            # Stale endpoints are often expired tokens, replay the chain instead
+            self.schedule(url)
+            return url
+        return entry.get('final_url') or url
+
+    def peek(self, url):
+        """
+        The fresh cache entry for url or None, without counting towards
+        the hit rate or scheduling anything.
+        """
+        with self._lock:
+            return self._fresh(url)
+
+    def _fresh(self, url):
+        entry = self.cache.get(url)
+        if entry and (time.time() - entry.get('resolved_at', 0)) < self.ttl:
+            return entry
+        return None
+
+    def invalidate(self, url):
+        """
+        Forgets url's endpoint, e.g. when the player couldn't open it, and
+        resolves it again.
+        """
+        with self._lock:
+            if self.cache.pop(url, None) is None:
+                return
+            self._dirty = True
+        self.schedule(url)
+
+    def get_info(self, url):
+        with self._lock:
+            return self.cache.get(url)
+
+    def schedule(self, url):
+        with self._lock:
+            if url in self._queued:
+                return
+            self._queued.add(url)
+        self._queue.put(url)
+
+    def hit_rate(self):
+        total = self.stats['hits'] + self.stats['misses']
+        return self.stats['hits'] / total if total else 0.0
+
+    def _resolve_loop(self):
+        while True:
+            try:
+                url = self._queue.get(timeout=1.0)
+            except queue.Empty:
+                # Persist once the queue drains instead of after every entry
+                if self._dirty:
+                    self._save()
+                continue
+
+            entry = self.resolve(url)
+            with self._lock:
+                self._queued.discard(url)
+                if entry:
+                    self.cache[url] = entry
+                    self.stats['resolved'] += 1
+                    self._dirty = True
+                else:
+                    self.stats['failures'] += 1
+
+    def _save(self):
+        with self._lock:
+            self._dirty = False
+            snapshot = dict(self.cache)
+        if self.config_manager:
+            self.config_manager.save_json(self.cache_file, snapshot)
+
+    def resolve(self, url, max_depth=3):
+        """
+        Resolves url synchronously. Returns a cache entry dict or None.
+        """
+        start = time.time()
+        current = url
+        hops = 0
+
+        for _ in range(max_depth + 1):
+            try:
+                request_start = time.time()
+                response = requests.get(current, stream=True, timeout=5, headers=self.headers)
+                response.raise_for_status()
+                hops += len(response.history)
+                final = response.url
+                content_type = response.headers.get('Content-Type', '').split(';')[0].strip().lower()
+
+                if is_hls(final, content_type):
+                    body = response.content.decode('utf-8', errors='ignore')
+                    ttfb = time.time() - request_start
+                    response.close()
+                    return self._hls_entry(body, final, content_type, hops, start, ttfb)
+
+                playlist_kind = PLAYLIST_TYPES.get(content_type)
+                lower = final.lower().split('?')[0]
+                if not playlist_kind and lower.endswith('.pls'):
+                    playlist_kind = 'pls'
+                elif not playlist_kind and lower.endswith('.m3u'):
+                    playlist_kind = 'm3u'
+
+                if playlist_kind:
+                    # Playlists are small, read them whole
+                    body = response.content.decode('utf-8', errors='ignore')
+                    ttfb = time.time() - request_start
+                    response.close()
+                    if playlist_kind == 'm3u' and '#EXT-X-' in body:
+                        # HLS served as an m3u type: its entries are
+                        # variants or segments, not a stream to follow
+                        return self._hls_entry(body, final, content_type, hops, start, ttfb)
+                    target = self._first_playlist_entry(body, playlist_kind)
+                    if not target:
+                        return None
+                    current = urljoin(final, target)
+                    hops += 1
+                    continue
+
+                # Time to first byte of the real stream
+                for _chunk in response.iter_content(chunk_size=1):
+                    break
+                ttfb = time.time() - request_start
+                codec = CODECS.get(content_type) or response.headers.get('icy-codec')
+                response.close()
+
+                return {
+                    'final_url': final,
+                    'content_type': content_type,
+                    'codec': codec,
+                    'bitrate': response.headers.get('icy-br'),
+                    'ttfb': round(ttfb, 3),
+                    'hops': hops,
+                    'overhead': round(max(0.0, (time.time() - start) - ttfb), 3),
+                    'resolved_at': time.time(),
+                }
+            except (requests.RequestException, ValueError) as e:
+                print(f"Resolver: failed for {current}: {e}")
+                return None
+
+        return None
+
+    def _hls_entry(self, body, final, content_type, hops, start, ttfb):
+        # Master playlists: keep only the audio (or the cheapest variant)
+        choice = select_audio_rendition(body, final)
+        entry = {
+            'final_url': final,
+            'content_type': content_type,
+            'codec': 'HLS',
+            'bitrate': None,
+            'ttfb': round(ttfb, 3),
+            'hops': hops,
+            'audio_only': False,
+            'overhead': round(max(0.0, (time.time() - start) - ttfb), 3),
+            'resolved_at': time.time(),
+        }
+        if choice:
+            entry['final_url'], entry['audio_only'], bandwidth = choice
+            entry['bitrate'] = bandwidth // 1000 if bandwidth else None
+            entry['hops'] += 1
+        return entry
+
+    def _first_playlist_entry(self, body, kind):
+        for line in body.splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            if kind == 'pls':
+                if line.lower().startswith('file') and '=' in line:
+                    return line.split('=', 1)[1].strip()
+            elif not line.startswith('#'):
+                return line
+        return None
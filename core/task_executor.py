@@ -0,0 +1,110 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+class Task:
+    """
+    Handle for one submitted job. Work is cancelled cooperatively: the job
+    checks .cancelled between slow steps and publishes its result through
+    commit(), which refuses once a newer task has taken over the key.
+    """
+    def __init__(self, executor, key, group=None):
+        self.executor = executor
+        self.key = key
+        self.group = group
+        self.future = None
+        self._cancelled = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        self._cancelled.set()
+        if self.future:
+            self.future.cancel() # Only succeeds while still queued
+
+    def done(self):
+        return self.future is not None and self.future.done()
+
+    def commit(self, fn, *args):
+        """
+        Runs fn(*args) only if this task is still current for its key.
+        Commits are serialized, so a task that took over later also commits
+        later; submit() isn't held up meanwhile. Returns True if fn ran.
+        """
+        with self.executor._commit_lock:
+            with self.executor._lock:
+                if self.cancelled or self.executor._tasks.get(self.key) is not self:
+                    return False
+            fn(*args)
+            return True
+
+class TaskExecutor:
+    """
+    Shared, bounded pool for background fetches. Tasks are keyed:
+    submitting a key that's already in flight joins the running task
+    (single-flight), or with supersede=True cancels it and starts over.
+    Tasks in a group cancel the group's in-flight tasks with other keys,
+    e.g. one search per query, where only the newest query matters.
+    """
+    def __init__(self, max_workers=4):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="task")
+        self._lock = threading.Lock()
+        self._commit_lock = threading.Lock()
+        self._tasks = {} # key -> latest Task
+        self._closed = False
+
+    def submit(self, key, fn, *args, supersede=False, group=None, **kwargs):
+        """
+        Runs fn(task, *args, **kwargs) on the pool. Returns the Task, which
+        may be an existing one for the same key. Returns None after shutdown.
+        """
+        with self._lock:
+            if self._closed:
+                return None
+            current = self._tasks.get(key)
+            if current and not current.done():
+                if not supersede:
+                    return current
+                current.cancel()
+            if group is not None:
+                for other in self._tasks.values():
+                    if other.group == group and other.key != key and not other.done():
+                        other.cancel()
+
+            task = Task(self, key, group)
+            self._tasks[key] = task
+            task.future = self._pool.submit(self._run, task, fn, args, kwargs)
+            return task
+
+    def _run(self, task, fn, args, kwargs):
+        if task.cancelled:
+            return None
+        try:
+            return fn(task, *args, **kwargs)
+        except Exception as e:
+            print(f"Task {task.key!r} failed: {e}")
+            return None
+        finally:
+            with self._lock:
+                if self._tasks.get(task.key) is task:
+                    del self._tasks[task.key]
+
+    def cancel(self, key):
+        with self._lock:
+            task = self._tasks.pop(key, None)
+        if task:
+            task.cancel()
+
+    def in_flight(self):
+        with self._lock:
+            return [key for key, task in self._tasks.items() if not task.done()]
+
+    def shutdown(self, wait=False):
+        with self._lock:
+            self._closed = True
+            tasks = list(self._tasks.values())
+            self._tasks.clear()
+        for task in tasks:
+            task.cancel()
+        self._pool.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,214 @@
+import os
+import mmap
+import time
+import ctypes
+import tempfile
+import threading
+
+import requests
+import vlc
+
+# Seconds before the capture reconnects after its stream failed or ended,
+# doubled on every failure in a row up to the max
+CAPTURE_RETRY_DELAY = 1.0
+CAPTURE_MAX_DELAY = 30.0
+# Failures in a row before the capture gives up and sets failed
+CAPTURE_MAX_FAILURES = 5
+
+class RingBuffer:
+    """
+    Fixed-size memory-mapped ring file addressed by absolute byte position.
+    Holds the most recent `size` bytes written, no matter how long it runs.
+    """
+    def __init__(self, size, path=None):
+        self.size = size
+        if path is None:
+            fd, path = tempfile.mkstemp(prefix="timeshift_", suffix=".ring")
+            os.close(fd)
+        self.path = path
+
+        self._file = open(path, 'w+b')
+        self._file.truncate(size)
+        self._map = mmap.mmap(self._file.fileno(), size)
+
+        self.written = 0 # Absolute position of the live edge
+        self._cond = threading.Condition()
+        self.closed = False
+
+    @property
+    def oldest(self):
+        return max(0, self.written - self.size)
+
+    def write(self, data):
+        view = memoryview(data)
+        # Anything older than one full lap would be overwritten anyway
+        if len(view) > self.size:
+            skipped = len(view) - self.size
+            view = view[skipped:]
+        else:
+            skipped = 0
+
+        with self._cond:
+            if self.closed:
+                return
+            pos = (self.written + skipped) % self.size
+            first = min(len(view), self.size - pos)
+            self._map[pos:pos + first] = view[:first]
+            if first < len(view):
+                self._map[0:len(view) - first] = view[first:]
+            self.written += skipped + len(view)
+            self._cond.notify_all()
+
+    def read(self, position, length, timeout=1.0):
+        """
+        Reads up to length bytes starting at absolute position.
+        Blocks up to timeout at the live edge. Returns (data, position_read_from),
+        the position is clamped forward if it already fell out of the buffer.
+        """
+        with self._cond:
+            if position >= self.written and not self.closed:
+                self._cond.wait(timeout)
+            if self.closed:
+                return b"", position
+            position = max(position, self.oldest)
+            available = self.written - position
+            if available <= 0:
+                return b"", position
+
+            length = min(length, available)
+            pos = position % self.size
+            first = min(length, self.size - pos)
+            data = self._map[pos:pos + first]
+            if first < length:
+                data += self._map[0:length - first]
+            return data, position
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+            self._map.close()
+            self._file.close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+class StreamCapture:
+    """
+    Tees a compressed HTTP stream into a RingBuffer on a background thread
+    and tracks the average byte rate so seconds can be mapped to bytes.
+    Reconnects when the stream drops; failed is set once it gives up.
+    """
+    def __init__(self, url, ring, fallback_kbps=128):
+        self.url = url
+        self.ring = ring
+        self.fallback_kbps = fallback_kbps
+        self.error = None
+        self.failed = False
+        self._started_at = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._capture_loop, daemon=True)
+        self._thread.start()
+
+    def _capture_loop(self):
+        failures = 0
+        while not self._stop.is_set():
+            try:
+                # No Icy-MetaData header: keep the ring pure audio frames
+                with requests.get(self.url, stream=True, timeout=(5, 15),
+                                  headers={'User-Agent': 'InternetAnalogRadio/1.0'}) as response:
+                    response.raise_for_status()
+                    if self._started_at is None:
+                        self._started_at = time.time()
+                    for chunk in response.iter_content(chunk_size=16384):
+                        if self._stop.is_set():
+                            return
+                        if chunk:
+                            self.ring.write(chunk)
+                            failures = 0
+                self.error = "stream ended"
+            except requests.RequestException as e:
+                self.error = str(e)
+
+            failures += 1
+            if failures >= CAPTURE_MAX_FAILURES:
+                print(f"TimeShift: capture failed for {self.url}: {self.error}")
+                self.failed = True
+                return
+            delay = min(CAPTURE_MAX_DELAY, CAPTURE_RETRY_DELAY * 2 ** (failures - 1))
+            print(f"TimeShift: capture of {self.url} dropped ({self.error}), reconnecting in {delay:.0f}s")
+            self._stop.wait(delay)
+
+    def bytes_per_second(self):
+        if self._started_at:
+            elapsed = time.time() - self._started_at
+            if elapsed > 2.0 and self.ring.written:
+                return self.ring.written / elapsed
+        return self.fallback_kbps * 1000 / 8
+
+    def stop(self):
+        self._stop.set()
+
+class TimeShift:
+    """
+    Capture plus a read cursor that libvlc pulls from through media
+    callbacks. Going live, rewinding and pausing only move the cursor.
+    """
+    def __init__(self, url, seconds=600, max_kbps=320):
+        size = int(seconds * max_kbps * 1000 / 8)
+        self.ring = RingBuffer(size)
+        self.capture = StreamCapture(url, self.ring)
+        self.cursor = 0
+
+        # ctypes callbacks must stay referenced while libvlc holds them
+        self._callbacks = (
+            vlc.CallbackDecorators.MediaOpenCb(self._open),
+            vlc.CallbackDecorators.MediaReadCb(self._read),
+            vlc.CallbackDecorators.MediaCloseCb(self._close),
+        )
+
+    def new_media(self, instance):
+        open_cb, read_cb, close_cb = self._callbacks
+        # No seek callback: libvlc treats the stream as live/non-seekable
+        return instance.media_new_callbacks(open_cb, read_cb, None, close_cb, None)
+
+    def _open(self, opaque, datap, sizep):
+        sizep[0] = ctypes.c_uint64(-1).value # Unknown length
+        return 0
+
+    def _read(self, opaque, buf, length):
+        if self.ring.closed:
+            return 0 # EOF
+        data, position = self.ring.read(self.cursor, length)
+        if not data:
+            # Nothing yet; an empty read with -1 would abort playback
+            data, position = self.ring.read(self.cursor, length, timeout=5.0)
+            if not data:
+                return 0
+        ctypes.memmove(buf, data, len(data))
+        self.cursor = position + len(data)
+        return len(data)
+
+    def _close(self, opaque):
+        pass
+
+    def behind_live(self):
+        """
+        Seconds between the read cursor and the live edge.
+        """
+        return (self.ring.written - self.cursor) / self.capture.bytes_per_second()
+
+    def seek_relative(self, seconds):
+        """
+        Moves the cursor by seconds (negative rewinds), clamped to the buffer.
+        """
+        delta = int(seconds * self.capture.bytes_per_second())
+        self.cursor = max(self.ring.oldest, min(self.ring.written, self.cursor + delta))
+
+    def go_live(self):
+        self.cursor = self.ring.written
+
+    def close(self):
+        self.capture.stop()
+        self.ring.close()
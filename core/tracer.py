@@ -0,0 +1,231 @@
+import os
+import json
+import time
+import threading
+import statistics
+from contextlib import contextmanager
+
+class Span:
+    """
+    One timed operation. Use it as a context manager on the thread doing
+    the work (children opened inside are parented to it), or keep it and
+    call end() later, from any thread, for operations that outlive a call.
+    """
+    def __init__(self, tracer, name, parent, attrs):
+        self.tracer = tracer
+        self.name = name
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent.span_id if parent else None
+        self.trace_id = parent.trace_id if parent else self.span_id
+        self.attrs = attrs
+        self.start = time.time()
+        self._t0 = time.perf_counter()
+        self.duration = None
+        self._followers = [] # Spans ending along with this one
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def end(self, **attrs):
+        with self.tracer._lock:
+            if self.duration is not None:
+                return # Already ended, e.g. stopped and then errored
+            self.duration = time.perf_counter() - self._t0
+        self.attrs.update(attrs)
+        self.tracer._write(self)
+        for span in self._followers:
+            span.end(status=self.attrs.get('status', 'ok'))
+
+    def end_after(self, other):
+        """
+        Ends this span when other does, with its status. For a parent
+        whose outcome is decided by a child that outlives the call which
+        started it. Ends right away if other is None or already over.
+        """
+        if other is not None:
+            with self.tracer._lock:
+                if other.duration is None:
+                    other._followers.append(self)
+                    return
+        self.end(status=other.attrs.get('status', 'ok') if other is not None else 'ok')
+
+    def __enter__(self):
+        self.tracer._push(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.tracer._pop(self)
+        if exc_type:
+            self.set(status='error', error=str(exc))
+        self.end()
+        return False
+
+class _NullSpan:
+    span_id = None
+
+    def set(self, **attrs):
+        pass
+
+    def end(self, **attrs):
+        pass
+
+    def end_after(self, other):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+NULL_SPAN = _NullSpan()
+
+class Tracer:
+    """
+    Writes finished spans as JSON lines. Disabled (and free) until open()
+    is called, so modules can trace unconditionally.
+    """
+    def __init__(self):
+        self.path = None
+        # Traces started since open(), the trace file may hold older runs
+        self.trace_ids = set()
+        self._file = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @property
+    def enabled(self):
+        return self._file is not None
+
+    def open(self, path):
+        self.close()
+        self._file = open(path, 'a', encoding='utf-8')
+        self.path = path
+        self.trace_ids = set()
+
+    def close(self):
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+    def current(self):
+        stack = getattr(self._local, 'stack', None)
+        return stack[-1] if stack else None
+
+    def start_span(self, name, parent=None, **attrs):
+        """
+        Starts a span. parent defaults to the span active on this thread.
+        """
+        if not self.enabled:
+            return NULL_SPAN
+        if parent is None or parent is NULL_SPAN:
+            parent = self.current()
+        return Span(self, name, parent, attrs)
+
+    # Reads better in with-blocks
+    span = start_span
+
+    @contextmanager
+    def activate(self, span):
+        """
+        Makes span the parent of spans started on this thread inside the
+        block, without ending it on the way out.
+        """
+        if span is NULL_SPAN:
+            yield span
+            return
+        self._push(span)
+        try:
+            yield span
+        finally:
+            self._pop(span)
+
+    def _push(self, span):
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        self._local.stack.append(span)
+
+    def _pop(self, span):
+        stack = getattr(self._local, 'stack', [])
+        if stack and stack[-1] is span:
+            stack.pop()
+
+    def _write(self, span):
+        record = {
+            'trace': span.trace_id,
+            'span': span.span_id,
+            'parent': span.parent_id,
+            'name': span.name,
+            'start': round(span.start, 6),
+            'duration': round(span.duration, 6),
+            'thread': threading.current_thread().name,
+            'status': 'ok',
+        }
+        record.update(span.attrs)
+        line = json.dumps(record, default=str)
+        with self._lock:
+            if self._file:
+                self.trace_ids.add(span.trace_id)
+                self._file.write(line + "\n")
+                self._file.flush()
+
+# Shared by the whole app, main.py opens it with --trace
+tracer = Tracer()
+
+def load(path):
+    records = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                records.append(json.loads(line))
+    return records
+
+def _percentiles(samples):
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))]
+    return len(ordered), statistics.median(ordered), p95
+
+def summarize(records):
+    """
+    Time to first audio per station and per stream host, and fetch latency
+    per API mirror. Each value is (count, p50, p95) in seconds.
+    """
+    by_id = {r['span']: r for r in records}
+    ttfa_station = {}
+    ttfa_host = {}
+    fetches = {}
+
+    for r in records:
+        if r.get('status') != 'ok':
+            continue
+        if r['name'] == 'tune':
+            parent = by_id.get(r.get('parent')) or {}
+            station = r.get('station') or parent.get('station') or r.get('url')
+            ttfa_station.setdefault(station, []).append(r['duration'])
+            ttfa_host.setdefault(r.get('host') or '?', []).append(r['duration'])
+        elif r['name'] in ('fetch', 'fetch_m3u', 'server_check') and r.get('mirror'):
+            fetches.setdefault(r['mirror'], []).append(r['duration'])
+
+    return {
+        'ttfa_by_station': {k: _percentiles(v) for k, v in ttfa_station.items()},
+        'ttfa_by_host': {k: _percentiles(v) for k, v in ttfa_host.items()},
+        'fetch_by_mirror': {k: _percentiles(v) for k, v in fetches.items()},
+    }
+
+def format_summary(summary):
+    titles = {
+        'ttfa_by_station': "Time to first audio by station",
+        'ttfa_by_host': "Time to first audio by stream host",
+        'fetch_by_mirror': "Fetch latency by mirror",
+    }
+    lines = []
+    for key, title in titles.items():
+        groups = summary.get(key)
+        if not groups:
+            continue
+        lines.append(f"{title}:")
+        for name, (count, p50, p95) in sorted(groups.items(), key=lambda item: -item[1][2]):
+            lines.append(f"  {name[:48]:<48} n={count:<4} p50 {p50:6.2f}s  p95 {p95:6.2f}s")
+    return "\n".join(lines)
@@ -1,18 +1,102 @@
+"""
+Bulk stream health prober.
+
+Examples:
+    python inspect_url.py http://stream.live.vc.bbcmedia.co.uk/bbc_radio_one
+    python inspect_url.py --country GB --out gb_probe.jsonl
+    python inspect_url.py --tv-country de --workers 64 --deadline 6
+    python inspect_url.py --file urls.txt --no-blocklist
+"""
+import argparse
+import json
+import sys
+import time
+
 import requests
 
-url = "http://stream.live.vc.bbcmedia.co.uk/bbc_radio_one"
-try:
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
-    response = requests.get(url, stream=True, headers=headers, timeout=10)
-    print(f"Status Code: {response.status_code}")
-    print(f"Headers: {response.headers}")
-    
-    # Read first 100 bytes
-    chunk = response.raw.read(100)
-    print(f"First 100 bytes: {chunk}")
-    
-    response.close()
-except Exception as e:
-    print(f"Error: {e}")
+from core.config_manager import ConfigManager
+from core.station_manager import StationManager
+from core.stream_prober import probe_many, write_jsonl, build_blocklist, BLOCKLIST_FILE
+
+DEFAULT_URL = "http://stream.live.vc.bbcmedia.co.uk/bbc_radio_one"
+
+def load_targets(args, station_manager):
+    targets = list(args.urls)
+
+    if args.file:
+        with open(args.file, 'r', encoding='utf-8') as f:
+            content = f.read().strip()
+        if content.startswith('['):
+            targets.extend(json.loads(content))
+        else:
+            for line in content.splitlines():
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                targets.append(json.loads(line) if line.startswith('{') else line)
+
+    if args.country:
+        station_manager._ensure_server()
+        url = f"{station_manager.base_url}/bycountrycodeexact/{args.country}"
+        try:
+            response = requests.get(url, params={'hidebroken': 'false'}, timeout=30)
+            response.raise_for_status()
+            catalog = [s for s in response.json() if s.get('url_resolved')]
+            print(f"Loaded {len(catalog)} stations for {args.country}")
+            targets.extend(catalog)
+        except requests.RequestException as e:
+            print(f"Error loading catalog for {args.country}: {e}")
+
+    if args.tv_country:
+        url = f"https://iptv-org.github.io/iptv/countries/{args.tv_country.lower()}.m3u"
+        # The whole playlist, blocked channels too: they're what gets re-probed
+        channels = station_manager._stream_m3u(url, None, None, filter_blocked=False)
+        print(f"Loaded {len(channels)} TV channels for {args.tv_country}")
+        targets.extend(channels)
+
+    return targets
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Probe radio/TV stream URLs concurrently.")
+    parser.add_argument('urls', nargs='*', help="Stream URLs to probe")
+    parser.add_argument('--file', help="Text file of URLs, or JSON/JSONL of station dicts")
+    parser.add_argument('--country', help="Probe the radio-browser catalog for this country code")
+    parser.add_argument('--tv-country', help="Probe the iptv-org playlist for this country code")
+    parser.add_argument('--workers', type=int, default=32, help="Concurrent probes (default 32)")
+    parser.add_argument('--deadline', type=float, default=8.0, help="Per-probe deadline in seconds")
+    parser.add_argument('--sample', type=float, default=3.0, help="Seconds of audio to read for throughput")
+    parser.add_argument('--out', default="probe_results.jsonl", help="JSONL results file")
+    parser.add_argument('--config-dir', default="config", help="Where the blocklist is written")
+    parser.add_argument('--no-blocklist', action='store_true', help="Don't update the dead-station blocklist")
+    args = parser.parse_args(argv)
+
+    config_manager = ConfigManager(args.config_dir)
+    station_manager = StationManager(config_manager)
+
+    targets = load_targets(args, station_manager)
+    if not targets:
+        targets = [DEFAULT_URL]
+
+    print(f"Probing {len(targets)} streams with {args.workers} workers...")
+    start = time.time()
+    results = []
+    for i, (_, result) in enumerate(probe_many(targets, args.workers, args.deadline, args.sample), 1):
+        results.append(result)
+        state = "OK  " if result['ok'] else "DEAD"
+        detail = f"{result['first_byte_ms']}ms, {result['throughput_kbps']} kbps" if result['ok'] else result['error']
+        print(f"[{i}/{len(targets)}] {state} {result['url']} ({detail})")
+
+    write_jsonl(results, args.out)
+    alive = sum(1 for r in results if r['ok'])
+    print(f"Done in {time.time() - start:.1f}s: {alive} alive, {len(results) - alive} dead. Results in {args.out}")
+
+    if not args.no_blocklist:
+        existing = config_manager.load_json(BLOCKLIST_FILE, {})
+        blocklist = build_blocklist(results, existing)
+        config_manager.save_json(BLOCKLIST_FILE, blocklist)
+        print(f"Blocklist updated: {len(blocklist['urls'])} dead URLs in {args.config_dir}/{BLOCKLIST_FILE}")
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,17 +1,35 @@
 import pygame
+import argparse
 import sys
 import os
 import ctypes
+import signal
+import subprocess
+import time
+from types import SimpleNamespace
 
 from core.config_manager import ConfigManager
 from core.region_detector import RegionDetector
 from core.station_manager import StationManager
 from core.favorites_manager import FavoritesManager
+from core.station_table import StationTable
+from core.search_index import SearchIndex
+from core.daemon import RadioDaemon, default_socket_path
+from core.daemon_client import DaemonClient, RemoteStationManager, RemoteFavorites, RemotePlayer, RemoteMetadata
+from core.task_executor import TaskExecutor
+from core.tracer import tracer, load as load_trace, summarize, format_summary
 from core.stream_player import StreamPlayer
+from core.stream_resolver import StreamResolver
+from core.metadata_watcher import MetadataWatcher
+from core.pcm_mixer import PcmMixer
 from ui.pygame_renderer import PygameRenderer
 from ui.event_controller import EventController
+from ui.input_source import InputRecorder, ReplayInput
 from core.accessibility import AccessibilityManager
 
+# How long --connect waits for a daemon it started
+DAEMON_START_TIMEOUT = 15.0
+
 def setup_console():
     """
     Allocates a console if frozen and --debug flag is present.
@@ -30,24 +48,35 @@ def setup_console():
             except Exception as e:
                 pass # Fail silently if console creation fails
 
-def main():
-    setup_console()
-    pygame.init()
-    
-    # Play Intro
-    try:
-        pygame.mixer.init()
-        intro_path = os.path.join("sounds", "intro.mp3")
-        if os.path.exists(intro_path):
-            pygame.mixer.music.load(intro_path)
-            pygame.mixer.music.set_volume(0.4)
-            pygame.mixer.music.play()
-    except Exception as e:
-        print(f"Error playing intro: {e}")
-    
-    # 1. Initialize Core
+def parse_args():
+    parser = argparse.ArgumentParser(description="The Internet Analog Radio")
+    parser.add_argument('--debug', action='store_true', help="Attach a console (frozen builds)")
+    parser.add_argument('--timeshift', type=float, default=0, metavar='MINUTES',
+                        help="Keep this many minutes of the current station for pause/rewind")
+    parser.add_argument('--suspend-after', type=float, default=30, metavar='SECONDS',
+                        help="Release streams after this long muted or off-station, 0 to keep them open")
+    parser.add_argument('--pcm-mixer', action='store_true',
+                        help="Mix station audio and static in one PCM pipeline")
+    parser.add_argument('--headless', action='store_true',
+                        help="No window and no sound output (SDL dummy drivers, libvlc null audio)")
+    parser.add_argument('--record', metavar='FILE', help="Record key presses to FILE for --replay")
+    parser.add_argument('--replay', metavar='FILE',
+                        help="Drive the radio from a recording, then print frame time and CPU use")
+    parser.add_argument('--trace', metavar='FILE',
+                        help="Append timing spans to FILE (JSON lines) and print time-to-first-audio on exit")
+    parser.add_argument('--daemon', action='store_true',
+                        help="Run in the background without a window, serving frontends over a Unix socket")
+    parser.add_argument('--connect', action='store_true',
+                        help="Use the running daemon (starting it if needed) instead of loading everything here")
+    parser.add_argument('--socket', metavar='PATH', help="Daemon socket (default: per-user, in the runtime dir)")
+    args, _ = parser.parse_known_args()
+    return args
+
+def build_core(args):
+    """
+    Catalog, favorites and player: everything that stays warm in a daemon.
+    """
     config_manager = ConfigManager()
-    accessibility_manager = AccessibilityManager()
     
     region_detector = RegionDetector()
     region_info = region_detector.get_region()
@@ -59,35 +88,197 @@ def main():
     lat = region_info.get('lat') if region_info else None
     lon = region_info.get('lon') if region_info else None
     
-    station_manager = StationManager(config_manager, region_detector)
+    # One interned station table shared by bands and favorites
+    station_table = StationTable(config_manager)
+    # ...and one search index over everything they hold
+    search_index = SearchIndex()
+    station_manager = StationManager(config_manager, region_detector, station_table, search_index=search_index)
+    
+    # Every table owner registers before the fetch can save the table
+    favorites_manager = FavoritesManager(config_manager, station_table, search_index)
     
-    # Threaded Fetch
-    import threading
-    def fetch_async():
+    # Background Fetch
+    task_executor = TaskExecutor()
+    def fetch_async(task):
         print("Fetching stations in background...")
         station_manager.fetch_all(country_code, city, lat, lon)
         print("Stations fetched.")
         
-    fetch_thread = threading.Thread(target=fetch_async, daemon=True)
-    fetch_thread.start()
+    task_executor.submit('fetch-all', fetch_async)
     
-    favorites_manager = FavoritesManager(config_manager)
-    stream_player = StreamPlayer()
+    stream_resolver = StreamResolver(config_manager)
+    pcm_mixer = None
+    if args.pcm_mixer:
+        try:
+            pcm_mixer = PcmMixer()
+        except RuntimeError as e:
+            print(f"PCM mixer unavailable, using separate outputs: {e}")
+
+    stream_player = StreamPlayer(resolver=stream_resolver, timeshift_seconds=int(args.timeshift * 60),
+                                 pcm_mixer=pcm_mixer, audio_output='adummy' if args.headless else None,
+                                 suspend_after=args.suspend_after)
+    metadata_watcher = MetadataWatcher(config_manager)
+    stream_player.on_meta_change = metadata_watcher.on_meta_change
+
+    return SimpleNamespace(station_manager=station_manager, favorites_manager=favorites_manager,
+                           stream_player=stream_player, metadata_watcher=metadata_watcher,
+                           stream_resolver=stream_resolver, pcm_mixer=pcm_mixer, task_executor=task_executor)
+
+def shutdown_core(core):
+    if core.pcm_mixer:
+        core.pcm_mixer.shutdown()
+
+    stats = core.stream_resolver.stats
+    print(f"Stream cache: {stats['hits']} hits, {stats['misses']} misses "
+          f"({core.stream_resolver.hit_rate():.0%}), {stats['saved_seconds']:.1f}s of redirects skipped")
+
+def run_daemon(args):
+    core = build_core(args)
+    daemon = RadioDaemon(core.station_manager, core.favorites_manager, core.stream_player,
+                         core.metadata_watcher, path=args.socket, task_executor=core.task_executor)
+    signal.signal(signal.SIGTERM, lambda signum, frame: daemon.shutdown())
+    try:
+        daemon.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    core.metadata_watcher.shutdown()
+    shutdown_core(core)
+
+def connect_daemon(args):
+    """
+    Connects to the daemon, starting one in the background if none is running.
+    """
+    try:
+        return DaemonClient(args.socket)
+    except OSError:
+        pass
+
+    path = args.socket or default_socket_path()
+    print(f"No radio daemon on {path}, starting one...")
+    if getattr(sys, 'frozen', False):
+        command = [sys.executable, '--daemon']
+    else:
+        command = [sys.executable, os.path.abspath(__file__), '--daemon']
+    for flag, value in (('--socket', args.socket), ('--timeshift', args.timeshift),
+                        ('--suspend-after', args.suspend_after)):
+        if value is not None:
+            command += [flag, str(value)]
+    if args.pcm_mixer:
+        command.append('--pcm-mixer')
+    if args.headless:
+        command.append('--headless')
+    with open(path + ".log", 'a') as log:
+        subprocess.Popen(command, stdout=log, stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL,
+                         start_new_session=True)
+
+    give_up = time.monotonic() + DAEMON_START_TIMEOUT
+    while True:
+        try:
+            return DaemonClient(args.socket)
+        except OSError:
+            if time.monotonic() > give_up:
+                raise RuntimeError(f"Radio daemon did not start, see {path}.log")
+            time.sleep(0.1)
+
+def main():
+    args = parse_args()
+    setup_console()
+    if args.headless:
+        # Must be set before pygame.init()
+        os.environ['SDL_VIDEODRIVER'] = 'dummy'
+        os.environ['SDL_AUDIODRIVER'] = 'dummy'
+    if args.trace:
+        tracer.open(args.trace)
+
+    if args.daemon:
+        run_daemon(args)
+    else:
+        run_ui(args)
+
+    if tracer.enabled:
+        tracer.close()
+        # The file is appended to across runs, summarize this one only
+        records = [r for r in load_trace(args.trace) if r['trace'] in tracer.trace_ids]
+        print(format_summary(summarize(records)))
+
+def run_ui(args):
+    pygame.init()
+    
+    # Play Intro
+    try:
+        pygame.mixer.init()
+        intro_path = os.path.join("sounds", "intro.mp3")
+        if os.path.exists(intro_path):
+            pygame.mixer.music.load(intro_path)
+            pygame.mixer.music.set_volume(0.4)
+            pygame.mixer.music.play()
+    except Exception as e:
+        print(f"Error playing intro: {e}")
+    
+    # 1. Initialize Core, here or in the daemon
+    accessibility_manager = AccessibilityManager()
+    core = None
+    client = None
+    if args.connect:
+        client = connect_daemon(args)
+        search_index = SearchIndex()
+        station_manager = RemoteStationManager(client, search_index)
+        favorites_manager = RemoteFavorites(client, search_index)
+        stream_player = RemotePlayer(client)
+        metadata_watcher = RemoteMetadata(client)
+        client.hello() # Bands are replicated before the controller reads them
+        task_executor = TaskExecutor()
+        static_generator = None # Static stays in this process
+    else:
+        core = build_core(args)
+        station_manager = core.station_manager
+        favorites_manager = core.favorites_manager
+        stream_player = core.stream_player
+        metadata_watcher = core.metadata_watcher
+        task_executor = core.task_executor
+        static_generator = core.pcm_mixer.static if core.pcm_mixer else None
     
     # 2. Initialize UI
     renderer = PygameRenderer()
     
+    replay = ReplayInput(args.replay) if args.replay else None
+    input_source = replay
+    if args.record:
+        input_source = InputRecorder(args.record, input_source)
+
     # 3. Initialize Controller
     controller = EventController(
         station_manager=station_manager,
         favorites_manager=favorites_manager,
         stream_player=stream_player,
         renderer=renderer,
-        accessibility_manager=accessibility_manager
+        accessibility_manager=accessibility_manager,
+        metadata_watcher=metadata_watcher,
+        static_generator=static_generator,
+        task_executor=task_executor,
+        input_source=input_source
     )
+    if client:
+        def daemon_gone():
+            if controller.running:
+                print("Lost connection to the radio daemon")
+                controller.running = False
+        client.on_close = daemon_gone
     
     # 4. Run
     controller.run()
+    if args.record:
+        input_source.close()
+    if replay:
+        report = replay.report()
+        if report:
+            print(f"Replay: {report['frames']} frames, frame time p50 {report['frame_ms_p50']:.2f} ms "
+                  f"p95 {report['frame_ms_p95']:.2f} ms max {report['frame_ms_max']:.2f} ms, "
+                  f"CPU {report['cpu_seconds']:.2f}s over {report['wall_seconds']:.2f}s ({report['cpu_percent']:.0f}%)")
+    if client:
+        client.close()
+    else:
+        shutdown_core(core)
 
 if __name__ == "__main__":
     try:
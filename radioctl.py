@@ -0,0 +1,78 @@
+"""
+Command line remote for the radio daemon (python main.py --daemon).
+
+Examples:
+    python radioctl.py status
+    python radioctl.py tune national 3
+    python radioctl.py tune favorites 0 --volume 0.6
+    python radioctl.py search "jazz fm"
+    python radioctl.py volume 0.3
+    python radioctl.py stop
+    python radioctl.py shutdown
+"""
+import argparse
+import sys
+
+from core.daemon_client import DaemonClient, DaemonError, SLOW_CALL_TIMEOUT
+
+def print_status(status):
+    print(f"Player:  {status['state']}" + (" (timeshift)" if status['timeshift'] else ""))
+    if status['url']:
+        print(f"Stream:  {status['url']}")
+        print(f"Playing: {status['now_playing']}")
+    print(f"Clients: {status['clients']}")
+    for band, count in sorted(status['bands'].items()):
+        print(f"  {band:<24} {count:>5} stations")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Control a running radio daemon.")
+    parser.add_argument('--socket', metavar='PATH', help="Daemon socket (default: per-user, in the runtime dir)")
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('status', help="Show what's playing and the loaded bands")
+    tune = commands.add_parser('tune', help="Play a station of a band")
+    tune.add_argument('band', help="Band name, e.g. local, national, favorites or a custom band")
+    tune.add_argument('index', type=int, nargs='?', default=0, help="Station number in the band (default 0)")
+    tune.add_argument('--tv', action='store_true', help="Tune a TV band")
+    tune.add_argument('--volume', type=float, help="Volume, 0.0 to 1.0")
+    volume = commands.add_parser('volume', help="Set the volume")
+    volume.add_argument('level', type=float, help="0.0 to 1.0")
+    search = commands.add_parser('search', help="Search radio-browser and fill the exploratory band")
+    search.add_argument('query')
+    search.add_argument('--limit', type=int, default=50)
+    commands.add_parser('stop', help="Stop playback")
+    commands.add_parser('shutdown', help="Stop the daemon")
+    args = parser.parse_args(argv)
+
+    try:
+        client = DaemonClient(args.socket)
+    except (OSError, RuntimeError) as e:
+        print(f"Can't reach the radio daemon: {e}")
+        return 1
+
+    try:
+        if args.command == 'status':
+            print_status(client.call('status'))
+        elif args.command == 'tune':
+            station = client.call('tune', args.band, args.index, 'tv' if args.tv else 'radio', args.volume)
+            print(f"Tuned to {station.get('name') or station['url_resolved']}")
+        elif args.command == 'volume':
+            client.call('player.set_volume', args.level)
+        elif args.command == 'search':
+            if not client.call('search', args.query, args.limit, timeout=SLOW_CALL_TIMEOUT):
+                print(f"Nothing found for {args.query!r}")
+                return 1
+            status = client.call('status')
+            print(f"{status['bands'].get('radio/exploratory', 0)} stations in the exploratory band")
+        elif args.command == 'stop':
+            client.call('player.stop')
+        elif args.command == 'shutdown':
+            client.call('shutdown')
+    except DaemonError as e:
+        print(e)
+        return 1
+    finally:
+        client.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+import pytest
+
+from core.band_filter import BandFilter, NO_FILTER
+from core.station_manager import StationManager, FETCH_SLACK
+
+def station(**fields):
+    base = {'url_resolved': 'https://stream.example/live', 'codec': 'MP3', 'bitrate': 128,
+            'language': 'english,spanish', 'geo_lat': 40.4, 'geo_long': -3.7}
+    base.update(fields)
+    return base
+
+def test_no_filter_only_hides_broken_stations():
+    assert NO_FILTER.params() == {'hidebroken': 'true'}
+    assert not NO_FILTER
+    assert NO_FILTER.matches({})
+
+def test_every_constraint_becomes_a_search_parameter():
+    band_filter = BandFilter(codec='AAC', min_bitrate=64, max_bitrate=320, language='german',
+                             https_only=True, has_geo=True)
+    assert band_filter.params() == {
+        'hidebroken': 'true',
+        'codec': 'AAC',
+        'bitrateMin': 64,
+        'bitrateMax': 320,
+        'language': 'german',
+        'is_https': 'true',
+        'has_geo_info': 'true',
+    }
+
+@pytest.mark.parametrize('band_filter, fields, expected', [
+    (BandFilter(codec='mp3'), {}, True),
+    (BandFilter(codec='AAC'), {}, False),
+    (BandFilter(codec='MP3'), {'codec': None}, False),
+    (BandFilter(min_bitrate=128), {}, True),
+    (BandFilter(min_bitrate=192), {}, False),
+    (BandFilter(min_bitrate=64), {'bitrate': None}, False),
+    (BandFilter(max_bitrate=96), {}, False),
+    (BandFilter(language='Spanish'), {}, True),
+    (BandFilter(language='german'), {}, False),
+    (BandFilter(https_only=True), {}, True),
+    (BandFilter(https_only=True), {'url_resolved': 'http://stream.example/live'}, False),
+    (BandFilter(has_geo=True), {}, True),
+    (BandFilter(has_geo=True), {'geo_long': None}, False),
+    # 0.0 is a real coordinate, not a missing one
+    (BandFilter(has_geo=True), {'geo_lat': 0.0, 'geo_long': 0.0}, True),
+])
+def test_matches_applies_the_same_rules_locally(band_filter, fields, expected):
+    assert band_filter.matches(station(**fields)) is expected
+
+def test_round_trips_through_its_dict_and_ignores_unknown_keys():
+    data = {'codec': 'MP3', 'min_bitrate': 128, 'https_only': True, 'colour': 'blue'}
+    band_filter = BandFilter.from_dict(data)
+    assert band_filter.to_dict() == {'codec': 'MP3', 'min_bitrate': 128, 'https_only': True}
+    assert BandFilter.from_dict(None).to_dict() == {}
+
+def test_band_constraints_override_the_shared_ones():
+    shared = BandFilter(https_only=True, min_bitrate=64)
+    band = BandFilter(min_bitrate=128, codec='MP3')
+    assert shared.merged(band).to_dict() == {'https_only': True, 'min_bitrate': 128, 'codec': 'MP3'}
+
+@pytest.fixture
+def manager():
+    manager = StationManager()
+    manager.band_filters = {'*': BandFilter(https_only=True), 'national': BandFilter(codec='MP3')}
+    calls = []
+    def fake_fetch(url, limit, params=None, deadline=None, band_filter=None):
+        calls.append((url, params, band_filter))
+        return []
+    manager._fetch = fake_fetch
+    manager.calls = calls
+    yield manager
+    manager._pool.shutdown(wait=True)
+
+def test_search_requests_carry_the_band_filter(manager):
+    manager._fetch_band('national', manager.base_url.rsplit('/stations', 1)[0] + '/stations/search', 20, name='jazz')
+    (url, params, band_filter), = manager.calls
+    assert params == {'hidebroken': 'true', 'is_https': 'true', 'codec': 'MP3', 'name': 'jazz',
+                      'limit': 20 + FETCH_SLACK}
+    assert band_filter.to_dict() == {'https_only': True, 'codec': 'MP3'}
+
+def test_other_endpoints_over_fetch_and_filter_locally(manager):
+    manager._fetch_band('national', manager.base_url + '/bycountrycodeexact/DE', 20)
+    (url, params, band_filter), = manager.calls
+    assert params == {'hidebroken': 'true', 'limit': 80}
+    assert band_filter.to_dict() == {'https_only': True, 'codec': 'MP3'}
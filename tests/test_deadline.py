@@ -0,0 +1,49 @@
+import pytest
+import requests
+
+from core import deadline as deadline_module
+from core.deadline import Deadline, DeadlineExceeded
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(deadline_module.time, 'monotonic', clock)
+    return clock
+
+def test_timeout_is_capped_while_budget_lasts(clock):
+    deadline = Deadline(10)
+    assert deadline.timeout(5) == 5
+    clock.now += 3
+    assert deadline.remaining() == 7
+    assert deadline.timeout(5) == 5
+
+def test_timeout_shrinks_to_what_is_left(clock):
+    deadline = Deadline(10)
+    clock.now += 8.5
+    assert deadline.timeout(5) == pytest.approx(1.5)
+    assert not deadline.expired
+
+def test_spent_budget_raises_instead_of_timing_out(clock):
+    deadline = Deadline(2)
+    clock.now += 2
+    assert deadline.expired
+    assert deadline.remaining() == 0
+    with pytest.raises(DeadlineExceeded):
+        deadline.timeout(5)
+
+def test_remaining_never_goes_negative(clock):
+    deadline = Deadline(1)
+    clock.now += 60
+    assert deadline.remaining() == 0
+
+def test_exceeded_is_caught_by_request_handlers(clock):
+    deadline = Deadline(0)
+    with pytest.raises(requests.RequestException):
+        deadline.timeout(1)
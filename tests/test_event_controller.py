@@ -0,0 +1,89 @@
+from types import SimpleNamespace
+
+import pygame
+import pytest
+
+from core.daemon_client import RemotePlayer
+from core.station_table import BandSnapshot
+from core.tracer import tracer, load
+from ui.event_controller import EventController
+
+class FakeClient:
+    def __init__(self):
+        self.handlers = {}
+        self.sent = []
+
+    def send(self, cmd, *args):
+        self.sent.append((cmd, args))
+
+class FakeStatic:
+    def set_signal(self, strength, color=None):
+        self.signal = (strength, color)
+
+    def set_volume(self, volume):
+        self.volume = volume
+
+JAZZ = {'stationuuid': 'a', 'name': 'Jazz FM', 'url_resolved': 'http://jazz/live', 'frequency': 101.1}
+
+def controller_for(stream_player):
+    """
+    An EventController with only the state the tuning path reads, like
+    the benchmarks build it: the real one starts the mixer and clipboard.
+    """
+    controller = EventController.__new__(EventController)
+    controller.station_manager = SimpleNamespace(get_station_list=lambda band, mode: BandSnapshot([JAZZ]))
+    controller.favorites_manager = None
+    controller.stream_player = stream_player
+    controller.static_generator = FakeStatic()
+    controller.accessibility_manager = None
+    controller.metadata_watcher = None
+    controller.mode = 'radio'
+    controller.bands = ['national']
+    controller.band_indices = {'national': 0}
+    controller.current_band_index = 0
+    controller.current_frequency = 101.1
+    controller.tuning_bandwidth = 0.8
+    controller.user_volume = 0.5
+    controller.is_muted = False
+    controller._cached_closest = None
+    controller._cached_freq = None
+    controller._cached_band_idx = None
+    controller._cached_version = None
+    controller._prefetch_key = None
+    return controller
+
+@pytest.fixture
+def trace(tmp_path, monkeypatch):
+    monkeypatch.setattr(pygame.mixer.music, 'get_busy', lambda: False)
+    path = tmp_path / "trace.jsonl"
+    tracer.open(str(path))
+    yield path
+    tracer.close()
+
+def test_thin_client_tunes_and_closes_the_lock_on(trace):
+    client = FakeClient()
+    controller = controller_for(RemotePlayer(client))
+    controller._update_audio_mixing()
+    controller._update_audio_mixing() # Same station, no new lock-on
+
+    commands = [cmd for cmd, _ in client.sent]
+    assert commands[:2] == ['player.play', 'player.set_volume']
+    assert ('player.play', ('http://jazz/live',)) in client.sent
+    assert controller.static_generator.volume == 0.0
+
+    tracer.close()
+    lock_ons = [r for r in load(str(trace)) if r['name'] == 'lock_on']
+    assert len(lock_ons) == 1
+    assert lock_ons[0]['station'] == 'Jazz FM' and lock_ons[0]['status'] == 'ok'
+
+@pytest.mark.parametrize('frequency, color', [
+    (101.1, 'hiss'),  # Locked, the hiss is faded out
+    (101.6, 'hiss'),  # Fading in
+    (102.3, 'pink'),  # Just out of range
+    (104.0, 'white'), # Nowhere near
+])
+def test_static_color_follows_distance_to_a_station(trace, frequency, color):
+    controller = controller_for(RemotePlayer(FakeClient()))
+    controller.current_frequency = frequency
+    controller._update_audio_mixing()
+    assert controller.static_generator.signal[1] == color
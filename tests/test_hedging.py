@@ -0,0 +1,91 @@
+import threading
+import time
+
+import pytest
+import requests
+
+from core import station_manager as station_manager_module
+from core.deadline import Deadline, DeadlineExceeded
+from core.station_manager import StationManager, HEDGE_DEFAULT_DELAY, HEDGE_MIN_SAMPLES
+
+PRIMARY = "http://primary/json"
+BACKUP = "http://backup/json"
+URL = PRIMARY + "/stations/search"
+
+class FakeMirrors:
+    """
+    Stands in for _get_json: each mirror answers after a delay, or fails.
+    A slow answer gives up as soon as the race is cancelled.
+    """
+    def __init__(self, **behaviour):
+        self.behaviour = behaviour # root -> (seconds, result or exception)
+        self.calls = []
+        self.cancelled = {}
+
+    def __call__(self, root, url, params, timeout, cancelled=None):
+        self.calls.append(root)
+        seconds, result = self.behaviour[root]
+        if cancelled.wait(seconds):
+            self.cancelled[root] = True
+            raise DeadlineExceeded(f"{url}: no longer needed")
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+@pytest.fixture
+def manager():
+    manager = StationManager(base_url=PRIMARY + "/stations", mirrors=[PRIMARY, BACKUP])
+    # A fast, steady primary: hedges after its p90, 50 ms
+    manager.mirror_latency[PRIMARY] = [0.05] * HEDGE_MIN_SAMPLES
+    yield manager
+    manager._pool.shutdown(wait=True)
+
+def test_fast_primary_is_not_hedged(manager):
+    mirrors = manager._get_json = FakeMirrors(**{PRIMARY: (0.0, ['primary']), BACKUP: (0.0, ['backup'])})
+    assert manager._hedged_get(URL, {}, Deadline(5)) == ['primary']
+    assert mirrors.calls == [PRIMARY]
+
+def test_slow_primary_loses_to_backup_and_is_cancelled(manager):
+    mirrors = manager._get_json = FakeMirrors(**{PRIMARY: (2.0, ['primary']), BACKUP: (0.0, ['backup'])})
+    start = time.monotonic()
+    assert manager._hedged_get(URL, {}, Deadline(5)) == ['backup']
+    assert time.monotonic() - start < 1.0
+    assert mirrors.calls == [PRIMARY, BACKUP]
+    # The loser gives its worker back instead of reading on
+    manager._pool.shutdown(wait=True)
+    assert mirrors.cancelled == {PRIMARY: True}
+
+def test_failed_primary_hedges_at_once(manager):
+    failure = requests.ConnectionError("refused")
+    mirrors = manager._get_json = FakeMirrors(**{PRIMARY: (0.0, failure), BACKUP: (0.0, ['backup'])})
+    assert manager._hedged_get(URL, {}, Deadline(5)) == ['backup']
+    assert mirrors.calls == [PRIMARY, BACKUP]
+
+def test_both_failing_raises_the_last_error(manager):
+    failure = requests.ConnectionError("refused")
+    manager._get_json = FakeMirrors(**{PRIMARY: (0.0, failure), BACKUP: (0.0, failure)})
+    with pytest.raises(requests.ConnectionError):
+        manager._hedged_get(URL, {}, Deadline(5))
+
+def test_gives_up_at_the_deadline(manager):
+    mirrors = manager._get_json = FakeMirrors(**{PRIMARY: (5.0, ['primary']), BACKUP: (5.0, ['backup'])})
+    start = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        manager._hedged_get(URL, {}, Deadline(0.3))
+    assert time.monotonic() - start < 1.0
+    manager._pool.shutdown(wait=True)
+    assert mirrors.cancelled == {PRIMARY: True, BACKUP: True}
+
+def test_failures_are_not_latency_samples(manager, monkeypatch):
+    def refuse(*args, **kwargs):
+        raise requests.ConnectionError("refused")
+    monkeypatch.setattr(station_manager_module.requests, 'get', refuse)
+    with pytest.raises(requests.ConnectionError):
+        manager._get_json(PRIMARY, URL, {}, 1.0, threading.Event())
+    assert list(manager.mirror_latency[PRIMARY]) == [0.05] * HEDGE_MIN_SAMPLES
+    assert manager.mirror_failures[PRIMARY] == 1
+    # A failing mirror is hedged early and ranks last as a backup
+    assert manager._hedge_delay(PRIMARY) == HEDGE_DEFAULT_DELAY
+    assert manager._backup_mirror(BACKUP) == PRIMARY
+    manager.mirrors.append("http://third/json")
+    assert manager._backup_mirror(BACKUP) == "http://third/json"
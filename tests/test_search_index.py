@@ -0,0 +1,101 @@
+from core.search_index import SearchIndex, normalize, trigrams
+from core.station_table import StationRef
+
+NATIONAL = ('radio', 'national')
+LOCAL = ('radio', 'local')
+TV = ('tv', 'news')
+
+def station(uuid, name, tags=''):
+    return {'stationuuid': uuid, 'name': name, 'tags': tags, 'url_resolved': f'http://{uuid}/live'}
+
+def names(results):
+    return [s['name'] for s, _ in results]
+
+def test_normalize_folds_case_accents_and_punctuation():
+    assert normalize("Café Über-FM") == ['cafe', 'uber', 'fm']
+    assert normalize(None) == []
+
+def test_unfinished_last_word_gets_no_end_padding():
+    assert trigrams(['ja'], partial_last=True) == {'  j', ' ja'}
+    assert 'ja ' not in trigrams(['ja'], partial_last=True)
+    assert 'ja ' in trigrams(['ja'])
+
+def test_names_starting_with_the_query_rank_first():
+    index = SearchIndex()
+    index.update(NATIONAL, [station('a', 'Smooth Jazz Radio'), station('b', 'Jazz FM'),
+                            station('c', 'Jazzy Beats'), station('d', 'Rock One', 'jazz')])
+    # Then shorter names among equally good matches, tags count as words
+    assert names(index.search('jazz')) == ['Jazz FM', 'Jazzy Beats', 'Rock One', 'Smooth Jazz Radio']
+    # Every query word must match before the typo matches fill the rest
+    assert names(index.search('jazz r'))[:2] == ['Rock One', 'Smooth Jazz Radio']
+    assert names(index.search('jazz', limit=2)) == ['Jazz FM', 'Jazzy Beats']
+
+def test_typos_match_by_trigrams_after_exact_matches():
+    index = SearchIndex()
+    index.update(NATIONAL, [station('a', 'Classic Rock'), station('b', 'Jazz Radio'),
+                            station('c', 'Talk Sport')])
+    assert names(index.search('clasic rock')) == ['Classic Rock']
+    assert names(index.search('jazz radoi')) == ['Jazz Radio']
+    assert index.search('zzzz') == []
+    assert index.search('  ') == []
+
+def test_preferred_mode_ranks_first_and_picks_the_copy():
+    index = SearchIndex()
+    index.update(TV, [station('a', 'News 24')])
+    index.update(NATIONAL, [station('b', 'News Talk')])
+    shared = station('c', 'News Now')
+    index.update(LOCAL, [shared])
+    index.update(TV, [station('a', 'News 24'), dict(shared, frequency=12)])
+    results = index.search('news', prefer=NATIONAL)
+    assert names(results) == ['News Now', 'News Talk', 'News 24']
+    assert results[0] == (shared, LOCAL)
+    results = index.search('news now', prefer=TV)
+    assert results[0][1] == TV and results[0][0]['frequency'] == 12
+
+def test_update_applies_only_the_difference():
+    index = SearchIndex()
+    jazz, rock = station('a', 'Jazz FM'), station('b', 'Rock One')
+    index.update(NATIONAL, [jazz, rock])
+    index.update(LOCAL, [jazz])
+    assert len(index) == 2
+
+    # Dropped from one band, still indexed through the other
+    index.update(NATIONAL, [rock])
+    assert names(index.search('jazz')) == ['Jazz FM']
+    assert index.search('jazz')[0][1] == LOCAL
+
+    # Renamed in place: the old name stops matching
+    index.update(NATIONAL, [dict(rock, name='Blues One')])
+    assert names(index.search('blues')) == ['Blues One']
+    assert index.search('rock') == []
+
+    index.remove(LOCAL)
+    index.remove(NATIONAL)
+    assert len(index) == 0
+    assert index.search('blues') == []
+
+def test_republishing_the_same_stations_is_a_no_op():
+    index = SearchIndex()
+    stations = [station('a', 'Jazz FM'), station('b', 'Rock One')]
+    index.update(NATIONAL, stations)
+    assert names(index.search('jazz')) == ['Jazz FM']
+    index.update(NATIONAL, tuple(stations))
+    assert names(index.search('jazz')) == ['Jazz FM']
+    # Same objects in a new order or with one missing are real changes
+    index.update(NATIONAL, stations[1:])
+    assert index.search('jazz') == []
+
+def test_prefix_cache_forgets_on_change():
+    index = SearchIndex()
+    index.update(NATIONAL, [station('a', 'Jazz FM')])
+    assert names(index.search('ja')) == ['Jazz FM']
+    index.update(LOCAL, [station('b', 'Jam Radio')])
+    assert names(index.search('ja')) == ['Jazz FM', 'Jam Radio']
+
+def test_station_refs_are_keyed_like_their_record():
+    index = SearchIndex()
+    record = station('a', 'Jazz FM')
+    index.update(NATIONAL, [record])
+    index.update(LOCAL, [StationRef('a', record, {'frequency': 101.1})])
+    assert len(index) == 1
+    assert index.search('jazz', prefer=LOCAL)[0][0]['frequency'] == 101.1
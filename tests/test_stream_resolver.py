@@ -0,0 +1,47 @@
+import pytest
+
+from core import stream_resolver as stream_resolver_module
+from core.stream_resolver import StreamResolver
+
+PLAYLIST = "http://radio.example/listen.m3u"
+STREAM = "http://radio.example/live.mp3"
+
+class FakeResponse:
+    def __init__(self, url, content_type, body=b""):
+        self.url = url
+        self.headers = {'Content-Type': content_type}
+        self.content = body
+        self.history = []
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size=1):
+        yield b"\xff"
+
+    def close(self):
+        pass
+
+@pytest.fixture
+def serve(monkeypatch):
+    def install(responses):
+        monkeypatch.setattr(stream_resolver_module.requests, 'get',
+                            lambda url, **kwargs: responses[url])
+    return install
+
+def test_plain_m3u_served_as_application_x_mpegurl_is_followed(serve):
+    serve({
+        PLAYLIST: FakeResponse(PLAYLIST, 'application/x-mpegurl', b"#EXTM3U\n" + STREAM.encode() + b"\n"),
+        STREAM: FakeResponse(STREAM, 'audio/mpeg'),
+    })
+    entry = StreamResolver().resolve(PLAYLIST)
+    assert entry['final_url'] == STREAM
+    assert entry['codec'] == 'MP3'
+
+def test_hls_served_as_application_x_mpegurl_is_kept(serve):
+    url = "http://tv.example/live"
+    body = b"#EXTM3U\n#EXT-X-TARGETDURATION:6\n#EXTINF:6,\nseg1.ts\n"
+    serve({url: FakeResponse(url, 'application/x-mpegurl', body)})
+    entry = StreamResolver().resolve(url)
+    assert entry['final_url'] == url
+    assert entry['codec'] == 'HLS'
@@ -0,0 +1,65 @@
+import time
+
+import pytest
+import requests
+
+from core import timeshift
+from core.timeshift import RingBuffer, StreamCapture
+
+class FakeResponse:
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size=1):
+        yield from self.chunks
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+@pytest.fixture
+def ring(tmp_path):
+    ring = RingBuffer(1024, path=str(tmp_path / "test.ring"))
+    yield ring
+    ring.close()
+
+@pytest.fixture(autouse=True)
+def fast_retries(monkeypatch):
+    monkeypatch.setattr(timeshift, 'CAPTURE_RETRY_DELAY', 0.01)
+
+def wait_for(condition, seconds=2.0):
+    end = time.monotonic() + seconds
+    while not condition() and time.monotonic() < end:
+        time.sleep(0.01)
+    return condition()
+
+def test_capture_reconnects_after_the_stream_drops(ring, monkeypatch):
+    answers = [FakeResponse([b"abc"]), requests.ConnectionError("reset"), FakeResponse([b"def"])]
+    def get(url, **kwargs):
+        answer = answers.pop(0) if answers else FakeResponse([])
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+    monkeypatch.setattr(timeshift.requests, 'get', get)
+
+    capture = StreamCapture("http://radio/live", ring)
+    assert wait_for(lambda: ring.written == 6)
+    assert ring.read(0, 6)[0] == b"abcdef"
+    capture.stop()
+
+def test_capture_gives_up_after_failures_in_a_row(ring, monkeypatch):
+    calls = []
+    def refuse(url, **kwargs):
+        calls.append(url)
+        raise requests.ConnectionError("refused")
+    monkeypatch.setattr(timeshift.requests, 'get', refuse)
+
+    capture = StreamCapture("http://radio/live", ring)
+    assert wait_for(lambda: capture.failed)
+    assert len(calls) == timeshift.CAPTURE_MAX_FAILURES
+    assert capture.error == "refused"
@@ -2,20 +2,36 @@ import pygame
 import sys
 import os
 import random
+import time
 from core.static_generator import StaticGenerator
-import threading
+from core.clipboard import ClipboardService
+from core.station_manager import TV_CATEGORY_BANDS
+from core.task_executor import TaskExecutor
+from core.tracer import tracer, NULL_SPAN
+from ui.input_source import LiveInput
+
+# Local matches listed under the search box
+SEARCH_SUGGESTIONS = 6
+# Out to this many tuning bandwidths from a station, the static between
+# stations turns from white to pink as it comes near
+NEAR_STATION_BANDWIDTHS = 2.0
 
 class EventController:
-    def __init__(self, station_manager, favorites_manager, stream_player, renderer, accessibility_manager=None):
+    def __init__(self, station_manager, favorites_manager, stream_player, renderer, accessibility_manager=None, metadata_watcher=None, static_generator=None, task_executor=None, input_source=None):
         self.station_manager = station_manager
+        # Keyboard, or a recorder/replayer wrapped around it
+        self.input = input_source or LiveInput()
+        # Shared pool for fetches and searches, bounded regardless of key mashing
+        self.tasks = task_executor or TaskExecutor()
         self.favorites_manager = favorites_manager
         self.stream_player = stream_player
         self.renderer = renderer
         self.accessibility_manager = accessibility_manager
+        self.metadata_watcher = metadata_watcher
         
         self.bands = ['local', 'national', 'international', 'favorites', 'exploratory']
         # Append custom bands
-        self.bands.extend(self.station_manager.custom_bands.keys())
+        self.bands.extend(self.station_manager.custom_bands.get('radio', {}).keys())
         
         self.current_band_index = 1 # Default to National
         self.band_indices = {b: 0 for b in self.bands}
@@ -24,7 +40,10 @@ class EventController:
         # Widen bandwidth to 0.8 MHz (radius) for smoother fading
         # This gives a zero-crossing at +/- 0.8
         self.tuning_bandwidth = 0.8
-        self.static_generator = StaticGenerator()
+        # PcmMixer supplies its own static voice with the same interface
+        self.static_generator = static_generator or StaticGenerator()
+        # Created after the renderer so pygame.scrap can bind to the window
+        self.clipboard = ClipboardService()
         
         self.user_volume = 0.5 
         
@@ -32,6 +51,9 @@ class EventController:
         self.input_mode = None # 'search' or 'url'
         self.input_text = ""
         self.last_search_query = ""
+        # Local matches shown while typing a search, (station, (mode, band))
+        self.search_results = []
+        self.search_selection = -1 # -1: Enter searches online
         
         self.running = True
 
@@ -42,11 +64,17 @@ class EventController:
         self._cached_closest = None
         self._cached_freq = None
         self._cached_band_idx = None
+        self._cached_version = None # BandSnapshot.version the cache was built from
 
         self._cached_band_idx = None
         
         self.last_scan_time = 0
 
+        # Last neighborhood handed to the standby pool
+        self._prefetch_key = None
+
+        self.stream_player.on_error = self._on_stream_error
+
         # Play Intro Sound - Moved to main.py
         self._play_intro()
 
@@ -64,6 +92,7 @@ class EventController:
         
         while self.running:
             try:
+                frame_start = time.perf_counter()
                 self._handle_events()
                 if not self.input_mode:
                     self._handle_continuous_input()
@@ -71,6 +100,7 @@ class EventController:
                 self._update_audio_mixing()
                 self.stream_player.update()
                 self._render()
+                self.input.end_frame(time.perf_counter() - frame_start)
                 clock.tick(30)
             except Exception as e:
                 # print(f"Error in Event Loop: {e}") 
@@ -80,8 +110,16 @@ class EventController:
                 # Maybe print only once per second?
                 pass
 
+        self.tasks.shutdown()
+        self.clipboard.shutdown()
+        self.stream_player.shutdown()
+        if self.metadata_watcher:
+            self.metadata_watcher.shutdown()
+        if self.accessibility_manager:
+            self.accessibility_manager.shutdown()
+
     def _handle_events(self):
-        for event in pygame.event.get():
+        for event in self.input.events():
             if event.type == pygame.QUIT:
                 self.running = False
             elif event.type == pygame.KEYDOWN:
@@ -92,37 +130,43 @@ class EventController:
             elif event.type == pygame.TEXTINPUT and self.input_mode:
                 self.input_text += event.text
                 if self.accessibility_manager:
-                    self.accessibility_manager.speak(event.text)
+                    self.accessibility_manager.speak(event.text, kind='echo')
+                self._update_search_results()
 
     def _handle_input(self, event):
         if event.key == pygame.K_RETURN:
-            if self.input_mode == 'search':
+            if self.input_mode == 'search' and self.search_selection >= 0:
+                self._tune_to_result(*self.search_results[self.search_selection])
+            elif self.input_mode == 'search':
                 self._submit_search()
             elif self.input_mode == 'url':
                 self._submit_url()
             self.input_mode = None
             self.input_text = ""
+            self._update_search_results()
         elif event.key == pygame.K_ESCAPE:
             self.input_mode = None
             self.input_text = ""
+            self._update_search_results()
             if self.accessibility_manager:
                 self.accessibility_manager.speak("Cancelled")
+        elif event.key in (pygame.K_UP, pygame.K_DOWN) and self.search_results:
+            self._select_search_result(-1 if event.key == pygame.K_UP else 1)
         elif event.key == pygame.K_BACKSPACE:
             if self.input_text:
                 deleted = self.input_text[-1]
                 self.input_text = self.input_text[:-1]
                 if self.accessibility_manager:
-                    self.accessibility_manager.speak(f"Deleted {deleted}")
+                    self.accessibility_manager.speak(f"Deleted {deleted}", kind='echo')
+                self._update_search_results()
         elif event.key == pygame.K_v and (event.mod & pygame.KMOD_CTRL):
             # Paste support
-            try:
-                import tkinter
-                text = tkinter.Tk().clipboard_get()
+            text = self.clipboard.paste()
+            if text:
                 self.input_text += text
                 if self.accessibility_manager:
                     self.accessibility_manager.speak("Pasted")
-            except Exception:
-                pass
+                self._update_search_results()
 
     def _handle_keydown(self, event):
         key = event.key
@@ -153,13 +197,13 @@ class EventController:
             self._save_custom_band()
         elif key == pygame.K_s:
             # Clear buffer before entering mode to prevent ghosting
-            pygame.event.clear() 
+            self.input.clear() 
             self.input_mode = 'search'
             self.input_text = ""
             if self.accessibility_manager:
                 self.accessibility_manager.speak("Search Station")
         elif key == pygame.K_f:
-            pygame.event.clear()
+            self.input.clear()
             self.input_mode = 'url'
             self.input_text = ""
             if self.accessibility_manager:
@@ -167,31 +211,102 @@ class EventController:
         elif key == pygame.K_w:
             # Now Playing
             meta = self.stream_player.get_now_playing()
+            if self.metadata_watcher and meta == "Unknown":
+                meta = self.metadata_watcher.get_now_playing(self.stream_player.current_url)
             print(f"Now Playing: {meta}")
             if self.accessibility_manager:
                 self.accessibility_manager.speak(f"Now Playing: {meta}")
+        elif key == pygame.K_p:
+            self._toggle_pause()
+        elif key == pygame.K_LEFTBRACKET:
+            self._time_shift(-15)
+        elif key == pygame.K_RIGHTBRACKET:
+            self._time_shift(15)
+        elif key == pygame.K_l:
+            if self.stream_player.timeshift:
+                self.stream_player.go_live()
+                if self.accessibility_manager:
+                    self.accessibility_manager.speak("Live", kind='timeshift')
         elif key == pygame.K_c:
             # Copy URL
             closest_station, _ = self._get_closest_station()
             if closest_station:
                 url = closest_station.get('url_resolved', '')
                 if url:
-                    try:
-                        import tkinter
-                        r = tkinter.Tk()
-                        r.withdraw()
-                        r.clipboard_clear()
-                        r.clipboard_append(url)
-                        r.update() # Enable clipboard update
-                        r.destroy()
+                    if self.clipboard.copy(url):
                         print(f"Copied to clipboard: {url}")
                         if self.accessibility_manager:
                             self.accessibility_manager.speak("URL Copied")
-                    except Exception as e:
-                        print(f"Clipboard error: {e}")
+                    else:
+                        print("Clipboard error: no clipboard backend available")
                         if self.accessibility_manager:
                             self.accessibility_manager.speak("Copy Failed")
 
+    def _toggle_pause(self):
+        if not self.stream_player.timeshift:
+            if self.accessibility_manager:
+                self.accessibility_manager.speak("Time shift disabled")
+            return
+        paused = self.stream_player.toggle_pause()
+        if self.accessibility_manager:
+            self.accessibility_manager.speak("Paused" if paused else "Resumed", kind='timeshift')
+
+    def _time_shift(self, seconds):
+        if not self.stream_player.timeshift:
+            return
+        # Negative seconds go back in time
+        self.stream_player.rewind(-seconds)
+        behind = int(self.stream_player.seconds_behind_live())
+        if self.accessibility_manager:
+            self.accessibility_manager.speak("Live" if behind <= 1 else f"{behind} seconds behind", kind='timeshift')
+
+    def _update_search_results(self):
+        """
+        Matches the typed text against every station already loaded.
+        Runs on each keystroke; Enter without a selection still searches online.
+        """
+        self.search_selection = -1
+        if self.input_mode != 'search' or not self.input_text.strip():
+            self.search_results = []
+            return
+        band = self.bands[self.current_band_index]
+        self.search_results = self.station_manager.search_index.search(
+            self.input_text, limit=SEARCH_SUGGESTIONS, prefer=(self.mode, band))
+
+    def _select_search_result(self, direction):
+        # Wraps through "no selection" (online search) at either end
+        count = len(self.search_results)
+        self.search_selection = (self.search_selection + 1 + direction) % (count + 1) - 1
+        if self.accessibility_manager:
+            if self.search_selection < 0:
+                self.accessibility_manager.speak("Search online", kind='station', interrupt=True)
+            else:
+                station, (mode, band) = self.search_results[self.search_selection]
+                self.accessibility_manager.speak(f"{station.get('name', 'Unknown Station')}, {band}", kind='station', interrupt=True)
+
+    def _tune_to_result(self, station, source):
+        mode, band = source
+        if mode != self.mode:
+            self._toggle_mode()
+        if band not in self.bands:
+            # Custom band saved in the other mode since the band list was built
+            self.bands.append(band)
+            self.band_indices[band] = 0
+        self.current_band_index = self.bands.index(band)
+
+        if self.mode == 'radio':
+            self.current_frequency = station.get('frequency', self.current_frequency)
+        else:
+            stations = self._get_current_station_list()
+            for i, s in enumerate(stations):
+                if s is station or s.get('url_resolved') == station.get('url_resolved'):
+                    self.band_indices[band] = i
+                    break
+
+        print(f"Tuned to search result: {station.get('name')} ({mode} {band})")
+        if self.accessibility_manager:
+            self.accessibility_manager.speak(f"{station.get('name', 'Unknown Station')}, {band}", kind='station', interrupt=True)
+
     def _submit_search(self):
         print(f"Searching for: {self.input_text}")
         if self.accessibility_manager:
@@ -199,12 +314,22 @@ class EventController:
         
         self.last_search_query = self.input_text
         query = self.input_text
-
-        def search_thread():
-            self.station_manager.search_stations(query)
+        key = ('search', query)
+        if key in self.tasks.in_flight():
+            return # Enter again on the same query: the running search answers it
+
+        # Submit through results, including time queued behind other tasks
+        span = tracer.start_span('search', query=query)
+
+        def search_thread(task):
+            with span:
+                published = self.station_manager.search_stations(query, task=task)
+                stations = self.station_manager.get_station_list('exploratory')
+                span.set(superseded=not published, results=len(stations) if published else 0)
+            if not published:
+                return # Superseded by a newer search
             
             # Post-search checks
-            stations = self.station_manager.get_station_list('exploratory')
             if not stations:
                  print("Nothing found.")
                  if self.accessibility_manager:
@@ -218,7 +343,8 @@ class EventController:
                 if self.accessibility_manager:
                     self.accessibility_manager.speak("Exploratory Band")
         
-        threading.Thread(target=search_thread, daemon=True).start()
+        # A search for another query cancels this one, so the last query wins
+        self.tasks.submit(key, search_thread, group='search')
 
     def _save_custom_band(self):
         # Only allow saving from exploratory band if it has stations
@@ -263,15 +389,20 @@ class EventController:
                     self.stream_player.play(url)
                     self.stream_player.set_volume(final_vol)
                     
+                    # Song history needs the name with or without a screen reader
+                    name = station.get('name')
+                    if self.metadata_watcher:
+                        self.metadata_watcher.set_station_name(url, name)
+
                     # Announce if new
                     if final_vol > 0:
                          if self.accessibility_manager:
-                             name = station.get('name')
                              if getattr(self, '_last_spoken_station', None) != name:
-                                 self.accessibility_manager.speak(name)
+                                 self.accessibility_manager.speak(name, kind='station', interrupt=True)
                                  self._last_spoken_station = name
             else:
                 self.stream_player.stop()
+            self._prefetch_neighbors()
             return
 
         # RADIO MODE: Frequency Logic
@@ -329,25 +460,37 @@ class EventController:
                  final_static_vol = 0.0
 
             # 3. Control Stream Player
-            # Only play if URL is valid and volume is audible
-            if current_station_url and final_station_vol > 0:
-                self.stream_player.play(current_station_url)
-                self.stream_player.set_volume(final_station_vol)
-            else:
-                 if current_station_url:
-                     self.stream_player.play(current_station_url)
-                     self.stream_player.set_volume(final_station_vol)
+            # A station coming into range starts a lock-on trace. It lasts
+            # until the tune span play() opens under it ends at first audio
+            lock_on = NULL_SPAN
+            if current_station_url != self.stream_player.current_url:
+                lock_on = tracer.start_span('lock_on', station=closest_station.get('name'),
+                                            frequency=self.current_frequency, distance=round(distance, 3))
+            with tracer.activate(lock_on):
+                # Only play if URL is valid and volume is audible
+                if current_station_url and final_station_vol > 0:
+                    self.stream_player.play(current_station_url)
+                    self.stream_player.set_volume(final_station_vol)
+                else:
+                     if current_station_url:
+                         self.stream_player.play(current_station_url)
+                         self.stream_player.set_volume(final_station_vol)
+            lock_on.end_after(self.stream_player.tune_span)
+
+            # Song history needs the name with or without a screen reader
+            name = closest_station.get('name')
+            if self.metadata_watcher and current_station_url:
+                self.metadata_watcher.set_station_name(current_station_url, name)
 
             # Announce
             if station_vol > 0.5:
                  if self.accessibility_manager:
-                     name = closest_station.get('name')
                      if getattr(self, '_last_spoken_station', None) != name:
-                         self.accessibility_manager.speak(name)
+                         self.accessibility_manager.speak(name, kind='station', interrupt=True)
                          self._last_spoken_station = name
         else:
-            # No station in range
-            self.stream_player.stop()
+            # No station in range, the neighbors stay warm
+            self.stream_player.stop(keep_standby=True)
             self._last_spoken_station = None
             
             # Full static if not muted/intro
@@ -356,16 +499,77 @@ class EventController:
             else:
                  final_static_vol = 1.0 * getattr(self, 'user_volume', 0.5) * 0.15
                  
+        # Filtered hiss while a station fades in, pink noise as one comes
+        # near, broadband white noise far from any
+        if station_vol > 0:
+            color = 'hiss'
+        elif closest_station and distance < band_width * NEAR_STATION_BANDWIDTHS:
+            color = 'pink'
+        else:
+            color = 'white'
+        self.static_generator.set_signal(station_vol, color)
         self.static_generator.set_volume(final_static_vol)
+        self._prefetch_neighbors()
+
+    def _on_stream_error(self, url):
+        print(f"Stream error: {url}")
+        if self.accessibility_manager:
+            self.accessibility_manager.speak("No signal", kind='station')
+
+    def _get_neighbor_stations(self):
+        """
+        Stations one step away from the current position: previous/next
+        channel in TV mode, nearest frequency below/above in radio mode.
+        """
+        stations = self._get_current_station_list()
+        if not stations: return []
+
+        if self.mode == 'tv':
+            band = self.bands[self.current_band_index]
+            idx = self.band_indices.get(band, 0)
+            neighbors = [stations[(idx + 1) % len(stations)], stations[(idx - 1) % len(stations)]]
+        else:
+            closest, distance = self._get_closest_station()
+            locked = closest if distance < self.tuning_bandwidth else None
+            above = None
+            below = None
+            for s in stations:
+                freq = s.get('frequency')
+                if freq is None or s is locked: continue
+                if freq > self.current_frequency:
+                    if above is None or freq < above.get('frequency'):
+                        above = s
+                elif below is None or freq > below.get('frequency'):
+                    below = s
+            neighbors = [s for s in (above, below) if s]
+
+        return neighbors
+
+    def _prefetch_neighbors(self):
+        # Don't spend bandwidth warming streams nobody can hear
+        if self.is_muted:
+            return
+
+        key = (self.mode, self.current_band_index, self.current_frequency,
+               self.band_indices.get(self.bands[self.current_band_index], 0),
+               self._get_current_station_list().version)
+        if key == self._prefetch_key:
+            return
+        self._prefetch_key = key
+
+        urls = [s.get('url_resolved') for s in self._get_neighbor_stations()]
+        self.stream_player.prefetch(urls)
 
     def _get_closest_station(self):
-        # Check cache
+        stations = self._get_current_station_list()
+
+        # Check cache, a fetch publishing a new snapshot changes the version
         if (self._cached_closest and 
             self._cached_freq == self.current_frequency and 
-            self._cached_band_idx == self.current_band_index):
+            self._cached_band_idx == self.current_band_index and
+            self._cached_version == stations.version):
             return self._cached_closest
 
-        stations = self._get_current_station_list()
         if not stations: return None, 999.0
         
         closest = None
@@ -392,6 +596,7 @@ class EventController:
         self._cached_closest = (closest, min_dist)
         self._cached_freq = self.current_frequency
         self._cached_band_idx = self.current_band_index
+        self._cached_version = stations.version
         
         return closest, min_dist
 
@@ -418,14 +623,14 @@ class EventController:
                     self._play_current_station()
 
     def _handle_continuous_input(self):
-        keys = pygame.key.get_pressed()
+        keys = self.input.pressed()
         
         # Initialize user volume if not present
         # Initialize user volume if not present
         if not hasattr(self, 'user_volume'):
             self.user_volume = 0.5
             
-        current_time = pygame.time.get_ticks()
+        current_time = self.input.ticks()
         if not hasattr(self, '_vol_update_time'):
              self._vol_update_time = 0
              
@@ -468,7 +673,7 @@ class EventController:
         else:
             # RADIO NAVIGATION (Frequency)
             tuning_speed = 0.1 
-            current_time = pygame.time.get_ticks()
+            current_time = self.input.ticks()
 
             if not hasattr(self, '_tuning_next_time'):
                  self._tuning_next_time = 0
@@ -476,7 +681,7 @@ class EventController:
             is_turning = False
             
             if keys[pygame.K_RIGHT]:
-                 if not (pygame.key.get_mods() & pygame.KMOD_CTRL):
+                 if not (self.input.mods() & pygame.KMOD_CTRL):
                      is_turning = True
                      if hasattr(self, '_tuning_key') and self._tuning_key == 'RIGHT':
                          # Continued Press
@@ -495,7 +700,7 @@ class EventController:
                          if self.current_frequency > 108.0: self.current_frequency = 87.5
             
             elif keys[pygame.K_LEFT]:
-                 if not (pygame.key.get_mods() & pygame.KMOD_CTRL):
+                 if not (self.input.mods() & pygame.KMOD_CTRL):
                      is_turning = True
                      if hasattr(self, '_tuning_key') and self._tuning_key == 'LEFT':
                          # Continued
@@ -519,7 +724,7 @@ class EventController:
 
     def _scan_station(self, direction):
         # Debounce to prevent rapid skipping
-        current_time = pygame.time.get_ticks()
+        current_time = self.input.ticks()
         if current_time - self.last_scan_time < 300: # 300ms cooldown
              return
         self.last_scan_time = current_time
@@ -561,6 +766,8 @@ class EventController:
                  self.current_band_index = (self.current_band_index + direction) % len(self.bands)
         
         band_name = self.bands[self.current_band_index]
+        # Also pulls a cached TV category into memory before we count it
+        needs_fetch = self.mode == 'tv' and self.station_manager.needs_tv_category(band_name)
         
         # Debug log
         # Use helper method to ensure we get favorites if that's the current band
@@ -568,7 +775,13 @@ class EventController:
         print(f"Switched to band: {band_name}, Stations: {len(stations)}")
         
         if self.accessibility_manager:
-            self.accessibility_manager.speak(f"{band_name}, {len(stations)} stations")
+            self.accessibility_manager.speak(f"{band_name}, {len(stations)} stations", kind='band', interrupt=True)
+
+        # TV category bands are only downloaded the first time they're selected
+        if needs_fetch:
+            if not stations and self.accessibility_manager:
+                self.accessibility_manager.speak(f"Fetching {band_name}")
+            self.tasks.submit(('tv-category', band_name), lambda task: self.station_manager.fetch_tv_category(band_name))
         
         # When changing bands, we might want to tune to the first station?
         # Or just keep the frequency?
@@ -614,7 +827,7 @@ class EventController:
         # Announce station name
         station = stations[idx]
         if self.accessibility_manager:
-            self.accessibility_manager.speak(station.get('name', 'Unknown Station'))
+            self.accessibility_manager.speak(station.get('name', 'Unknown Station'), kind='station', interrupt=True)
 
     def _play_current_station(self):
         # Legacy method kept if something calls it, but updated to effectively do nothing 
@@ -631,10 +844,10 @@ class EventController:
         self.is_muted = not self.is_muted
         if self.is_muted:
             if self.accessibility_manager:
-                self.accessibility_manager.speak("Muted")
+                self.accessibility_manager.speak("Muted", kind='mute')
         else:
             if self.accessibility_manager:
-                self.accessibility_manager.speak("Unmuted")
+                self.accessibility_manager.speak("Unmuted", kind='mute')
                 
         # Force update mixing immediately
         self._update_audio_mixing()
@@ -723,21 +936,25 @@ class EventController:
             
         # Lazy load TV data
         if self.mode == 'tv':
-            # Check if we have stations, if not, fetch (threaded)
-            # Just trigger fetch generally
-            if not self.station_manager.tv_stations['national']:
-                print("First time TV init: Fetching stations...")
-                if self.accessibility_manager:
-                    self.accessibility_manager.speak("Fetching T V channels")
+            # Cached lists show up instantly, stale or missing ones refresh in the background
+            needs_refresh = self.station_manager.load_tv_cached()
+            if needs_refresh:
+                if not self.station_manager.tv_stations['national']:
+                    print("First time TV init: Fetching stations...")
+                    if self.accessibility_manager:
+                        self.accessibility_manager.speak("Fetching T V channels")
                     
-                def fetch_tv():
+                def fetch_tv(task):
                     # Use StationManager's auto detection or fallback
                     self.station_manager.fetch_tv_all() 
                     
-                threading.Thread(target=fetch_tv, daemon=True).start()
+                # Toggling back and forth joins the refresh already running
+                self.tasks.submit('tv-refresh', fetch_tv)
                 
         # Rebuild Bands for the new Mode
         standard_bands = ['local', 'national', 'international', 'favorites', 'exploratory']
+        if self.mode == 'tv':
+            standard_bands = standard_bands + TV_CATEGORY_BANDS
         
         # Get custom bands for this mode
         custom = self.station_manager.custom_bands.get(self.mode, {})
@@ -763,13 +980,15 @@ class EventController:
         
         state = {
             'mode': self.mode,
-            'current_station': self._get_current_station()[0] if self.mode == 'radio' else self._get_current_station(), # TV uses _get_current_station directly which returns the station object
+            'current_station': None, # Filled in per mode below
             'frequency': self.current_frequency,
             'volume': getattr(self, 'user_volume', 0.5), # Show user volume
             'active_panel': self.bands[self.current_band_index],
             'is_muted': self.is_muted, 
             'input_mode': self.input_mode,
             'input_text': self.input_text,
+            'search_results': [(s.get('name', ''), band) for s, (_, band) in self.search_results],
+            'search_selection': self.search_selection,
             'channel_index': channel_index,
             'total_channels': total_channels
         }
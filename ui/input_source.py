@@ -0,0 +1,193 @@
+import json
+import time
+import statistics
+
+import pygame
+
+# Event types worth recording, everything else (mouse, window) is noise
+RECORDED_TYPES = {
+    pygame.KEYDOWN: 'keydown',
+    pygame.KEYUP: 'keyup',
+    pygame.TEXTINPUT: 'text',
+    pygame.QUIT: 'quit',
+}
+
+class LiveInput:
+    """
+    Keyboard state straight from pygame. EventController reads input only
+    through this interface, so a script can stand in for the keyboard.
+    """
+    def events(self):
+        return pygame.event.get()
+
+    def pressed(self):
+        return pygame.key.get_pressed()
+
+    def mods(self):
+        return pygame.key.get_mods()
+
+    def ticks(self):
+        return pygame.time.get_ticks()
+
+    def clear(self):
+        pygame.event.clear()
+
+    def end_frame(self, seconds):
+        pass
+
+class InputRecorder:
+    """
+    Passes another source through and writes its key events as JSON lines
+    with millisecond timestamps, for ReplayInput.
+    """
+    def __init__(self, path, source=None):
+        self.source = source or LiveInput()
+        self._file = open(path, 'w', encoding='utf-8')
+        self._start = None
+
+    def events(self):
+        events = self.source.events()
+        now = self.source.ticks()
+        if self._start is None:
+            self._start = now
+        for event in events:
+            kind = RECORDED_TYPES.get(event.type)
+            if not kind:
+                continue
+            record = {'t': now - self._start, 'type': kind}
+            if kind in ('keydown', 'keyup'):
+                record['key'] = pygame.key.name(event.key)
+                record['mod'] = event.mod
+            elif kind == 'text':
+                record['text'] = event.text
+            self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+        return events
+
+    def pressed(self):
+        return self.source.pressed()
+
+    def mods(self):
+        return self.source.mods()
+
+    def ticks(self):
+        return self.source.ticks()
+
+    def clear(self):
+        self.source.clear()
+
+    def end_frame(self, seconds):
+        self.source.end_frame(seconds)
+
+    def close(self):
+        self._file.close()
+
+class _Pressed:
+    # Indexable like pygame.key.get_pressed()
+    def __init__(self, keys):
+        self.keys = keys
+
+    def __getitem__(self, key):
+        return key in self.keys
+
+class ReplayInput:
+    """
+    Plays a recording back on a virtual clock that advances a fixed
+    frame_ms per frame, so key repeat and debounce timing come out the
+    same on every run regardless of machine speed. Sends QUIT tail_ms
+    after the last event. Also collects per-frame work time and CPU use.
+    """
+    def __init__(self, path, frame_ms=1000 / 30, tail_ms=3000):
+        self.frame_ms = frame_ms
+        self.script = []
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    self.script.append(json.loads(line))
+        self.script.sort(key=lambda r: r['t'])
+        self.end_ms = (self.script[-1]['t'] if self.script else 0) + tail_ms
+
+        self.now = -frame_ms # First events() call lands on t=0
+        self._next = 0
+        self._keys = set()
+        self._mods = 0
+
+        self.frame_times = []
+        self._cpu_start = None
+        self._wall_start = None
+        self._cpu_end = None
+        self._wall_end = None
+
+    def _event(self, record):
+        kind = record['type']
+        if kind in ('keydown', 'keyup'):
+            key = pygame.key.key_code(record['key'])
+            self._mods = record.get('mod', 0)
+            if kind == 'keydown':
+                self._keys.add(key)
+                return pygame.event.Event(pygame.KEYDOWN, key=key, mod=self._mods, unicode='', scancode=0)
+            self._keys.discard(key)
+            return pygame.event.Event(pygame.KEYUP, key=key, mod=self._mods, unicode='', scancode=0)
+        if kind == 'text':
+            return pygame.event.Event(pygame.TEXTINPUT, text=record['text'])
+        return pygame.event.Event(pygame.QUIT)
+
+    def events(self):
+        if self._cpu_start is None:
+            self._cpu_start = time.process_time()
+            self._wall_start = time.perf_counter()
+        self.now += self.frame_ms
+        # Real events are ignored, keep the queue from piling up
+        pygame.event.clear()
+
+        events = []
+        while self._next < len(self.script) and self.script[self._next]['t'] <= self.now:
+            events.append(self._event(self.script[self._next]))
+            self._next += 1
+        if self.finished:
+            if self._cpu_end is None:
+                self._cpu_end = time.process_time()
+                self._wall_end = time.perf_counter()
+            events.append(pygame.event.Event(pygame.QUIT))
+        return events
+
+    @property
+    def finished(self):
+        return self._next >= len(self.script) and self.now >= self.end_ms
+
+    def pressed(self):
+        return _Pressed(self._keys)
+
+    def mods(self):
+        return self._mods
+
+    def ticks(self):
+        return int(self.now)
+
+    def clear(self):
+        pass # Nothing is queued between frames
+
+    def end_frame(self, seconds):
+        self.frame_times.append(seconds)
+
+    def report(self):
+        """
+        Frame work time (excluding the frame-rate sleep) and process CPU
+        use over the replay.
+        """
+        if not self.frame_times:
+            return {}
+        ordered = sorted(self.frame_times)
+        cpu_end = self._cpu_end if self._cpu_end is not None else time.process_time()
+        wall_end = self._wall_end if self._wall_end is not None else time.perf_counter()
+        wall = max(1e-9, wall_end - self._wall_start)
+        return {
+            'frames': len(ordered),
+            'frame_ms_p50': statistics.median(ordered) * 1000,
+            'frame_ms_p95': ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))] * 1000,
+            'frame_ms_max': ordered[-1] * 1000,
+            'cpu_seconds': cpu_end - self._cpu_start,
+            'wall_seconds': wall,
+            'cpu_percent': 100.0 * (cpu_end - self._cpu_start) / wall,
+        }
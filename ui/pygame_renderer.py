@@ -64,11 +64,12 @@ class PygameRenderer:
 
         # Draw Input Modal if active
         if state.get('input_mode'):
-            self._draw_input_modal(state['input_mode'], state.get('input_text', ''))
+            self._draw_input_modal(state['input_mode'], state.get('input_text', ''),
+                                   state.get('search_results'), state.get('search_selection', -1))
 
         pygame.display.flip()
 
-    def _draw_input_modal(self, mode, text):
+    def _draw_input_modal(self, mode, text, results=None, selection=-1):
         # Semi-transparent overlay
         overlay = pygame.Surface((self.width, self.height))
         overlay.set_alpha(128)
@@ -76,7 +77,8 @@ class PygameRenderer:
         self.screen.blit(overlay, (0, 0))
         
         # Modal Box
-        box_width, box_height = 600, 150
+        results = results or []
+        box_width, box_height = 600, 150 + 24 * len(results)
         box_x = (self.width - box_width) // 2
         box_y = (self.height - box_height) // 2
         
@@ -90,9 +92,19 @@ class PygameRenderer:
         # Input Text
         self._draw_text(text + "_", self.font_medium, self.colors['text_main'], (box_x + 20, box_y + 70))
         
+        # Local matches, the selected one highlighted
+        for i, (name, band) in enumerate(results):
+            color = self.colors['accent'] if i == selection else self.colors['text_main']
+            marker = "> " if i == selection else "  "
+            self._draw_text(f"{marker}{name[:48]}", self.font_small, color, (box_x + 20, box_y + 106 + 24 * i))
+            self._draw_text(band.upper(), self.font_small, self.colors['text_dim'], (box_x + box_width - 140, box_y + 106 + 24 * i))
+
         # Hint
-        hint = "Press ENTER to submit, ESC to cancel"
-        self._draw_text(hint, self.font_small, self.colors['text_dim'], (box_x + 20, box_y + 110))
+        if results:
+            hint = "UP/DOWN to pick, ENTER to tune (or search online), ESC to cancel"
+        else:
+            hint = "Press ENTER to submit, ESC to cancel"
+        self._draw_text(hint, self.font_small, self.colors['text_dim'], (box_x + 20, box_y + box_height - 40))
 
     def _draw_text(self, text, font, color, pos):
         surface = font.render(text, True, color)